@@ -1,9 +1,11 @@
 import os
 import uuid
+import hmac
 import logging
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from flask import Flask, request, jsonify, send_from_directory, send_file, make_response
+from flask import Flask, request, jsonify, send_from_directory, send_file, make_response, Response, stream_with_context
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_cors import CORS
 from werkzeug.utils import secure_filename
@@ -15,63 +17,91 @@ try:
 except ImportError:
     print("⚠️ python-dotenv not installed, using system environment variables")
 
-from db_mongo import get_db, upsert_video, save_transcript, save_tags, set_job
+from db_mongo import get_db, upsert_video, set_job, record_index_change, JobWriter, pool_stats
+from job_queue import enqueue_job, JobWorkerPool
+from media_demux import demux_media, DemuxError, DEMUX_FRAME_COUNT
+from model_registry import model_registry
+
+from lazy_import import LazyImport
+from search_cache import cache_stats, normalize_query
+import job_events
+import keyword_index
+import keyword_ranking
+import search_docs
+import segment_store
+from config import FAST_START, SEARCH_MODE, SEARCH_MAX_RESULTS
+from hybrid_search import hybrid_search
+from search_filters import SearchFilters
+from search_pagination import paginate
+
+
+def _optional(module, attr, requires, label, enabled_message):
+    """Optional AI component: deferred until first use with FAST_START, imported now otherwise.
+
+    Returns a LazyImport stand-in (or None if its dependencies are missing).
+    """
+    component = LazyImport(module, attr, requires)
+    missing = component.missing()
+    if missing:
+        print(f"⚠️ {label} not available: missing {', '.join(missing)}")
+        return None
+    if FAST_START:
+        return component
+    try:
+        component.resolve()
+        print(enabled_message)
+        return component
+    except ImportError as e:
+        print(f"⚠️ {label} not available: {e}")
+        return None
+
 
 # Import transcription module with error handling
-try:
-    from enhanced_transcription_simple import enhanced_transcriber_simple
-    TRANSCRIPTION_AVAILABLE = True
-    print("✅ Enhanced Transcription enabled")
-except ImportError as e:
-    TRANSCRIPTION_AVAILABLE = False
-    enhanced_transcriber_simple = None
-    print(f"⚠️ Enhanced Transcription not available: {e}")
+enhanced_transcriber_simple = _optional('enhanced_transcription_simple', 'enhanced_transcriber_simple', ('vosk',),
+                                        'Enhanced Transcription', "✅ Enhanced Transcription enabled")
+TRANSCRIPTION_AVAILABLE = enhanced_transcriber_simple is not None
 
 # Import OCR-capable enhanced transcriber (frame OCR fallback)
-try:
-    from enhanced_transcription import enhanced_transcriber
-    OCR_TRANSCRIPTION_AVAILABLE = True
-    print("🧾 OCR Transcription fallback enabled")
-except ImportError as e:
-    OCR_TRANSCRIPTION_AVAILABLE = False
-    enhanced_transcriber = None
-    print(f"⚠️ OCR Transcription not available: {e}")
+enhanced_transcriber = _optional('enhanced_transcription', 'enhanced_transcriber', ('vosk', 'cv2', 'pytesseract', 'PIL'),
+                                 'OCR Transcription', "🧾 OCR Transcription fallback enabled")
+OCR_TRANSCRIPTION_AVAILABLE = enhanced_transcriber is not None
 
 # Import visual tagger for AI-powered image analysis
-try:
-    from visual_tagger import visual_tagger
-    VISUAL_TAGGING_AVAILABLE = True
-    print("✅ Traditional AI Visual Tagging enabled (YOLO + CLIP)")
-except ImportError as e:
-    VISUAL_TAGGING_AVAILABLE = False
-    print(f"⚠️ Traditional AI Visual Tagging not available: {e}")
+visual_tagger = _optional('visual_tagger', 'visual_tagger', ('torch', 'cv2', 'PIL', 'ultralytics', 'transformers'),
+                          'Traditional AI Visual Tagging', "✅ Traditional AI Visual Tagging enabled (YOLO + CLIP)")
+VISUAL_TAGGING_AVAILABLE = visual_tagger is not None
 
 # Import Gemini AI visual tagger (PRIORITY)
-try:
-    from gemini_visual_tagger import gemini_visual_tagger
-    GEMINI_TAGGING_AVAILABLE = True
-    print("🚀 Gemini AI Visual Tagging enabled (Google AI)")
-except ImportError as e:
-    GEMINI_TAGGING_AVAILABLE = False
-    print(f"⚠️ Gemini AI Visual Tagging not available: {e}")
+gemini_visual_tagger = _optional('gemini_visual_tagger', 'gemini_visual_tagger', ('PIL',),
+                                 'Gemini AI Visual Tagging', "🚀 Gemini AI Visual Tagging enabled (Google AI)")
+GEMINI_TAGGING_AVAILABLE = gemini_visual_tagger is not None
 
 # Import fallback visual tagger for basic analysis
-try:
-    from visual_tagger_fallback import fallback_visual_tagger
-    FALLBACK_TAGGING_AVAILABLE = True
-    print("✅ Fallback Visual Tagging enabled")
-except ImportError as e:
-    FALLBACK_TAGGING_AVAILABLE = False
-    print(f"⚠️ Fallback Visual Tagging not available: {e}")
+fallback_visual_tagger = _optional('visual_tagger_fallback', 'fallback_visual_tagger', ('PIL',),
+                                   'Fallback Visual Tagging', "✅ Fallback Visual Tagging enabled")
+FALLBACK_TAGGING_AVAILABLE = fallback_visual_tagger is not None
 
 # Import AI-powered semantic search
-try:
-    from semantic_search import semantic_searcher, initialize_semantic_search, semantic_search_videos, is_semantic_search_available
-    SEMANTIC_SEARCH_AVAILABLE = True
-    print("🚀 AI-Powered Semantic Search enabled")
-except ImportError as e:
-    SEMANTIC_SEARCH_AVAILABLE = False
-    print(f"⚠️ Semantic Search not available: {e}")
+semantic_search_module = _optional('semantic_search', None, ('numpy',),
+                                   'Semantic Search', "🚀 AI-Powered Semantic Search enabled")
+SEMANTIC_SEARCH_AVAILABLE = semantic_search_module is not None
+if SEMANTIC_SEARCH_AVAILABLE:
+    initialize_semantic_search = LazyImport('semantic_search', 'initialize_semantic_search')
+    semantic_search_videos = LazyImport('semantic_search', 'semantic_search_videos')
+    is_semantic_search_available = LazyImport('semantic_search', 'is_semantic_search_available')
+
+if FAST_START:
+    print("⚡ Fast start: AI modules and models load on first use")
+
+# Capability -> (component, models it needs) for /health readiness
+CAPABILITIES = {
+    'transcription': (enhanced_transcriber_simple, ['vosk']),
+    'ocr_transcription': (enhanced_transcriber, ['vosk']),
+    'visual_tagging': (visual_tagger, ['yolo', 'clip']),
+    'gemini_tagging': (gemini_visual_tagger, []),
+    'fallback_tagging': (fallback_visual_tagger, []),
+    'semantic_search': (semantic_search_module, ['minilm']),
+}
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -82,7 +112,8 @@ app = Flask(__name__)
 from config import (
     JWT_SECRET, JWT_ISSUER, ACCESS_TTL_SECONDS, REFRESH_TTL_SECONDS,
     COOKIE_SECURE, COOKIE_SAMESITE, CORS_ORIGINS, UPLOAD_FOLDER,
-    ALLOWED_EXTENSIONS, MAX_CONTENT_LENGTH
+    ALLOWED_EXTENSIONS, MAX_CONTENT_LENGTH, PIPELINE_PARALLEL, TRANSCRIPT_PROGRESS_SECONDS,
+    MODEL_ADMIN_TOKEN
 )
 
 # Configure CORS
@@ -176,6 +207,7 @@ def register_user():
         picture = _avatar_for_email(email)
         user_data = {'userId': user_id, 'email': email, 'name': name, 'picture': picture, 'passwordHash': password_hash, 'createdAt': datetime.utcnow().isoformat()}
         db.users.insert_one(user_data)
+        search_docs.update_owner(db, [email])  # videos stored under the email before sign-up
         logging.info(f"User registration successful: {name} ({email})")
         access, refresh = _issue_tokens({'userId': user_id, 'email': email, 'name': name, 'picture': picture})
         resp = make_response(jsonify({'ok': True, 'user': {'userId': user_id, 'email': email, 'name': name, 'picture': picture}}))
@@ -260,29 +292,32 @@ def generate_thumbnail(video_path: str, video_id: str) -> str | None:
         logging.warning(f"Thumbnail generation failed for {video_id}: {e}")
     return None
 
-def generate_simple_tags(video_path):
-    """Generate AI-powered visual tags using computer vision models"""
+def generate_simple_tags(video_path, media=None):
+    """Generate AI-powered visual tags using computer vision models
+
+    `media` (MediaArtifacts) lets taggers reuse already-demuxed frames.
+    """
     try:
         # Preference order: Gemini → Traditional (YOLO+CLIP) → Fallback
         if GEMINI_TAGGING_AVAILABLE and gemini_visual_tagger.is_available():
             print("🤖 Using Gemini AI Visual Tagging...")
-            tags = gemini_visual_tagger.tag_video(video_path)
+            tags = gemini_visual_tagger.tag_video(video_path, media)
             print(f"✅ Gemini AI generated tags: {tags}")
             return tags
         elif VISUAL_TAGGING_AVAILABLE and visual_tagger.is_available():
             print("🤖 Using Traditional AI Visual Tagging...")
-            tags = visual_tagger.tag_video(video_path)
+            tags = visual_tagger.tag_video(video_path, media)
             print(f"✅ Traditional AI generated tags: {tags}")
             return tags
         elif FALLBACK_TAGGING_AVAILABLE and fallback_visual_tagger.is_available():
             print("🤖 Using Fallback Visual Tagging...")
-            tags = fallback_visual_tagger.tag_video(video_path)
+            tags = fallback_visual_tagger.tag_video(video_path, media)
             print(f"✅ Fallback generated tags: {tags}")
             return tags
         else:
             print("⚠️ Falling back to simplified tagging (no AI models)")
             # Fallback to simple duration-based tagging
-            duration = get_video_duration(video_path)
+            duration = media.duration if media is not None else get_video_duration(video_path)
             
             tags = ["video-content", "media-file"]
             
@@ -523,6 +558,10 @@ def google_login():
             except Exception:
                 doc = {}
         user_id = doc.get('userId') or user_id
+        try:
+            search_docs.update_owner(db, [user_id, email])  # name and picture may have changed
+        except Exception as e:
+            logging.warning(f"⚠️ Failed to refresh owner info on search documents: {e}")
         # Issue session
         user_data = {'userId': user_id, 'email': email, 'name': name, 'picture': picture}
         logging.info(f"Google login successful: {name} ({email})")
@@ -540,19 +579,73 @@ def health_check():
     try:
         # Test MongoDB connection
         db = get_db()
+        ping_started = time.perf_counter()
         db.command('ping')
         mongo_status = "connected"
+        mongo_ping_ms = round((time.perf_counter() - ping_started) * 1000, 2)
     except Exception as e:
         mongo_status = f"error: {str(e)}"
+        mongo_ping_ms = None
     
     return jsonify({
         'status': 'healthy',
         'timestamp': datetime.utcnow().isoformat(),
         'mongodb': mongo_status,
+        'mongoPingMs': mongo_ping_ms,
+        'mongoPool': pool_stats.snapshot(),
+        'jobEvents': {'source': job_events.hub.active_source, 'streams': job_events.hub.watched()},
         'upload_folder': UPLOAD_FOLDER,
-        'max_file_size_mb': MAX_CONTENT_LENGTH // (1024 * 1024)
+        'max_file_size_mb': MAX_CONTENT_LENGTH // (1024 * 1024),
+        'fast_start': FAST_START,
+        'capabilities': capability_readiness(),
+        'searchCache': cache_stats()
     })
 
+def capability_readiness():
+    """Per-capability state without importing or loading anything.
+
+    installed: dependencies present; imported: module loaded in this process;
+    ready: imported and all its models loaded (first request will be fast).
+    """
+    readiness = {}
+    for name, (component, models) in CAPABILITIES.items():
+        imported = component is not None and component.is_loaded
+        models_loaded = {m: model_registry.is_loaded(m) for m in models}
+        readiness[name] = {
+            'installed': component is not None,
+            'imported': imported,
+            'models': models_loaded,
+            'ready': imported and all(models_loaded.values()),
+            'error': component.error if component is not None else None,
+        }
+    return readiness
+
+@app.route('/models', methods=['GET'])
+def model_stats():
+    """Per-model load state and memory cost in this process"""
+    return jsonify({'pid': os.getpid(), 'models': model_registry.stats()})
+
+@app.route('/models/<name>/<action>', methods=['POST'])
+def model_control(name, action):
+    """Warm or unload a shared model in this web process (operators only).
+
+    Needs the internal MODEL_ADMIN_TOKEN in an X-Admin-Token header. Job worker
+    processes keep their own registries and are not affected; they shed models
+    through MODEL_IDLE_SECONDS / MODEL_MEMORY_LIMIT_MB instead.
+    """
+    token = request.headers.get('X-Admin-Token', '')
+    if not MODEL_ADMIN_TOKEN or not hmac.compare_digest(token.encode(), MODEL_ADMIN_TOKEN.encode()):
+        return jsonify({'error': 'Forbidden'}), 403
+    if name not in model_registry.names():
+        return jsonify({'error': f'Unknown model: {name}'}), 404
+    if action == 'warm':
+        ok = model_registry.warm([name])[name]
+    elif action == 'unload':
+        ok = model_registry.unload(name)
+    else:
+        return jsonify({'error': f'Unknown action: {action}'}), 400
+    return jsonify({'ok': ok, 'model': name, 'action': action, 'stats': model_registry.stats()[name]})
+
 @app.route('/debug/user', methods=['GET'])
 def debug_user():
     """Debug endpoint to check current user and cookies"""
@@ -688,9 +781,90 @@ def upload_video():
         logging.error(f"Upload error: {e}")
         return jsonify({'error': str(e)}), 500
 
+def keyword_search_videos(query: str, db, filters: SearchFilters, max_results: int = SEARCH_MAX_RESULTS) -> list:
+    """Keyword (BM25F) search across all videos passing `filters`: formatted results, best first"""
+    # Candidates from the keyword index: title, tag and transcript postings for the
+    # stemmed query terms (and terms they prefix), ranked with BM25F
+    keyword_index.ensure_index(db)
+    keyword_matches = keyword_index.lookup(db, query, filters=filters)
+    terms = keyword_index.query_terms(query)
+    # Filtered postings undercount how common a term is; idf needs the whole corpus
+    df = keyword_index.document_frequencies(db, terms) if filters.active and keyword_matches else None
+    keyword_scores = keyword_ranking.bm25f_scores(db, keyword_matches, terms, df=df)
+    top_score = max(keyword_scores.values(), default=0.0) or 1.0
+    all_video_ids = keyword_ranking.rank(keyword_scores, limit=max_results)
+
+    logging.info(f"Search results: {len(keyword_matches)} keyword matches, {len(all_video_ids)} candidate videos")
+    logging.info(f"Starting duplicate detection and filtering...")
+
+    # Get video metadata for results and apply basic filters (global)
+    videos = []
+    processed_videos = set()  # Track processed videos to avoid duplicates
+    processed_titles = set()  # Track processed titles to avoid content duplicates
+    processed_content = set()  # Track processed content to avoid similar videos
+
+    # Everything a result shows comes from the candidates' search documents:
+    # one indexed read however many videos matched
+    candidate_ids = list(all_video_ids)
+    docs = search_docs.fetch(db, candidate_ids)
+
+    for video_id in candidate_ids:
+        if video_id in processed_videos:
+            continue  # Skip duplicates
+        processed_videos.add(video_id)
+        doc = docs.get(video_id)
+        if doc:
+            if not doc.get('ownerId'):
+                logging.warning(f"⚠️ No ownerId for video: {video_id}")
+
+            # Filters were applied in the index lookup; re-check in case a posting's attributes are stale
+            if filters.matches(doc):
+                # BM25F score relative to the best match (1.0 = top result)
+                relevance = keyword_scores.get(video_id, 0.0) / top_score
+
+                # High-quality threshold for deployment - only show excellent matches
+                if relevance >= 0.6:  # Only show 60%+ relevance for perfect results
+                    # Enhanced duplicate detection
+                    video_title = doc.get('title', 'Untitled Video')
+                    video_content_hash = f"{video_title}_{doc.get('duration', 0)}_{doc.get('transcriptLength', 0)}"
+
+                    # Skip if we've seen this exact title or very similar content
+                    if video_title in processed_titles or video_content_hash in processed_content:
+                        continue  # Skip duplicate content
+
+                    processed_titles.add(video_title)
+                    processed_content.add(video_content_hash)
+
+                videos.append({**search_docs.result_fields(doc), 'relevance': min(relevance, 1.0)})
+
+    # Final deduplication step - remove any remaining duplicates
+    final_videos = []
+    seen_final = set()
+    duplicates_removed = 0
+    for video in videos:
+        video_key = f"{video['videoId']}_{video['title']}"
+        if video_key not in seen_final:
+            seen_final.add(video_key)
+            final_videos.append(video)
+        else:
+            duplicates_removed += 1
+
+    logging.info(f"Final deduplication: {duplicates_removed} duplicates removed, {len(final_videos)} unique results")
+
+    # Sort by relevance descending for best results first
+    final_videos.sort(key=lambda x: x['relevance'], reverse=True)
+    return final_videos
+
+
 @app.route('/global-search', methods=['POST'])
 def global_search():
-    """AI-Powered Semantic Search across all videos in the database"""
+    """Search across all videos in the database.
+
+    Request JSON 'mode' (default SEARCH_MODE): hybrid fuses semantic and keyword
+    results; semantic falls back to keyword only when it finds nothing.
+    'filters' (see search_filters) are applied inside the indexes. Pass the
+    returned 'nextCursor' as 'cursor' for the next page; 'page' still works.
+    """
     try:
         user, err = require_auth()
         if err:
@@ -708,317 +882,62 @@ def global_search():
         logging.info(f"AI Semantic search query: '{query}'")
         db = get_db()
         
-        # Try AI-powered semantic search first
-        if SEMANTIC_SEARCH_AVAILABLE and is_semantic_search_available():
-            try:
-                logging.info("Using AI-powered semantic search")
-                semantic_results = semantic_search_videos(query, db, top_k=limit * 2)
-                
-                if semantic_results:
-                    # Apply filters to semantic results
-                    filtered_results = []
-                    for result in semantic_results:
-                        # Duration filter
-                        dur_ok = True
-                        dur_filter = (filters.get('duration') or 'all').lower()
-                        duration = result.get('duration', 0)
-                        if dur_filter == 'short':
-                            dur_ok = duration < 60
-                        elif dur_filter == 'medium':
-                            dur_ok = 60 <= duration <= 300
-                        elif dur_filter == 'long':
-                            dur_ok = duration > 300
-                        
-                        if dur_ok:
-                            filtered_results.append(result)
-                    
-                    # Pagination
-                    total = len(filtered_results)
-                    start = (page - 1) * limit
-                    end = start + limit
-                    paged = filtered_results[start:end]
-                    
-                    logging.info(f"AI Semantic search found {total} results")
-                    return jsonify({
-                        'ok': True,
-                        'query': query,
-                        'results': paged,
-                        'total': total,
-                        'page': page,
-                        'limit': limit,
-                        'search_type': 'ai_semantic',
-                        'quality': 'perfect' if all(r.get('relevance', 0) >= 0.8 for r in paged) else 'excellent'
-                    })
-                else:
-                    logging.info("AI Semantic search returned no results, falling back to traditional search")
-            except Exception as e:
-                logging.error(f"AI Semantic search failed: {e}")
-                logging.info("Falling back to traditional search")
-        
-        # Fallback to traditional search if AI search fails or is unavailable
-        logging.info("Using traditional keyword-based search")
-        
-        # Search in transcripts (global, no owner filter)
-        transcript_results = []
-        try:
-            tr_filter = {'$text': {'$search': query}}
-            transcript_results = list(db.transcripts.find(tr_filter).limit(30))
-        except Exception:
-            transcript_results = []
-        
-        # Enhanced regex search with word boundaries and partial matches
-        if not transcript_results:
-            # Try exact phrase first
-            tr_filter = {'text': {'$regex': query, '$options': 'i'}}
-            transcript_results = list(db.transcripts.find(tr_filter).limit(20))
-        
-            # If still no results, try individual words
-            if not transcript_results:
-                words = query.lower().split()
-                for word in words:
-                    if len(word) > 2:  # Skip very short words
-                        tr_filter = {'text': {'$regex': word, '$options': 'i'}}
-                        word_results = list(db.transcripts.find(tr_filter).limit(10))
-                        transcript_results.extend(word_results)
-        
-        # Search in tags (global, no owner filter) - enhanced
-        tag_results = []
-        # Try exact phrase in tags
-        tg_filter = {'keywords': {'$regex': query, '$options': 'i'}}
-        tag_results = list(db.tags.find(tg_filter).limit(20))
-        
-        # If no tag results, try individual words
-        if not tag_results:
-            words = query.lower().split()
-            for word in words:
-                if len(word) > 2:
-                    tg_filter = {'keywords': {'$regex': word, '$options': 'i'}}
-                    word_results = list(db.tags.find(tg_filter).limit(10))
-                    tag_results.extend(word_results)
+        mode = (data.get('mode') or SEARCH_MODE).lower()
+        semantic_ready = SEMANTIC_SEARCH_AVAILABLE and is_semantic_search_available()
+        search_filters = SearchFilters.from_request(filters)
         
-        # Search in video titles/filenames (NEW)
-        title_results = []
-        try:
-            # Search in video metadata for title matches
-            title_filter = {'originalName': {'$regex': query, '$options': 'i'}}
-            title_docs = list(db.videos.find(title_filter, {'videoId': 1}).limit(20))
-            title_results = [{'videoId': doc['videoId']} for doc in title_docs]
+        def run_search():
+            """Ranked, filtered results (up to SEARCH_MAX_RESULTS) and response info"""
+            # Hybrid: semantic and keyword retrievers run concurrently, fused with RRF
+            if mode == 'hybrid' and semantic_ready:
+                fused, retrievers = hybrid_search({
+                    'semantic': lambda: semantic_search_videos(query, db, top_k=SEARCH_MAX_RESULTS, filters=search_filters),
+                    'keyword': lambda: keyword_search_videos(query, db, search_filters),
+                })
+                logging.info(f"Hybrid search found {len(fused)} results: {retrievers}")
+                return fused, {'search_type': 'hybrid', 'retrievers': retrievers}
             
-            # If no title matches, try individual words
-            if not title_results:
-                words = query.lower().split()
-                for word in words:
-                    if len(word) > 2:
-                        title_filter = {'originalName': {'$regex': word, '$options': 'i'}}
-                        word_docs = list(db.videos.find(title_filter, {'videoId': 1}).limit(10))
-                        title_results.extend([{'videoId': doc['videoId']} for doc in word_docs])
-        except Exception as e:
-            logging.warning(f"Title search failed: {e}")
-            title_results = []
-        
-        # Combine and deduplicate results from all sources
-        all_video_ids = set()
-        for result in transcript_results + tag_results + title_results:
-            all_video_ids.add(result['videoId'])
-        
-        logging.info(f"Search results: {len(transcript_results)} transcripts, {len(tag_results)} tags, {len(title_results)} titles, {len(all_video_ids)} unique videos")
-        logging.info(f"Starting duplicate detection and filtering...")
-        
-        # Get video metadata for results and apply basic filters (global)
-        videos = []
-        processed_videos = set()  # Track processed videos to avoid duplicates
-        processed_titles = set()  # Track processed titles to avoid content duplicates
-        processed_content = set()  # Track processed content to avoid similar videos
-        
-        for video_id in list(all_video_ids):
-            if video_id in processed_videos:
-                continue  # Skip duplicates
-            processed_videos.add(video_id)
-            v_filter = {'videoId': video_id}
-            video_meta = db.videos.find_one(v_filter)
-            if video_meta:
-                duration = float(video_meta.get('duration', 0) or 0)
-                uploaded_at = video_meta.get('uploadedAt', '')
-                owner_id = video_meta.get('ownerId', '')
-                
-                # Get user info for proper display - ENHANCED
-                user_info = {'name': 'Unknown User', 'email': '', 'picture': ''}
-                if owner_id:
-                    # Try multiple ways to find the user
-                    user_doc = db.users.find_one({'userId': owner_id})
-                    if not user_doc:
-                        # Try finding by email if userId doesn't work
-                        user_doc = db.users.find_one({'email': owner_id})
-                    if not user_doc:
-                        # Try finding by name if email doesn't work
-                        user_doc = db.users.find_one({'name': owner_id})
-                    
-                    if user_doc:
-                        user_info = {
-                            'name': user_doc.get('name', user_doc.get('email', 'Unknown User')),
-                            'email': user_doc.get('email', ''),
-                            'picture': user_doc.get('picture', '')
-                        }
-                        logging.info(f"✅ Found user for video {video_id}: {user_info['name']} ({user_info['email']})")
-                    else:
-                        # Create a fallback user info based on owner_id
-                        user_info = {
-                            'name': f"User {owner_id[:8]}" if owner_id else 'Unknown User',
-                            'email': owner_id if '@' in str(owner_id) else '',
-                            'picture': ''
-                        }
-                        logging.warning(f"⚠️ No user found for ownerId: {owner_id}, using fallback: {user_info['name']}")
-                else:
-                    logging.warning(f"⚠️ No ownerId for video: {video_id}")
-                
-                # Duration filter
-                dur_ok = True
-                dur_filter = (filters.get('duration') or 'all').lower()
-                if dur_filter == 'short':
-                    dur_ok = duration < 60
-                elif dur_filter == 'medium':
-                    dur_ok = 60 <= duration <= 300
-                elif dur_filter == 'long':
-                    dur_ok = duration > 300
-
-                # Date filter (very simple)
-                date_ok = True
-                # Could parse ISO and compare, skip heavy parsing for now
-
-                if dur_ok and date_ok:
-                    # Get transcript for this video (global)
-                    transcript = db.transcripts.find_one({'videoId': video_id})
-                    transcript_text = transcript.get('text', '') if transcript else ''
-                    
-                    # Get tags for this video (global)
-                    tags_doc = db.tags.find_one({'videoId': video_id})
-                    tags = tags_doc.get('keywords', []) if tags_doc else []
-                    
-                    # Calculate relevance using phrase + coverage scoring for more intuitive 100% matches
-                    import re
-                    def tokenize(s: str):
-                        return [w for w in re.findall(r"[a-z0-9]+", (s or '').lower()) if w]
-
-                    def coverage(words_query, text: str) -> float:
-                        if not text:
-                            return 0.0
-                        ws = set(tokenize(text))
-                        if not ws:
-                            return 0.0
-                        hits = sum(1 for w in words_query if w in ws)
-                        return hits / max(len(words_query), 1)
-
-                    q_words = tokenize(query)
-                    query_lower = (query or '').lower().strip()
-
-                    # Enhanced relevance calculation for better matches
-                    transcript_text_l = (transcript_text or '').lower()
-                    tags_text_l = (' '.join([str(t) for t in (tags or [])])).lower()
-                    
-                    # Exact phrase match -> perfect score
-                    if query_lower and (query_lower in transcript_text_l or query_lower in tags_text_l):
-                        relevance = 1.0
-                    else:
-                        # Calculate coverage scores
-                        text_cov = coverage(q_words, transcript_text_l)
-                        tag_cov = coverage(q_words, tags_text_l)
-                        
-                        # Enhanced weighted scoring
-                        relevance = max(0.9 * text_cov + 0.1 * tag_cov, 0.9 * tag_cov + 0.1 * text_cov)
-                        
-                        # Title matching boost
-                        title_text = (video_meta.get('originalName', '') or video_meta.get('filename','') or '')
-                        title_cov = coverage(q_words, title_text)
-                        if title_cov > 0:
-                            if title_cov >= 0.8:  # 80%+ words in title
-                                relevance = max(relevance, 0.95)
-                            elif title_cov >= 0.6:  # 60%+ words in title
-                                relevance = max(relevance, 0.9)
-                            elif title_cov >= 0.4:  # 40%+ words in title
-                                relevance = max(relevance, 0.8)
-                            elif title_cov >= 0.2:  # 20%+ words in title
-                                relevance = max(relevance, 0.7)
-                            else:  # Some words in title
-                                relevance = max(relevance, 0.6)
-                        
-                        # Prefix matching boost
-                        if q_words:
-                            prefix_hit = False
-                            ws = set(tokenize(transcript_text_l)) | set(tokenize(tags_text_l))
-                            for qw in q_words:
-                                if any(w.startswith(qw) for w in ws):
-                                    prefix_hit = True
-                                    break
-                            if prefix_hit:
-                                relevance = min(1.0, relevance + 0.1)
-                        
-                        # Ensure minimum relevance for any match
-                        if relevance <= 0:
-                            relevance = 0.3
-
-                    # High-quality threshold for deployment - only show excellent matches
-                    if relevance >= 0.6:  # Only show 60%+ relevance for perfect results
-                        # Enhanced duplicate detection
-                        video_title = video_meta.get('originalName', 'Untitled Video')
-                        video_content_hash = f"{video_title}_{duration}_{len(transcript_text)}"
-                        
-                        # Skip if we've seen this exact title or very similar content
-                        if video_title in processed_titles or video_content_hash in processed_content:
-                            continue  # Skip duplicate content
-                        
-                        processed_titles.add(video_title)
-                        processed_content.add(video_content_hash)
-
-                    videos.append({
-                        'id': video_id,
-                        'videoId': video_id,
-                        'title': video_meta.get('originalName', 'Untitled Video'),
-                            'user': user_info['name'],  # Show actual user name
-                            'userEmail': user_info['email'],  # Include email for reference
-                            'userPicture': user_info['picture'],  # Include profile picture
-                        'duration': duration,
-                        'uploadedAt': uploaded_at,
-                        'thumbnail': (video_meta.get('thumbnails') or {}).get('default'),
-                        'transcript': transcript_text[:200] + '...' if len(transcript_text) > 200 else transcript_text,
-                        'tags': tags,
-                        'relevance': min(relevance, 1.0),
-                        'views': 0,  # Placeholder
-                        'likes': 0,  # Placeholder
-                        'category': 'general'  # Default category
-                    })
-        
-        # Final deduplication step - remove any remaining duplicates
-        final_videos = []
-        seen_final = set()
-        duplicates_removed = 0
-        for video in videos:
-            video_key = f"{video['videoId']}_{video['title']}"
-            if video_key not in seen_final:
-                seen_final.add(video_key)
-                final_videos.append(video)
-            else:
-                duplicates_removed += 1
-        
-        logging.info(f"Final deduplication: {duplicates_removed} duplicates removed, {len(final_videos)} unique results")
-        
-        # Sort by relevance descending for best results first
-        final_videos.sort(key=lambda x: x['relevance'], reverse=True)
+            # Try AI-powered semantic search first
+            if mode != 'keyword' and semantic_ready:
+                try:
+                    logging.info("Using AI-powered semantic search")
+                    # Filtered inside the index (and cached) in semantic_search_videos
+                    filtered_results = semantic_search_videos(query, db, top_k=SEARCH_MAX_RESULTS, filters=search_filters)
+                    if filtered_results:
+                        logging.info(f"AI Semantic search found {len(filtered_results)} results")
+                        return filtered_results, {'search_type': 'ai_semantic'}
+                    logging.info("AI Semantic search returned no results, falling back to traditional search")
+                except Exception as e:
+                    logging.error(f"AI Semantic search failed: {e}")
+                    logging.info("Falling back to traditional search")
+            
+            # Fallback to traditional search if AI search fails or is unavailable
+            logging.info("Using traditional keyword-based search")
+            return keyword_search_videos(query, db, search_filters), {'search_type': 'traditional'}
         
-        # Pagination
-        total = len(final_videos)
-        start = (page - 1) * limit
-        end = start + limit
-        paged = final_videos[start:end]
+        # Pages after the first come from the cursor's search session, not a new search
+        try:
+            result_page = paginate(run_search, limit, page=page, cursor=data.get('cursor'),
+                                   key=(normalize_query(query), search_filters.key(), mode))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        paged = result_page['results']
+        info = result_page['info']
+        if info['search_type'] == 'ai_semantic':
+            quality = 'perfect' if all(r.get('relevance', 0) >= 0.8 for r in paged) else 'excellent'
+        else:
+            quality = 'high' if all(r.get('relevance', 0) >= 0.7 for r in paged) else 'good'
 
         return jsonify({
             'ok': True,
             'query': query,
             'results': paged,
-            'total': total,
-            'page': page,
+            'total': result_page['total'],
+            'page': result_page['offset'] // limit + 1,
             'limit': limit,
-            'search_type': 'traditional',
-            'quality': 'high' if all(r.get('relevance', 0) >= 0.7 for r in paged) else 'good'
+            'nextCursor': result_page['nextCursor'],
+            **info,
+            'quality': quality
         })
         
     except Exception as e:
@@ -1059,6 +978,7 @@ def toggle_like(videoId):
         
         # Count total likes for this video
         like_count = db.likes.count_documents({'videoId': videoId})
+        search_docs.update_likes(db, videoId, like_count)
         
         return jsonify({
             'liked': liked,
@@ -1119,6 +1039,7 @@ def increment_view(videoId):
                 {'$inc': {'count': 1}, '$setOnInsert': {'videoId': videoId}},
                 upsert=True
             )
+            search_docs.add_view(db, videoId)
         except Exception:
             pass
 
@@ -1128,9 +1049,203 @@ def increment_view(videoId):
         logging.error(f"Increment view error: {e}")
         return jsonify({'error': str(e)}), 500
 
+def transcript_progress_reporter(job: JobWriter):
+    """Build an on_partial callback that pushes partial transcripts into the job, throttled."""
+    last_sent = [0.0]
+
+    def report(text, audio_seconds):
+        now = time.monotonic()
+        if now - last_sent[0] < TRANSCRIPT_PROGRESS_SECONDS:
+            return
+        last_sent[0] = now
+        job.step({
+            'step': 'transcription',
+            'partialTranscript': text[-1000:],
+            'audioSeconds': round(audio_seconds, 1)
+        })
+    return report
+
+def transcribe_for_pipeline(videoId, video_path, job: JobWriter, media=None):
+    """Audio branch: speech + subtitles with OCR fallback. Returns (text, segments).
+
+    If the demuxed audio turns out to have failed (a streamed decode only
+    reports that at the end), the video is transcribed again from the file.
+    """
+    transcript_text, segments = _transcribe(videoId, video_path, job, media)
+    if media is not None:
+        try:
+            media.drain_audio()  # streamed PCM must be consumed; raises if its decode failed
+        except DemuxError as e:
+            logging.warning(f"Demuxed audio failed for {videoId}, transcribing from the file: {e}")
+            transcript_text, segments = _transcribe(videoId, video_path, job, None)
+
+    # Staged; written with the final job status
+    job.save_transcript(transcript_text, segments)
+    return transcript_text, segments
+
+def _transcribe(videoId, video_path, job: JobWriter, media=None):
+    try:
+        if TRANSCRIPTION_AVAILABLE and enhanced_transcriber_simple:
+            transcript_text, segments = enhanced_transcriber_simple.transcribe_video(
+                video_path, media, transcript_progress_reporter(job)
+            )
+            # If no speech/subtitles detected, try OCR-based fallback
+            if (not transcript_text or not transcript_text.strip() or transcript_text.strip().lower() in [
+                'no speech detected in video', 'no speech or text detected'
+            ]):
+                if OCR_TRANSCRIPTION_AVAILABLE and enhanced_transcriber:
+                    try:
+                        ocr_text, ocr_segments = enhanced_transcriber.transcribe_video(video_path, media)
+                        if ocr_text and ocr_text.strip():
+                            transcript_text, segments = ocr_text, ocr_segments
+                        else:
+                            transcript_text = transcript_text or "No speech or text detected"
+                            segments = []
+                    except Exception as _e:
+                        logging.warning(f"OCR transcription fallback failed for {videoId}: {_e}")
+                        transcript_text = transcript_text or "No speech or text detected"
+                segments = []
+        else:
+            transcript_text = "Transcription service not available"
+            segments = []
+    except Exception as e:
+        logging.warning(f"Transcription failed for {videoId}: {e}")
+        transcript_text = "Transcription failed - using fallback"
+        segments = []
+    return transcript_text, segments
+
+def tag_for_pipeline(videoId, video_path, job: JobWriter, media=None):
+    """Frame branch: visual tagging. Returns the tag list."""
+    if media is not None:
+        try:
+            media.wait()  # frames are written by their own ffmpeg pass
+        except DemuxError as e:
+            logging.warning(f"Demuxed frames failed for {videoId}, tagging decodes the file: {e}")
+            media = None
+    try:
+        visual_tags = generate_simple_tags(video_path, media)
+    except Exception as e:
+        logging.warning(f"Visual tagging failed for {videoId}: {e}")
+        visual_tags = ['video', 'content', 'media']
+    
+    # Staged; written with the final job status
+    job.save_tags(visual_tags)
+    return visual_tags
+
+def _timed(timings, stage, fn, *args):
+    """Run fn(*args) and record its wall-clock seconds under timings[stage]."""
+    started = time.perf_counter()
+    try:
+        return fn(*args)
+    finally:
+        timings[stage] = round(time.perf_counter() - started, 3)
+
+def run_video_pipeline(videoId, video_path):
+    """Transcribe, tag, and analyze a video, reporting progress through a JobWriter.
+
+    A single demux pass decodes the file once (PCM, frames, subtitles,
+    thumbnail); every analyzer consumes those artifacts. PCM is streamed into
+    Vosk as it is decoded and partial transcripts land in the job document.
+    With PIPELINE_PARALLEL the audio branch (PCM → Vosk) and the frame branch
+    (frames → tagger) run concurrently. Progress writes are throttled and the
+    transcript and tags are written together with the final status.
+    """
+    with JobWriter(videoId) as job:
+        _run_video_pipeline(videoId, video_path, job)
+
+def _run_video_pipeline(videoId, video_path, job: JobWriter):
+    timings = {}
+    pipeline_started = time.perf_counter()
+    
+    # Step 0: Demux once for all analyzers (falls back to per-analyzer decoding)
+    job.step({'step': 'starting'})
+    thumb_path = os.path.join(UPLOAD_FOLDER, 'thumbnails', f"{videoId}.jpg")
+    missing_thumb = not os.path.exists(thumb_path)
+    try:
+        media = _timed(timings, 'demux', demux_media, video_path, DEMUX_FRAME_COUNT,
+                       thumb_path if missing_thumb else None)
+    except Exception as e:
+        logging.warning(f"Demux failed for {videoId}, analyzers will decode separately: {e}")
+        media = None
+    
+    try:
+        if PIPELINE_PARALLEL:
+            # Steps 1+2: Transcription and Visual Tagging side by side
+            job.step({'step': 'transcription', 'parallel': True})
+            with ThreadPoolExecutor(max_workers=2, thread_name_prefix=f"pipeline-{videoId[:8]}") as pool:
+                audio = pool.submit(_timed, timings, 'transcription', transcribe_for_pipeline, videoId, video_path, job, media)
+                frames = pool.submit(_timed, timings, 'visual_tagging', tag_for_pipeline, videoId, video_path, job, media)
+                transcript_text, segments = audio.result()
+                if not frames.done():
+                    job.step({'step': 'visual_tagging', 'parallel': True})
+                visual_tags = frames.result()
+        else:
+            # Step 1: Enhanced Transcription (Speech + Subtitles) with OCR fallback
+            job.step({'step': 'transcription'})
+            transcript_text, segments = _timed(timings, 'transcription', transcribe_for_pipeline, videoId, video_path, job, media)
+            
+            # Step 2: Visual Tagging
+            job.step({'step': 'visual_tagging'})
+            visual_tags = _timed(timings, 'visual_tagging', tag_for_pipeline, videoId, video_path, job, media)
+        
+        if media is not None and media.error is None:
+            media.wait()
+            if missing_thumb and media.thumbnail_path:
+                upsert_video(videoId, {'thumbnails': {'default': os.path.join('thumbnails', f"{videoId}.jpg")}})
+    finally:
+        if media is not None:
+            media.cleanup()
+    
+    # Step 3: Emotion Analysis (join point)
+    job.step({'step': 'emotion_analysis'})
+    try:
+        emotions = _timed(timings, 'emotion_analysis', analyze_emotions_from_text_and_segments, transcript_text, segments)
+    except Exception as e:
+        logging.warning(f"Emotion analysis failed for {videoId}: {e}")
+        emotions = [{'timestamp': 0, 'label': 'neutral', 'intensity': 0.5}]
+    
+    # Step 4: Indexing
+    job.step({'step': 'indexing'})
+    
+    # Step 5: Story Draft
+    job.step({'step': 'story_draft'})
+    story_draft = f"AI-generated story based on the transcript: {transcript_text[:100]}..."
+    
+    # Step 6: Final Render
+    job.step({'step': 'final_render'})
+    
+    timings['total'] = round(time.perf_counter() - pipeline_started, 3)
+    logging.info(f"Pipeline timings for {videoId}: {timings}")
+    
+    # Mark as completed (with the staged transcript and tags)
+    job.complete({
+        'transcript': transcript_text,
+        'tags': visual_tags,
+        'emotions': emotions,
+        'story_draft': story_draft,
+        'timings': timings,
+        'parallel': PIPELINE_PARALLEL,
+        'completed_at': datetime.utcnow().isoformat()
+    })
+
+def process_job(job):
+    """Job queue handler: run the processing pipeline for a claimed job.
+
+    Raises on failure so the worker can retry or mark the job as errored.
+    """
+    videoId = job['videoId']
+    video_path, _ext = resolve_video_path(videoId)
+    if not video_path:
+        raise RuntimeError('Video not found')
+    run_video_pipeline(videoId, video_path)
+
 @app.route('/process/<videoId>', methods=['POST'])
 def process_video(videoId):
-    """Process a video: transcribe, tag, and analyze"""
+    """Queue a video for processing; workers transcribe, tag, and analyze it.
+
+    Returns 202 right away. Follow progress on /jobs/<videoId>/events (or poll
+    /jobs/<videoId>/status).
+    """
     try:
         user, err = require_auth()
         if err:
@@ -1140,97 +1255,139 @@ def process_video(videoId):
         if not video_path:
             return jsonify({'error': 'Video not found'}), 404
         
-        # Set job status to processing
-        set_job(videoId, 'processing', {'step': 'starting', 'ownerId': user['userId']})
-        
-        # Step 1: Enhanced Transcription (Speech + Subtitles) with OCR fallback
-        set_job(videoId, 'processing', {'step': 'transcription'})
-        try:
-            if TRANSCRIPTION_AVAILABLE and enhanced_transcriber_simple:
-                transcript_text, segments = enhanced_transcriber_simple.transcribe_video(video_path)
-                # If no speech/subtitles detected, try OCR-based fallback
-                if (not transcript_text or not transcript_text.strip() or transcript_text.strip().lower() in [
-                    'no speech detected in video', 'no speech or text detected'
-                ]):
-                    if OCR_TRANSCRIPTION_AVAILABLE and enhanced_transcriber:
-                        try:
-                            ocr_text, ocr_segments = enhanced_transcriber.transcribe_video(video_path)
-                            if ocr_text and ocr_text.strip():
-                                transcript_text, segments = ocr_text, ocr_segments
-                            else:
-                                transcript_text = transcript_text or "No speech or text detected"
-                                segments = []
-                        except Exception as _e:
-                            logging.warning(f"OCR transcription fallback failed for {videoId}: {_e}")
-                            transcript_text = transcript_text or "No speech or text detected"
-                    segments = []
-            else:
-                transcript_text = "Transcription service not available"
-                segments = []
-        except Exception as e:
-            logging.warning(f"Transcription failed for {videoId}: {e}")
-            transcript_text = "Transcription failed - using fallback"
-            segments = []
-        
-        # Save transcript
-        save_transcript(videoId, transcript_text, segments)
-        
-        # Step 2: Simple Tagging (without OpenCV)
-        set_job(videoId, 'processing', {'step': 'visual_tagging'})
-        try:
-            visual_tags = generate_simple_tags(video_path)
-        except Exception as e:
-            logging.warning(f"Visual tagging failed for {videoId}: {e}")
-            visual_tags = ['video', 'content', 'media']
-        
-        # Save tags
-        save_tags(videoId, visual_tags)
-        
-        # Step 3: Emotion Analysis
-        set_job(videoId, 'processing', {'step': 'emotion_analysis'})
-        try:
-            emotions = analyze_emotions_from_text_and_segments(transcript_text, segments)
-        except Exception as e:
-            logging.warning(f"Emotion analysis failed for {videoId}: {e}")
-            emotions = [{'timestamp': 0, 'label': 'neutral', 'intensity': 0.5}]
-        
-        # Step 4: Indexing
-        set_job(videoId, 'processing', {'step': 'indexing'})
-        
-        # Step 5: Story Draft
-        set_job(videoId, 'processing', {'step': 'story_draft'})
-        story_draft = f"AI-generated story based on the transcript: {transcript_text[:100]}..."
-        
-        # Step 6: Final Render
-        set_job(videoId, 'processing', {'step': 'final_render'})
-        
-        # Mark as completed
-        set_job(videoId, 'completed', {
-            'transcript': transcript_text,
-            'tags': visual_tags,
-            'emotions': emotions,
-            'story_draft': story_draft,
-            'completed_at': datetime.utcnow().isoformat()
-        })
+        job = enqueue_job(videoId, user['userId'])
         
         return jsonify({
             'ok': True,
             'videoId': videoId,
-            'status': 'processing_completed'
-        })
+            'jobId': job.get('jobId', videoId),
+            'status': job.get('status', 'queued')
+        }), 202
         
     except Exception as e:
-        logging.error(f"Error processing video {videoId}: {e}")
-        set_job(videoId, 'error', {'error': str(e)})
+        logging.error(f"Error queueing video {videoId}: {e}")
         return jsonify({'error': str(e)}), 500
 
+def _segment_range_args():
+    """(from, to, format) from the query string; ValueError on a malformed bound"""
+    bounds = []
+    for name in ('from', 'to'):
+        value = request.args.get(name)
+        bounds.append(float(value) if value not in (None, '') else None)
+    return bounds[0], bounds[1], (request.args.get('format') or 'words').lower()
+
+def _segments_response(packed, start, end, fmt):
+    if fmt == 'columns':
+        return {'segmentColumns': packed.columns(start, end)}
+    return {'segments': packed.between(start, end)}
+
+JOB_STATUS_PROJECTION = {'_id': 0, 'status': 1, 'updatedAt': 1, 'attempts': 1, 'lastError': 1,
+                         'details.step': 1, 'details.error': 1}
+RESULTS_JOB_PROJECTION = {'_id': 0, 'status': 1, 'updatedAt': 1,
+                          'details.step': 1, 'details.emotions': 1, 'details.partialTranscript': 1}
+
+def _job_etag(job):
+    """Validator for responses built from a job: changes whenever the job document is written.
+
+    Every job write sets updatedAt, and the pipeline writes the transcript and
+    tags before the final job status, so the job's updatedAt also covers them.
+    The query string is part of it because it changes the representation.
+    """
+    updated_at = (job or {}).get('updatedAt')
+    if not updated_at:
+        return None
+    stamp = updated_at.isoformat() if isinstance(updated_at, datetime) else str(updated_at)
+    return hashlib.sha1(f"{stamp}|{request.full_path}".encode('utf-8')).hexdigest()[:20]
+
+def _conditional(etag, build):
+    """304 with no body if the client's If-None-Match holds etag, else the response from build()"""
+    if etag and request.if_none_match.contains_weak(etag):
+        resp = make_response('', 304)
+    else:
+        resp = make_response(build())
+    if etag:
+        resp.set_etag(etag, weak=True)
+        resp.headers['Cache-Control'] = 'private, no-cache'  # always revalidate
+    return resp
+
+@app.route('/jobs/<videoId>/status', methods=['GET'])
+def get_job_status(videoId):
+    """Processing status of a video for progress polls: one projected read of its job.
+
+    Query 'partial=1' adds the partial transcript. Supports If-None-Match.
+    """
+    try:
+        user, err = require_auth()
+        if err:
+            return err
+        with_partial = request.args.get('partial') in ('1', 'true')
+        projection = dict(JOB_STATUS_PROJECTION, **({'details.partialTranscript': 1} if with_partial else {}))
+        job = get_db().jobs.find_one({'videoId': videoId, 'ownerId': user['userId']}, projection)
+        if job is None:
+            return jsonify({'error': 'Job not found'}), 404
+
+        def build():
+            details = job.get('details') or {}
+            updated_at = job.get('updatedAt')
+            status = {
+                'videoId': videoId,
+                'status': job.get('status', 'unknown'),
+                'currentStep': details.get('step', ''),
+                'error': details.get('error') or job.get('lastError'),
+                'attempts': job.get('attempts', 0),
+                'updatedAt': updated_at.isoformat() if isinstance(updated_at, datetime) else updated_at,
+            }
+            if with_partial:
+                status['partialTranscript'] = details.get('partialTranscript', '')
+            return jsonify(status)
+        return _conditional(_job_etag(job), build)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/jobs/<videoId>/events', methods=['GET'])
+def stream_job_events(videoId):
+    """Server-sent events for a video's processing: 'step' (status or step changed,
+    with the partial transcript so far), 'partial' (more transcript text),
+    then 'complete' or 'error', after which the stream ends.
+
+    The current state is sent first. Events come from this process's
+    job_events hub (one change stream or poll for all streams), not from a
+    Mongo read per client.
+    """
+    user, err = require_auth()
+    if err:
+        return err
+    subscription = job_events.hub.subscribe(videoId)  # before the read, so no write falls in between
+    try:
+        job = get_db().jobs.find_one({'videoId': videoId, 'ownerId': user['userId']}, job_events.EVENT_PROJECTION)
+    except Exception as e:
+        job_events.hub.unsubscribe(subscription)
+        return jsonify({'error': str(e)}), 500
+    if job is None:
+        job_events.hub.unsubscribe(subscription)
+        return jsonify({'error': 'Job not found'}), 404
+    return Response(stream_with_context(job_events.stream(subscription, job)), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})  # no proxy buffering
+
 @app.route('/results/<videoId>', methods=['GET'])
 def get_results(videoId):
-    """Return transcript and tags from MongoDB for a video."""
+    """Return transcript and tags from MongoDB for a video.
+
+    Query 'segments': all (default) | none, for polls that only need the
+    status; 'from'/'to' (seconds) limit the words returned and format=columns
+    returns them as parallel arrays (see segment_store). The job is read
+    first: a request whose If-None-Match matches its ETag gets a 304 without
+    the transcript or tags being read.
+    """
     try:
         user, err = require_auth()
         if err:
             return err
+        try:
+            seg_from, seg_to, seg_format = _segment_range_args()
+        except ValueError:
+            return jsonify({'error': "'from' and 'to' must be numbers"}), 400
+        with_segments = (request.args.get('segments') or 'all').lower() != 'none'
         db = get_db()
         owner_id = user['userId']
         base = {'videoId': videoId}
@@ -1238,19 +1395,54 @@ def get_results(videoId):
             base_owner = {'videoId': videoId, 'ownerId': owner_id}
         else:
             base_owner = base
-        tr = db.transcripts.find_one(base_owner) or {}
-        tg = db.tags.find_one(base_owner) or {}
-        job = db.jobs.find_one(base_owner) or {}
-        return jsonify({
-            'videoId': videoId,
-            'status': job.get('status', 'unknown'),
-            'transcript': tr.get('text', ''),
-            'segments': tr.get('segments', []),
-            'tags': tg.get('keywords', []),
-            # Provide last known emotions and current step from job details
-            'emotions': (job.get('details', {}) or {}).get('emotions', []) if isinstance(job, dict) else [],
-            'currentStep': (job.get('details', {}) or {}).get('step', ''),
-        })
+        job = db.jobs.find_one(base_owner, RESULTS_JOB_PROJECTION) or {}
+
+        def build():
+            projection = None if with_segments else {'segmentsPacked': 0, 'segments': 0}
+            tr = db.transcripts.find_one(base_owner, projection) or {}
+            tg = db.tags.find_one(base_owner) or {}
+            details = job.get('details') or {}
+            response = {
+                'videoId': videoId,
+                'status': job.get('status', 'unknown'),
+                'transcript': tr.get('text', ''),
+                'segmentCount': tr.get('segmentCount', len(tr.get('segments') or [])),
+                'tags': tg.get('keywords', []),
+                # Provide last known emotions and current step from job details
+                'emotions': details.get('emotions', []),
+                'currentStep': details.get('step', ''),
+                'partialTranscript': details.get('partialTranscript', ''),
+            }
+            if with_segments:
+                response.update(_segments_response(segment_store.load(tr), seg_from, seg_to, seg_format))
+            return jsonify(response)
+        return _conditional(_job_etag(job), build)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/results/<videoId>/segments', methods=['GET'])
+def get_result_segments(videoId):
+    """Word segments of a video's transcript overlapping [from, to) seconds.
+
+    Query: from, to (seconds, optional), format: words (default, list of
+    {start_time, end_time, word, confidence?, source?}) | columns.
+    """
+    try:
+        user, err = require_auth()
+        if err:
+            return err
+        try:
+            seg_from, seg_to, seg_format = _segment_range_args()
+        except ValueError:
+            return jsonify({'error': "'from' and 'to' must be numbers"}), 400
+        db = get_db()
+        tr = db.transcripts.find_one({'videoId': videoId, 'ownerId': user['userId']},
+                                     {'segmentsPacked': 1, 'segments': 1})
+        if tr is None:
+            return jsonify({'error': 'Transcript not found'}), 404
+        packed = segment_store.load(tr)
+        return jsonify({'videoId': videoId, 'total': len(packed), 'duration': packed.duration,
+                        'from': seg_from, 'to': seg_to, **_segments_response(packed, seg_from, seg_to, seg_format)})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -1295,6 +1487,9 @@ def delete_my_video(videoId):
         db.transcripts.delete_one({'videoId': videoId})
         db.tags.delete_one({'videoId': videoId})
         db.jobs.delete_one({'videoId': videoId})
+        keyword_index.remove_video(db, videoId)
+        search_docs.remove(db, videoId)
+        record_index_change(videoId, 'delete')
 
         # Delete files on disk (video + thumbnail if exist)
         try:
@@ -1405,6 +1600,7 @@ def regenerate_thumbnail(videoId):
         if rel:
             try:
                 db.videos.update_one({'videoId': videoId}, {'$set': {'thumbnails.default': rel}})
+                search_docs.update_video(db, videoId, {'thumbnails': {'default': rel}})
             except Exception:
                 pass
             return jsonify({'ok': True, 'thumbnail': f"/{rel}"})
@@ -1444,7 +1640,7 @@ def generate_story():
         tr = db.transcripts.find_one(base) or {}
         tg = db.tags.find_one(base) or {}
         transcript_text = tr.get('text', '')
-        segments = tr.get('segments', [])
+        segments = segment_store.segments_of(tr)
         tags = tg.get('keywords', [])
 
         # Basic validation
@@ -1744,22 +1940,17 @@ def collective_generate_story():
         if explicit_ids:
             video_ids = [vid for vid in explicit_ids if isinstance(vid, str)]
         elif query:
-            # Pull candidate IDs from transcripts text index and tag regex
-            tr_q = {'$text': {'$search': query}}
-            tg_q = {'keywords': {'$regex': query, '$options': 'i'}}
-            if owner_id:
-                tr_q['ownerId'] = owner_id
-                tg_q['ownerId'] = owner_id
-            tr_hits = list(db.transcripts.find(tr_q, {'videoId': 1}).limit(limit * 3))
-            tg_hits = list(db.tags.find(tg_q, {'videoId': 1}).limit(limit * 3))
-            seen = set()
-            for doc in tr_hits + tg_hits:
-                vid = doc.get('videoId')
-                if vid and vid not in seen:
-                    seen.add(vid)
-                    video_ids.append(vid)
-                if len(video_ids) >= limit:
-                    break
+            # Pull candidate IDs from transcript and tag postings in the keyword index
+            keyword_index.ensure_index(db)
+            fields = ('transcript', 'tags')
+            matches = keyword_index.lookup(db, query, fields=fields)
+            scores = keyword_ranking.bm25f_scores(db, matches, keyword_index.query_terms(query), fields=fields)
+            candidates = keyword_ranking.rank(scores)
+            if owner_id and candidates:
+                owned = {d['videoId'] for d in db.videos.find({'videoId': {'$in': candidates}, 'ownerId': owner_id},
+                                                              {'videoId': 1})}
+                candidates = [vid for vid in candidates if vid in owned]
+            video_ids = candidates[:limit]
 
         # Fallback: if no matches by query/ids, use most recent user's videos
         if not video_ids:
@@ -1938,7 +2129,7 @@ def analyze_emotions_api():
             base['ownerId'] = owner_id
         tr = db.transcripts.find_one(base) or {}
         transcript_text = data.get('transcript') or tr.get('text', '')
-        segments = tr.get('segments', [])
+        segments = segment_store.segments_of(tr)
 
         points = analyze_emotions_from_text_and_segments(transcript_text, segments)
 
@@ -2099,8 +2290,8 @@ if __name__ == '__main__':
         init_collections()
         print("✅ MongoDB collections initialized")
         
-        # Initialize AI-powered semantic search
-        if SEMANTIC_SEARCH_AVAILABLE:
+        # Initialize AI-powered semantic search (fast start builds it on the first search)
+        if SEMANTIC_SEARCH_AVAILABLE and not FAST_START:
             try:
                 db = get_db()
                 if initialize_semantic_search(db):
@@ -2115,24 +2306,39 @@ if __name__ == '__main__':
         print("💡 You can set MONGODB_URI environment variable or create a .env file")
         print("💡 Example: MONGODB_URI=mongodb://localhost:27017/")
     
+    # Start embedded job workers (the reloader parent only watches files)
+    from config import JOB_EMBEDDED_WORKERS, JOB_WORKERS
+    if JOB_EMBEDDED_WORKERS and os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        try:
+            model_registry.preload()
+            JobWorkerPool(process_job, JOB_WORKERS).start_in_background()
+            print(f"👷 Embedded job workers: {JOB_WORKERS} (run `python worker.py` instead in production)")
+        except Exception as e:
+            print(f"⚠️ Could not start embedded job workers: {e}")
+    
     print("🚀 Starting AI Video Story Backend (Simplified)...")
     print(f"📁 Upload folder: {UPLOAD_FOLDER}")
     print(f"💾 Max file size: {MAX_CONTENT_LENGTH // (1024 * 1024)}MB")
     
-    if TRANSCRIPTION_AVAILABLE:
-        print("🎤 REAL AI Speech Recognition: ENABLED (Vosk)")
-        print("   ✅ Vosk model loaded and ready")
-        print("   ✅ Real speech-to-text conversion")
+    if FAST_START:
+        # Checking tagger availability would load the models, so only report what is installed
+        for name, state in capability_readiness().items():
+            print(f"   {'⏳' if state['installed'] else '⚠️'} {name}: {'loads on first use' if state['installed'] else 'not installed'}")
     else:
-        print("⚠️ Enhanced Transcription: DISABLED")
+        if TRANSCRIPTION_AVAILABLE:
+            print("🎤 REAL AI Speech Recognition: ENABLED (Vosk)")
+            print("   ✅ Vosk model loaded and ready")
+            print("   ✅ Real speech-to-text conversion")
+        else:
+            print("⚠️ Enhanced Transcription: DISABLED")
     
-    if VISUAL_TAGGING_AVAILABLE and visual_tagger.is_available():
-        print("🤖 Traditional AI Visual Tagging: ENABLED (YOLO + CLIP)")
-    elif GEMINI_TAGGING_AVAILABLE and gemini_visual_tagger.is_available():
-        print("🤖 Gemini AI Visual Tagging: ENABLED (Google AI)")
-    elif FALLBACK_TAGGING_AVAILABLE and fallback_visual_tagger.is_available():
-        print("🤖 Fallback Visual Tagging: ENABLED (using simplified tagging)")
-    else:
-        print("⚠️ AI Visual Tagging: DISABLED (using simplified tagging)")
+        if VISUAL_TAGGING_AVAILABLE and visual_tagger.is_available():
+            print("🤖 Traditional AI Visual Tagging: ENABLED (YOLO + CLIP)")
+        elif GEMINI_TAGGING_AVAILABLE and gemini_visual_tagger.is_available():
+            print("🤖 Gemini AI Visual Tagging: ENABLED (Google AI)")
+        elif FALLBACK_TAGGING_AVAILABLE and fallback_visual_tagger.is_available():
+            print("🤖 Fallback Visual Tagging: ENABLED (using simplified tagging)")
+        else:
+            print("⚠️ AI Visual Tagging: DISABLED (using simplified tagging)")
     
     app.run(debug=True, host='localhost', port=5000)
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""Benchmark semantic index tiers (flat, ivf, ivfpq, hnsw): recall@k and query latency.
+
+Usage: python benchmark_ann_tiers.py [--from-index | --count 200000 --dim 384] [--k 20]
+                                     [--min-recall 0.95] [--write]
+
+Runs on the saved semantic index (--from-index) or a synthetic clustered
+corpus. Flat (exact) search is the ground truth. The recommended tier is the
+fastest one (p95 latency) whose recall@k reaches --min-recall; --write stores
+it in <SEMANTIC_INDEX_DIR>/tier.json, which SEMANTIC_INDEX_TIER=auto follows
+once the corpus passes SEMANTIC_ANN_MIN_VECTORS.
+"""
+
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config import SEMANTIC_INDEX_DIR
+from lazy_import import module_installed
+from model_registry import SENTENCE_MODEL_NAME
+from semantic_index_store import load_snapshot
+from vector_index import TIERS, VectorStore, ann_search, dequantize, train_ann_index, write_tier_choice
+
+
+def _synthetic(count: int, dim: int, seed: int = 0) -> np.ndarray:
+    """Unit vectors around a few hundred topics (closer to real embeddings than pure noise)"""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((max(1, count // 500), dim)).astype('float32')
+    vectors = centers[rng.integers(0, len(centers), count)] + 0.6 * rng.standard_normal((count, dim)).astype('float32')
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def _queries(vectors: np.ndarray, count: int, seed: int = 1) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    picks = vectors[rng.integers(0, len(vectors), count)].astype('float32')
+    queries = picks + 0.3 * rng.standard_normal(picks.shape).astype('float32')
+    return queries / np.linalg.norm(queries, axis=1, keepdims=True)
+
+
+def _measure(search, queries: np.ndarray, k: int):
+    results, latencies = [], []
+    for query in queries:
+        started = time.perf_counter()
+        results.append([vector_id for vector_id, _ in search(query, k)])
+        latencies.append((time.perf_counter() - started) * 1000)
+    return results, np.percentile(latencies, 50), np.percentile(latencies, 95)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--from-index', action='store_true', help='use the saved semantic index vectors')
+    parser.add_argument('--count', type=int, default=200000)
+    parser.add_argument('--dim', type=int, default=384)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--k', type=int, default=20)
+    parser.add_argument('--min-recall', type=float, default=0.95)
+    parser.add_argument('--write', action='store_true', help='record the pick in tier.json')
+    args = parser.parse_args()
+
+    if args.from_index:
+        snapshot = load_snapshot(SEMANTIC_INDEX_DIR, SENTENCE_MODEL_NAME, use_faiss=False)
+        if snapshot is None or not len(snapshot['ids']):
+            print(f"❌ No saved semantic index in {SEMANTIC_INDEX_DIR}")
+            return
+        vectors, ids = dequantize(snapshot['vectors']), np.asarray(snapshot['ids'])
+    else:
+        vectors = _synthetic(args.count, args.dim)
+        ids = np.arange(len(vectors), dtype='int64')
+    queries = _queries(vectors, args.queries)
+    print(f"🧪 {len(vectors)} vectors x {vectors.shape[1]} dims, {len(queries)} queries, top {args.k}")
+
+    store = VectorStore(vectors, ids)
+    truth, p50, p95 = _measure(store.search, queries, args.k)
+    report = {'flat': {'recall': 1.0, 'p50Ms': p50, 'p95Ms': p95, 'trainSeconds': 0.0}}
+    print(f"📊 flat : recall 1.000 | p50 {p50:7.2f}ms | p95 {p95:7.2f}ms")
+
+    if not module_installed('faiss'):
+        print("⚠️ FAISS not installed: only the flat tier is available")
+    else:
+        for tier in TIERS[1:]:
+            started = time.perf_counter()
+            index = train_ann_index(tier, vectors, ids)
+            train_seconds = time.perf_counter() - started
+            found, p50, p95 = _measure(lambda q, k: ann_search(index, q, k), queries, args.k)
+            recall = float(np.mean([len(set(f) & set(t)) / max(len(t), 1) for f, t in zip(found, truth)]))
+            report[tier] = {'recall': recall, 'p50Ms': p50, 'p95Ms': p95, 'trainSeconds': train_seconds}
+            print(f"📊 {tier:<5}: recall {recall:.3f} | p50 {p50:7.2f}ms | p95 {p95:7.2f}ms | train {train_seconds:.1f}s")
+
+    eligible = [tier for tier, r in report.items() if r['recall'] >= args.min_recall]
+    pick = min(eligible, key=lambda tier: report[tier]['p95Ms'])
+    print(f"✅ Recommended tier: {pick} (fastest with recall@{args.k} >= {args.min_recall})")
+    if args.write:
+        write_tier_choice(SEMANTIC_INDEX_DIR, pick, {'vectors': len(vectors), 'k': args.k,
+                                                     'minRecall': args.min_recall, 'results': report})
+        print(f"💾 Wrote {os.path.join(SEMANTIC_INDEX_DIR, 'tier.json')}")
+
+
+if __name__ == "__main__":
+    main()
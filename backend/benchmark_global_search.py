@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""Benchmark traditional /global-search: Mongo round-trips and latency per request.
+
+Usage: python benchmark_global_search.py [--videos 60] [--latency-ms 1.0] [--requests 20]
+
+Uses mongomock with a synthetic corpus; every query sleeps --latency-ms to
+stand in for a network round-trip to mongod. Compares the old per-video
+lookups (videos, up to three users, transcripts and tags find_one per hit),
+bulk $in fetches across those collections and the single search_docs read
+the endpoint now makes, then times the endpoint.
+"""
+
+import os
+import sys
+import time
+import logging
+import random
+import argparse
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+WORDS = "beach sunset waves surfing mountain trail snow hike city night lights forest river camping".split()
+QUERY_METHODS = ('find', 'find_one', 'aggregate', 'count_documents')
+
+
+class CountingCollection:
+    """Counts (and delays) every query method call on a collection"""
+
+    def __init__(self, collection, stats):
+        self._collection = collection
+        self._stats = stats
+
+    def __getattr__(self, name):
+        attr = getattr(self._collection, name)
+        if name not in QUERY_METHODS:
+            return attr
+
+        def query(*args, **kwargs):
+            self._stats['queries'] += 1
+            time.sleep(self._stats['latency'])
+            return attr(*args, **kwargs)
+        return query
+
+
+class CountingDB:
+    def __init__(self, db, latency_ms: float):
+        self._db = db
+        self.stats = {'queries': 0, 'latency': latency_ms / 1000.0}
+
+    def __getattr__(self, name):
+        return CountingCollection(getattr(self._db, name), self.stats)
+
+    __getitem__ = __getattr__
+
+
+def _fill(db, count: int):
+    rng = random.Random(count)
+    db.users.insert_many([{'userId': f'user{i}', 'email': f'user{i}@example.com', 'name': f'User {i}'}
+                          for i in range(10)])
+    # Half the owners are stored by email, which the old code found on its second lookup
+    db.videos.insert_many([{'videoId': f'bench{i}', 'originalName': f'clip {i}', 'duration': 30 + i,
+                            'ownerId': f'user{i % 10}' if i % 2 else f'user{i % 10}@example.com'}
+                           for i in range(count)])
+    db.transcripts.insert_many([{'videoId': f'bench{i}', 'text': 'beach ' + ' '.join(rng.choices(WORDS, k=50))}
+                                for i in range(count)])
+    db.tags.insert_many([{'videoId': f'bench{i}', 'keywords': ['beach'] + rng.sample(WORDS, 3)} for i in range(count)])
+
+
+def _per_video_lookups(db, video_ids):
+    """The query pattern global_search used before: up to six round-trips per hit"""
+    for video_id in video_ids:
+        video = db.videos.find_one({'videoId': video_id}) or {}
+        owner_id = video.get('ownerId', '')
+        if owner_id:
+            for field in ('userId', 'email', 'name'):
+                if db.users.find_one({field: owner_id}):
+                    break
+        db.transcripts.find_one({'videoId': video_id})
+        db.tags.find_one({'videoId': video_id})
+
+
+def _bulk_lookups(db, video_ids):
+    from db_mongo import resolve_users
+    videos = list(db.videos.find({'videoId': {'$in': video_ids}}))
+    list(db.transcripts.find({'videoId': {'$in': video_ids}}, {'videoId': 1, 'text': 1}))
+    list(db.tags.find({'videoId': {'$in': video_ids}}, {'videoId': 1, 'keywords': 1}))
+    resolve_users((v.get('ownerId', '') for v in videos), db=db)
+
+
+def _search_doc_lookups(db, video_ids):
+    import search_docs
+    search_docs.fetch(db, video_ids)
+
+
+def _measure(db, run, repeats: int):
+    db.stats['queries'] = 0
+    started = time.perf_counter()
+    for _ in range(repeats):
+        run()
+    return db.stats['queries'] / repeats, (time.perf_counter() - started) * 1000 / repeats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--videos', type=int, default=60)
+    parser.add_argument('--latency-ms', type=float, default=1.0)
+    parser.add_argument('--requests', type=int, default=20)
+    args = parser.parse_args()
+
+    import mongomock
+    import db_mongo
+    import search_docs
+    db_mongo._client = mongomock.MongoClient()
+    _fill(db_mongo._client['footageflow_benchmark'], args.videos)
+    db = CountingDB(db_mongo._client['footageflow_benchmark'], args.latency_ms)
+    db_mongo._db = db
+
+    os.environ.setdefault('FAST_START', 'true')
+    os.chdir(tempfile.mkdtemp(prefix='search_bench_'))  # app creates upload dirs in cwd
+    import app
+    app.SEMANTIC_SEARCH_AVAILABLE = False  # measure the traditional branch
+    logging.getLogger().setLevel(logging.WARNING)
+    client = app.app.test_client()
+    access, _ = app._issue_tokens({'userId': 'user0', 'email': 'user0@example.com', 'name': 'User 0'})
+    client.set_cookie('access_token', access)
+
+    print(f"🧪 {args.videos} videos, {args.latency_ms}ms per query, {args.requests} runs each")
+    video_ids = [f'bench{i}' for i in range(min(args.videos, 50))]
+    old_q, old_ms = _measure(db, lambda: _per_video_lookups(db, video_ids), args.requests)
+    new_q, new_ms = _measure(db, lambda: _bulk_lookups(db, video_ids), args.requests)
+    print(f"📊 {len(video_ids)} hits, per-video lookups: {old_q:6.1f} queries | {old_ms:8.2f}ms")
+    search_docs.rebuild(db_mongo._client['footageflow_benchmark'])
+    docs_q, docs_ms = _measure(db, lambda: _search_doc_lookups(db, video_ids), args.requests)
+    print(f"📊 {len(video_ids)} hits, bulk $in lookups : {new_q:6.1f} queries | {new_ms:8.2f}ms | speedup x{old_ms / new_ms:.1f}")
+    print(f"📊 {len(video_ids)} hits, search_docs read : {docs_q:6.1f} queries | {docs_ms:8.2f}ms | speedup x{old_ms / docs_ms:.1f}")
+
+    def search():
+        response = client.post('/global-search', json={'query': 'beach', 'limit': 50})
+        assert response.status_code == 200, response.get_data(as_text=True)
+        return response.get_json()
+    results = search()
+    queries, ms = _measure(db, search, args.requests)
+    print(f"📊 /global-search: {results['total']} results, {queries:.1f} queries | {ms:.2f}ms per request")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""Benchmark semantic index builds: videos/sec, batched vs one encode() per video.
+
+Usage: python benchmark_semantic_index.py [--sizes 1000,10000,100000] [--batch-size 64] [--fake]
+
+Uses mongomock with a synthetic corpus and a throwaway index directory. The
+real MiniLM model is used when sentence-transformers is installed; --fake
+swaps in a cheap hashing encoder to measure the pipeline overhead alone.
+Per-video encoding is only timed up to --single-limit videos (it is slow).
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+WORDS = ("beach sunset waves surfing mountain trail snow hike city night lights traffic forest river "
+         "camping family birthday party dog cat kitchen cooking recipe music concert guitar drums "
+         "football goal stadium crowd wedding dance travel airport train road trip drone aerial").split()
+
+
+def _setup(args):
+    import mongomock
+    import db_mongo
+    db_mongo._client = mongomock.MongoClient()
+    db_mongo._db = db_mongo._client['footageflow_benchmark']
+
+    import semantic_search
+    from model_registry import model_registry
+    if args.fake or not semantic_search.SEMANTIC_SEARCH_AVAILABLE:
+        if not args.fake:
+            print("⚠️ sentence-transformers not installed, using the fake encoder")
+        from fake_encoder import FakeEncoder
+        model_registry.register('minilm', FakeEncoder, 'fake encoder')
+        semantic_search.SEMANTIC_SEARCH_AVAILABLE = True
+    return db_mongo.get_db(), semantic_search
+
+
+def _fill(db, count: int):
+    rng = random.Random(count)
+    db.videos.delete_many({})
+    db.transcripts.delete_many({})
+    db.tags.delete_many({})
+    db.videos.insert_many([{'videoId': f'bench{i}', 'originalName': f'clip {i}', 'ownerId': 'bench'}
+                           for i in range(count)])
+    # Transcript lengths vary a lot in practice, which is what length sorting exploits
+    db.transcripts.insert_many([{'videoId': f'bench{i}', 'text': ' '.join(rng.choices(WORDS, k=rng.randint(5, 300)))}
+                                for i in range(count)])
+    db.tags.insert_many([{'videoId': f'bench{i}', 'keywords': rng.sample(WORDS, 3)} for i in range(count)])
+
+
+def _time_build(semantic_search, db, batched: bool, batch_size: int) -> float:
+    with tempfile.TemporaryDirectory(prefix='semantic_bench_') as index_dir:  # no snapshot reuse
+        semantic_search.SEMANTIC_INDEX_DIR = index_dir
+        searcher = semantic_search.SemanticSearcher()
+        if not batched:
+            searcher.generate_embeddings = lambda texts: [searcher.generate_embedding(t) for t in texts]
+        else:
+            batched_encode = searcher.generate_embeddings
+            searcher.generate_embeddings = lambda texts: batched_encode(texts, batch_size=batch_size)
+        searcher.model  # load outside the timed region
+        started = time.perf_counter()
+        assert searcher.build_video_index(db)
+        return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='1000,10000,100000')
+    parser.add_argument('--batch-size', type=int, default=None)
+    parser.add_argument('--single-limit', type=int, default=10000)
+    parser.add_argument('--fake', action='store_true')
+    args = parser.parse_args()
+
+    db, semantic_search = _setup(args)
+    batch_size = args.batch_size or semantic_search.EMBEDDING_BATCH_SIZE
+    print(f"🧪 Index build benchmark (batch size {batch_size}, {os.cpu_count()} CPUs)")
+    for size in [int(s) for s in args.sizes.split(',') if s.strip()]:
+        _fill(db, size)
+        batched = _time_build(semantic_search, db, True, batch_size)
+        line = f"📊 {size:>7} videos: batched {size / batched:8.1f} videos/s"
+        if size <= args.single_limit:
+            single = _time_build(semantic_search, db, False, batch_size)
+            line += f" | one-by-one {size / single:8.1f} videos/s | speedup x{single / batched:.1f}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
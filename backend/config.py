@@ -32,6 +32,13 @@ COOKIE_SAMESITE = os.environ.get('COOKIE_SAMESITE', 'Lax')
 
 # MongoDB Configuration
 MONGODB_URI = os.environ.get('MONGODB_URI', 'mongodb://localhost:27017/aivideostory')
+# Connection pool (per process): size maxPoolSize against threads per worker; total
+# connections ~ processes x maxPoolSize must stay under the server's limit
+MONGODB_MAX_POOL_SIZE = int(os.environ.get('MONGODB_MAX_POOL_SIZE', '20'))
+MONGODB_MIN_POOL_SIZE = int(os.environ.get('MONGODB_MIN_POOL_SIZE', '0'))
+MONGODB_WAIT_QUEUE_TIMEOUT_MS = int(os.environ.get('MONGODB_WAIT_QUEUE_TIMEOUT_MS', '5000'))  # waiting for a free connection
+MONGODB_SERVER_SELECTION_TIMEOUT_MS = int(os.environ.get('MONGODB_SERVER_SELECTION_TIMEOUT_MS', '5000'))
+MONGODB_CONNECT_TIMEOUT_MS = int(os.environ.get('MONGODB_CONNECT_TIMEOUT_MS', '5000'))
 
 # Google OAuth Configuration
 GOOGLE_CLIENT_ID = os.environ.get('GOOGLE_CLIENT_ID', '')
@@ -48,5 +55,69 @@ UPLOAD_FOLDER = 'uploads'
 ALLOWED_EXTENSIONS = {'mp4', 'avi', 'mov', 'mkv', 'wmv', 'flv', 'webm'}
 MAX_CONTENT_LENGTH = 500 * 1024 * 1024  # 500MB max file size
 
+# Job Queue Configuration (POST /process enqueues, worker.py processes)
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', str(os.cpu_count() or 2)))
+JOB_MAX_ATTEMPTS = int(os.environ.get('JOB_MAX_ATTEMPTS', '3'))
+JOB_RETRY_BACKOFF_SECONDS = float(os.environ.get('JOB_RETRY_BACKOFF_SECONDS', '30'))
+JOB_POLL_INTERVAL_SECONDS = float(os.environ.get('JOB_POLL_INTERVAL_SECONDS', '1.0'))
+JOB_HEARTBEAT_SECONDS = float(os.environ.get('JOB_HEARTBEAT_SECONDS', '15'))
+JOB_STALE_SECONDS = float(os.environ.get('JOB_STALE_SECONDS', '120'))  # no heartbeat for this long = stuck
+JOB_EMBEDDED_WORKERS = os.environ.get('JOB_EMBEDDED_WORKERS', 'true').lower() == 'true'
+JOB_EVENTS_SOURCE = os.environ.get('JOB_EVENTS_SOURCE', 'auto').lower()  # auto | changestream | poll (see job_events)
+JOB_EVENTS_POLL_SECONDS = float(os.environ.get('JOB_EVENTS_POLL_SECONDS', '1.0'))  # one jobs query per web process per interval
+JOB_EVENTS_KEEPALIVE_SECONDS = float(os.environ.get('JOB_EVENTS_KEEPALIVE_SECONDS', '15'))
+JOB_EVENTS_QUEUE_SIZE = int(os.environ.get('JOB_EVENTS_QUEUE_SIZE', '32'))  # per stream; a slow client skips intermediate states
+
+# Processing Pipeline Configuration
+PIPELINE_PARALLEL = os.environ.get('PIPELINE_PARALLEL', 'true').lower() == 'true'  # audio + frame branches concurrently
+TRANSCRIPT_PROGRESS_SECONDS = float(os.environ.get('TRANSCRIPT_PROGRESS_SECONDS', '3'))  # partial transcript write throttle
+JOB_STEP_WRITE_SECONDS = float(os.environ.get('JOB_STEP_WRITE_SECONDS', '1.0'))  # at most one progress write per job per interval
+SEGMENT_COMPRESSION = os.environ.get('SEGMENT_COMPRESSION', 'zstd').lower()  # zstd (zlib if not installed) | zlib | none
+PARALLEL_TRANSCRIPTION = os.environ.get('PARALLEL_TRANSCRIPTION', 'true').lower() == 'true'  # chunked speech recognition across cores
+PARALLEL_TRANSCRIPTION_MIN_SECONDS = float(os.environ.get('PARALLEL_TRANSCRIPTION_MIN_SECONDS', '180'))  # shorter clips run sequentially
+TRANSCRIPTION_CHUNK_SECONDS = float(os.environ.get('TRANSCRIPTION_CHUNK_SECONDS', '60'))
+TRANSCRIPTION_CHUNK_OVERLAP_SECONDS = float(os.environ.get('TRANSCRIPTION_CHUNK_OVERLAP_SECONDS', '1.0'))
+TRANSCRIPTION_PROCESSES = int(os.environ.get('TRANSCRIPTION_PROCESSES', '0'))  # 0 = CPU cores / JOB_WORKERS
+
+# Model Registry Configuration (models load once per process, lazily)
+FAST_START = os.environ.get('FAST_START', 'true').lower() == 'true'  # defer AI imports/models until first use
+MODEL_PRELOAD = [m.strip() for m in os.environ.get('MODEL_PRELOAD', '').split(',') if m.strip()]  # load before forking workers
+MODEL_IDLE_SECONDS = float(os.environ.get('MODEL_IDLE_SECONDS', '0'))  # 0 = never evict idle models
+MODEL_MEMORY_LIMIT_MB = float(os.environ.get('MODEL_MEMORY_LIMIT_MB', '0'))  # 0 = no RSS limit
+MODEL_ADMIN_TOKEN = os.environ.get('MODEL_ADMIN_TOKEN', '')  # X-Admin-Token for POST /models/<name>/<action>; empty = disabled
+
+# Semantic Search Index Configuration
+SEMANTIC_INDEX_SYNC_SECONDS = float(os.environ.get('SEMANTIC_INDEX_SYNC_SECONDS', '2'))  # min gap between index_changes polls
+SEMANTIC_INDEX_SYNC_LOOKBACK_SECONDS = float(os.environ.get('SEMANTIC_INDEX_SYNC_LOOKBACK_SECONDS', '10'))  # tolerate writer clock skew
+SEMANTIC_INDEX_DIR = os.environ.get('SEMANTIC_INDEX_DIR', os.path.join('uploads', 'semantic_index'))  # on-disk snapshots
+SEMANTIC_INDEX_SAVE_SECONDS = float(os.environ.get('SEMANTIC_INDEX_SAVE_SECONDS', '30'))  # min gap between snapshot writes
+EMBEDDING_BATCH_SIZE = int(os.environ.get('EMBEDDING_BATCH_SIZE', '64'))  # texts per encode() call during index builds
+EMBEDDING_THREADS = int(os.environ.get('EMBEDDING_THREADS', '0'))  # torch CPU threads; 0 = all cores
+SEMANTIC_PASSAGE_WORDS = int(os.environ.get('SEMANTIC_PASSAGE_WORDS', '120'))  # words per embedded passage
+SEMANTIC_PASSAGE_OVERLAP_WORDS = int(os.environ.get('SEMANTIC_PASSAGE_OVERLAP_WORDS', '20'))
+SEMANTIC_POOLING = os.environ.get('SEMANTIC_POOLING', 'max').lower()  # max | sum of passage scores per video
+SEMANTIC_PASSAGE_OVERSAMPLE = int(os.environ.get('SEMANTIC_PASSAGE_OVERSAMPLE', '8'))  # passages fetched per requested video
+SEMANTIC_VECTOR_DTYPE = os.environ.get('SEMANTIC_VECTOR_DTYPE', 'float16').lower()  # float32 | float16 | int8 storage
+SEMANTIC_INDEX_TIER = os.environ.get('SEMANTIC_INDEX_TIER', 'auto').lower()  # auto | flat | ivf | ivfpq | hnsw
+SEMANTIC_ANN_MIN_VECTORS = int(os.environ.get('SEMANTIC_ANN_MIN_VECTORS', '100000'))  # auto: flat below, ANN tier above
+SEMANTIC_IVF_NPROBE = int(os.environ.get('SEMANTIC_IVF_NPROBE', '16'))  # IVF clusters scanned per query
+SEMANTIC_HNSW_M = int(os.environ.get('SEMANTIC_HNSW_M', '32'))  # HNSW graph degree
+SEMANTIC_HNSW_EF_SEARCH = int(os.environ.get('SEMANTIC_HNSW_EF_SEARCH', '64'))  # HNSW search breadth
+QUERY_EMBEDDING_CACHE_SIZE = int(os.environ.get('QUERY_EMBEDDING_CACHE_SIZE', '1024'))  # 0 disables
+QUERY_EMBEDDING_CACHE_TTL_SECONDS = float(os.environ.get('QUERY_EMBEDDING_CACHE_TTL_SECONDS', '0'))  # 0 = no expiry
+SEARCH_RESULT_CACHE_SIZE = int(os.environ.get('SEARCH_RESULT_CACHE_SIZE', '256'))  # 0 disables
+SEARCH_RESULT_CACHE_TTL_SECONDS = float(os.environ.get('SEARCH_RESULT_CACHE_TTL_SECONDS', '60'))
+
+# Search Results and Pagination: each search ranks up to SEARCH_MAX_RESULTS filtered videos once;
+# pages are cut from that list through a cursor (a cached search session)
+SEARCH_MAX_RESULTS = int(os.environ.get('SEARCH_MAX_RESULTS', '200'))
+SEARCH_SESSION_CACHE_SIZE = int(os.environ.get('SEARCH_SESSION_CACHE_SIZE', '512'))
+SEARCH_SESSION_TTL_SECONDS = float(os.environ.get('SEARCH_SESSION_TTL_SECONDS', '600'))
+
+# Global Search Mode: hybrid (semantic + keyword fused with RRF), semantic (keyword only as fallback) or keyword
+SEARCH_MODE = os.environ.get('SEARCH_MODE', 'hybrid').lower()
+HYBRID_SEARCH_BUDGET_MS = float(os.environ.get('HYBRID_SEARCH_BUDGET_MS', '800'))  # retrievers slower than this are left out
+HYBRID_RRF_K = int(os.environ.get('HYBRID_RRF_K', '60'))
+
 # CORS Configuration
 CORS_ORIGINS = ['http://localhost:5173', 'http://127.0.0.1:5173']
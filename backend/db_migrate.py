@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Database Migrations
+Creates the collections and indexes the app relies on and converts stored
+data to the current format. Run it once per deploy, before starting web or
+job workers:
+
+    python db_migrate.py            # apply if the schema version changed
+    python db_migrate.py --force    # re-run every step
+
+Request-serving processes never build indexes: get_db() only connects.
+`python app.py` runs this on startup through init_collections(); the applied
+version is recorded in the migrations collection, so repeat runs cost one read.
+"""
+
+import sys
+from datetime import datetime
+
+import keyword_index
+import search_docs
+import segment_store
+
+SCHEMA_VERSION = 2  # 2: word segments packed into columns (segment_store)
+SCHEMA_ID = 'schema'
+
+COLLECTIONS = ('videos', 'transcripts', 'tags', 'jobs', 'likes', 'views', 'views_unique', 'users',
+               'index_changes', 'keyword_index', 'search_docs')
+
+
+def create_indexes(db):
+    db.videos.create_index([("videoId", 1)], unique=True)
+    db.transcripts.create_index([("videoId", 1)], unique=True)
+    db.transcripts.create_index([("text", "text")])
+    db.tags.create_index([("videoId", 1)], unique=True)
+    db.tags.create_index([("keywords", 1)])
+    db.jobs.create_index([("jobId", 1)], unique=True)
+    db.jobs.create_index([("videoId", 1)])
+    db.jobs.create_index([("status", 1), ("availableAt", 1)])
+    db.jobs.create_index([("status", 1), ("heartbeatAt", 1)])
+    db.index_changes.create_index([("videoId", 1)], unique=True)
+    db.index_changes.create_index([("changedAt", 1)])
+    keyword_index.ensure_indexes(db)
+    search_docs.ensure_indexes(db)
+    db.likes.create_index([("videoId", 1), ("userId", 1)], unique=True)
+    db.likes.create_index([("videoId", 1)])
+    db.views.create_index([("videoId", 1)], unique=True)
+    # For deduped views
+    db.views_unique.create_index([("videoId", 1), ("userId", 1)], unique=True, sparse=True)
+    db.views_unique.create_index([("videoId", 1), ("sessionId", 1)], unique=True, sparse=True)
+    db.users.create_index([("email", 1)], unique=True)
+    db.users.create_index([("userId", 1)])
+    db.users.create_index([("name", 1)])
+
+
+def pack_legacy_segments(db) -> int:
+    """Convert transcripts still holding a `segments` list to segmentsPacked"""
+    count = 0
+    for transcript in db.transcripts.find({'segments': {'$exists': True}}, {'segments': 1}):
+        packed = segment_store.pack(transcript.get('segments'))
+        db.transcripts.update_one(
+            {'_id': transcript['_id']},
+            {'$set': {'segmentsPacked': packed, 'segmentCount': packed['count'] if packed else 0},
+             '$unset': {'segments': ''}},
+        )
+        count += 1
+    return count
+
+
+def migrate(db, force: bool = False) -> bool:
+    """Create missing collections and all indexes; returns False if already at SCHEMA_VERSION"""
+    applied = db.migrations.find_one({'_id': SCHEMA_ID}) or {}
+    if not force and applied.get('version') == SCHEMA_VERSION:
+        return False
+
+    existing = set(db.list_collection_names())
+    for collection_name in COLLECTIONS:
+        if collection_name not in existing:
+            db.create_collection(collection_name)
+    create_indexes(db)
+    packed = pack_legacy_segments(db)
+    if packed:
+        print(f"✅ Packed word segments of {packed} transcripts")
+
+    db.migrations.update_one(
+        {'_id': SCHEMA_ID},
+        {'$set': {'version': SCHEMA_VERSION, 'appliedAt': datetime.utcnow()}},
+        upsert=True,
+    )
+    print(f"✅ MongoDB collections and indexes at schema version {SCHEMA_VERSION}")
+    return True
+
+
+if __name__ == "__main__":
+    from db_mongo import get_db
+    if not migrate(get_db(), force='--force' in sys.argv):
+        print(f"✅ Already at schema version {SCHEMA_VERSION} (use --force to re-run)")
@@ -1,15 +1,146 @@
 import os
+import time
+import threading
 from datetime import datetime
 from typing import Tuple
+from urllib.parse import parse_qs, urlsplit
 
-from pymongo import MongoClient
+from pymongo import MongoClient, monitoring
+
+import job_events
+import keyword_index
+import search_docs
+import segment_store
+from config import (
+    JOB_STEP_WRITE_SECONDS, MONGODB_MAX_POOL_SIZE, MONGODB_MIN_POOL_SIZE, MONGODB_WAIT_QUEUE_TIMEOUT_MS,
+    MONGODB_SERVER_SELECTION_TIMEOUT_MS, MONGODB_CONNECT_TIMEOUT_MS
+)
+from search_filters import index_attributes
 
 
 _client = None
 _db = None
 
+FILTER_FIELDS = {"duration", "ownerId", "uploadedAt"}  # video fields the search indexes filter on
+
+
+class PoolStats(monitoring.ConnectionPoolListener):
+    """Connection pool counters for this process (reported by /health as mongoPool).
+
+    checkedOut near maxPoolSize with growing checkout waits means requests
+    queue for connections: raise MONGODB_MAX_POOL_SIZE or run fewer threads
+    per process.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._started = threading.local()  # checkout events fire on the requesting thread
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.open = 0
+            self.checked_out = 0
+            self.max_checked_out = 0
+            self.checkouts = 0
+            self.checkout_failures = 0
+            self.wait_ms_total = 0.0
+            self.wait_ms_max = 0.0
+            self.pool_clears = 0
+
+    def _waited_ms(self) -> float:
+        started = getattr(self._started, "at", None)
+        self._started.at = None
+        return (time.perf_counter() - started) * 1000 if started is not None else 0.0
+
+    def connection_check_out_started(self, event):
+        self._started.at = time.perf_counter()
+
+    def connection_checked_out(self, event):
+        waited = self._waited_ms()
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            self.max_checked_out = max(self.max_checked_out, self.checked_out)
+            self.wait_ms_total += waited
+            self.wait_ms_max = max(self.wait_ms_max, waited)
+
+    def connection_check_out_failed(self, event):
+        waited = self._waited_ms()
+        with self._lock:
+            self.checkout_failures += 1
+            self.wait_ms_max = max(self.wait_ms_max, waited)
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_out = max(self.checked_out - 1, 0)
+
+    def connection_created(self, event):
+        with self._lock:
+            self.open += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.open = max(self.open - 1, 0)
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self.pool_clears += 1
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "pid": os.getpid(),
+                "maxPoolSize": MONGODB_MAX_POOL_SIZE,
+                "open": self.open,
+                "checkedOut": self.checked_out,
+                "maxCheckedOut": self.max_checked_out,
+                "checkouts": self.checkouts,
+                "checkoutFailures": self.checkout_failures,
+                "avgWaitMs": round(self.wait_ms_total / self.checkouts, 3) if self.checkouts else 0.0,
+                "maxWaitMs": round(self.wait_ms_max, 3),
+                "poolClears": self.pool_clears,
+            }
+
+
+pool_stats = PoolStats()
+
+
+def create_client(uri: str) -> MongoClient:
+    """A MongoClient with the configured pool and timeouts, reporting to pool_stats.
+
+    Options given in the URI's query string take precedence over config.
+    """
+    options = {
+        "maxPoolSize": MONGODB_MAX_POOL_SIZE,
+        "minPoolSize": MONGODB_MIN_POOL_SIZE,
+        "waitQueueTimeoutMS": MONGODB_WAIT_QUEUE_TIMEOUT_MS,
+        "serverSelectionTimeoutMS": MONGODB_SERVER_SELECTION_TIMEOUT_MS,
+        "connectTimeoutMS": MONGODB_CONNECT_TIMEOUT_MS,
+    }
+    in_uri = {key.lower() for key in parse_qs(urlsplit(uri).query)}
+    options = {key: value for key, value in options.items() if key.lower() not in in_uri}
+    return MongoClient(uri, event_listeners=[pool_stats], **options)
+
 
 def get_db():
+    """This process's database handle; the client is created on first use.
+
+    Indexes are not created here: run `python db_migrate.py` (or
+    init_collections) once per deploy.
+    """
     global _client, _db
     if _db is not None:
         return _db
@@ -33,26 +164,12 @@ def get_db():
             print("💡 Set MONGODB_URI environment variable or create .env file for custom connection")
 
     try:
-        _client = MongoClient(uri)
-        _db = _client[db_name]
-        
-        # Test connection
-        _client.admin.command('ping')
-        print(f"✅ Connected to MongoDB: {db_name}")
+        client = create_client(uri)
         
-        # Ensure basic indexes
-        try:
-            _db.videos.create_index([("videoId", 1)], unique=True)
-            _db.transcripts.create_index([("videoId", 1)], unique=True)
-            _db.transcripts.create_index([("text", "text")])
-            _db.tags.create_index([("videoId", 1)], unique=True)
-            _db.tags.create_index([("keywords", 1)])
-            _db.jobs.create_index([("jobId", 1)], unique=True)
-            _db.jobs.create_index([("videoId", 1)])
-        except Exception:
-            # If indexes already exist or fail, don't block app startup
-            pass
-
+        # Test connection (fails within MONGODB_SERVER_SELECTION_TIMEOUT_MS)
+        client.admin.command('ping')
+        _client, _db = client, client[db_name]
+        print(f"✅ Connected to MongoDB: {db_name} (pid {os.getpid()}, maxPoolSize {MONGODB_MAX_POOL_SIZE})")
         return _db
         
     except Exception as e:
@@ -61,6 +178,20 @@ def get_db():
         raise RuntimeError(f"MongoDB connection failed: {e}")
 
 
+def reset_db():
+    """Drop the cached client so a forked worker process opens its own connection."""
+    global _client, _db
+    _client = None
+    _db = None
+    pool_stats.reset()
+
+
+# MongoClient is not fork-safe: a forked child (job worker, preforking server)
+# must build its own client and pool rather than use the parent's sockets
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=reset_db)
+
+
 def upsert_video(video_id: str, metadata: dict | None = None):
     """Upsert video document with flexible metadata.
 
@@ -93,37 +224,87 @@ def upsert_video(video_id: str, metadata: dict | None = None):
         },
         upsert=True,
     )
+    if "originalName" in update_set:
+        keyword_index.index_field(db, video_id, "title", update_set["originalName"])
+    if FILTER_FIELDS & update_set.keys():
+        keyword_index.update_attributes(db, video_id)
+    if set(search_docs.VIDEO_FIELDS) & update_set.keys():
+        search_docs.update_video(db, video_id, update_set)
+
+
+def _transcript_update(video_id: str, transcript_text: str, segments: list | None, owner_id: str | None) -> dict:
+    packed = segment_store.pack(segments)
+    return {
+        "$set": {
+            "videoId": video_id,
+            "text": transcript_text,
+            "segmentsPacked": packed,  # columnar word segments, see segment_store
+            "segmentCount": packed["count"] if packed else 0,
+            "ownerId": owner_id,
+            "updatedAt": datetime.utcnow(),
+        },
+        "$unset": {"segments": ""},  # the pre-columnar list form
+    }
+
+
+def _tags_update(video_id: str, tags: list[str], owner_id: str | None) -> dict:
+    return {
+        "$set": {
+            "videoId": video_id,
+            "keywords": tags,
+            "count": len(tags),
+            "ownerId": owner_id,
+            "updatedAt": datetime.utcnow(),
+        }
+    }
+
+
+def _job_update(video_id: str, status: str, details: dict | None, owner_id: str | None) -> dict:
+    return {
+        "$set": {
+            "jobId": video_id,  # ensure unique non-null for unique index
+            "videoId": video_id,
+            "status": status,
+            "details": details or {},
+            "ownerId": owner_id,
+            "updatedAt": datetime.utcnow(),
+        },
+        "$setOnInsert": {"createdAt": datetime.utcnow()},
+    }
 
 
 def save_transcript(video_id: str, transcript_text: str, segments: list | None = None):
     db = get_db()
     db.transcripts.update_one(
         {"videoId": video_id},
-        {
-            "$set": {
-                "videoId": video_id,
-                "text": transcript_text,
-                "segments": segments or [],
-                "ownerId": metadata_owner(video_id),
-                "updatedAt": datetime.utcnow(),
-            }
-        },
+        _transcript_update(video_id, transcript_text, segments, metadata_owner(video_id)),
         upsert=True,
     )
+    keyword_index.index_field(db, video_id, "transcript", transcript_text)
+    search_docs.update_transcript(db, video_id, transcript_text)
+    record_index_change(video_id)
 
 
 def save_tags(video_id: str, tags: list[str]):
     db = get_db()
-    db.tags.update_one(
+    db.tags.update_one({"videoId": video_id}, _tags_update(video_id, tags, metadata_owner(video_id)), upsert=True)
+    keyword_index.index_field(db, video_id, "tags", tags)
+    keyword_index.update_attributes(db, video_id)  # the tag filter applies to every field
+    search_docs.update_tags(db, video_id, tags)
+    record_index_change(video_id)
+
+
+def record_index_change(video_id: str, op: str = "upsert"):
+    """Log that a video's searchable content changed (op: upsert or delete).
+
+    Search processes poll index_changes and update only these videos.
+    """
+    db = get_db()
+    db.index_changes.update_one(
         {"videoId": video_id},
         {
-            "$set": {
-                "videoId": video_id,
-                "keywords": tags,
-                "count": len(tags),
-                "ownerId": metadata_owner(video_id),
-                "updatedAt": datetime.utcnow(),
-            }
+            "$set": {"videoId": video_id, "op": op, "changedAt": datetime.utcnow()},
+            "$inc": {"version": 1},  # changedAt is only millisecond precise
         },
         upsert=True,
     )
@@ -131,21 +312,137 @@ def save_tags(video_id: str, tags: list[str]):
 
 def set_job(video_id: str, status: str, details: dict | None = None):
     db = get_db()
-    db.jobs.update_one(
-        {"videoId": video_id},
-        {
-            "$set": {
-                "jobId": video_id,  # ensure unique non-null for unique index
-                "videoId": video_id,
-                "status": status,
-                "details": details or {},
-                "ownerId": metadata_owner(video_id),
-                "updatedAt": datetime.utcnow(),
-            },
-            "$setOnInsert": {"createdAt": datetime.utcnow()},
-        },
-        upsert=True,
-    )
+    update = _job_update(video_id, status, details, metadata_owner(video_id))
+    db.jobs.update_one({"videoId": video_id}, update, upsert=True)
+    job_events.publish(update["$set"])
+
+
+class JobWriter:
+    """Persistence context for one processing run of a video.
+
+    Reads the video document once (owner and filter attributes) instead of on
+    every save. Progress steps are throttled to one write per step_interval
+    seconds: a step arriving sooner replaces any pending one and is written
+    when the interval is up. The transcript and tags are staged and written
+    with the final job status, followed by one pass of index maintenance
+    (keyword_index.index_fields replaces both fields' postings in one
+    bulk_write). Transcript, tags and job live in separate collections and a
+    bulk_write covers one collection, so each gets its own upsert; the job
+    status goes last, so "completed" is only visible once the results are.
+
+        with JobWriter(video_id) as job:
+            job.step({'step': 'transcription'})
+            job.save_transcript(text, segments)
+            job.complete({...})
+
+    Leaving the block on an exception still writes the staged transcript and
+    tags, and leaves the job status to the caller (job_queue.fail_job).
+    """
+
+    def __init__(self, video_id: str, step_interval: float = JOB_STEP_WRITE_SECONDS, db=None):
+        self.video_id = video_id
+        self.step_interval = step_interval
+        self.db = db if db is not None else get_db()
+        self.video = self.db.videos.find_one({"videoId": video_id}, {"ownerId": 1, "duration": 1, "uploadedAt": 1}) or {}
+        self.owner_id = self.video.get("ownerId")
+        self._lock = threading.RLock()  # the audio and frame branches report concurrently
+        self._pending = None  # (status, details) not yet written
+        self._timer = None
+        self._last_write = None
+        self._transcript = None  # (text, segments)
+        self._tags = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            with self._lock:
+                self._pending = None
+        self.flush()
+        return False
+
+    def step(self, details: dict, status: str = "processing"):
+        """Report progress; written now or at the end of the current interval"""
+        with self._lock:
+            self._pending = (status, details)
+            wait = 0.0 if self._last_write is None else self._last_write + self.step_interval - time.monotonic()
+            if wait <= 0:
+                self._write_pending()
+            elif self._timer is None:
+                self._timer = threading.Timer(wait, self._write_pending_later)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def save_transcript(self, transcript_text: str, segments: list | None = None):
+        with self._lock:
+            self._transcript = (transcript_text, segments or [])
+
+    def save_tags(self, tags: list[str]):
+        with self._lock:
+            self._tags = list(tags)
+
+    def complete(self, details: dict, status: str = "completed"):
+        """Write the staged transcript and tags with the final job status"""
+        with self._lock:
+            self._cancel_timer()
+            self._pending = (status, details)
+            self.flush()
+
+    def flush(self):
+        """Write everything staged: transcript, tags and the pending step"""
+        with self._lock:
+            self._cancel_timer()
+            db, video_id = self.db, self.video_id
+            transcript, tags = self._transcript, self._tags
+            self._transcript = self._tags = None
+            if transcript is not None:
+                db.transcripts.update_one(
+                    {"videoId": video_id}, _transcript_update(video_id, *transcript, self.owner_id), upsert=True)
+            if tags is not None:
+                db.tags.update_one({"videoId": video_id}, _tags_update(video_id, tags, self.owner_id), upsert=True)
+            if transcript is not None or tags is not None:
+                fields = {}
+                if transcript is not None:
+                    fields["transcript"] = transcript[0]
+                if tags is not None:
+                    fields["tags"] = tags
+                # New tags change the tag filter attribute on every field's postings
+                attributes = index_attributes(self.video, tags) if tags is not None else None
+                keyword_index.index_fields(db, video_id, fields, attributes, refresh_attributes=tags is not None)
+                search_docs.update_content(db, video_id, transcript=fields.get("transcript"), tags=tags)
+                record_index_change(video_id)
+            self._write_pending()
+
+    def _write_pending(self):
+        with self._lock:
+            self._timer = None
+            if self._pending is None:
+                return
+            status, details = self._pending
+            self._pending = None
+            self._last_write = time.monotonic()
+            update = _job_update(self.video_id, status, details, self.owner_id)
+            try:
+                self.db.jobs.update_one({"videoId": self.video_id}, update, upsert=True)
+            except Exception:
+                if self._pending is None:
+                    self._pending = (status, details)  # retried by the next step or flush
+                raise
+            job_events.publish(update["$set"])
+
+    def _write_pending_later(self):
+        """Timer callback: nothing would see an exception raised on the timer thread"""
+        try:
+            self._write_pending()
+        except Exception as e:
+            print(f"⚠️ Progress write for {self.video_id} failed, retrying with the next update: {e}")
+
+    def _cancel_timer(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
 
 def metadata_owner(video_id: str) -> str | None:
     """Lookup ownerId from videos metadata if available."""
@@ -157,37 +454,53 @@ def metadata_owner(video_id: str) -> str | None:
         return None
 
 
+USER_MATCH_FIELDS = ("userId", "email", "name")  # an ownerId may be any of these, in this priority
+
+
+def resolve_users(owner_ids, cache: dict | None = None, db=None) -> dict:
+    """Display info ({name, email, picture}) per ownerId, fetched with one query.
+
+    Owners without a user document get a fallback derived from the id. Pass
+    the same `cache` dict to avoid looking an owner up twice in a request.
+    """
+    owner_ids = list(owner_ids)
+    cache = {} if cache is None else cache
+    missing = {o for o in owner_ids if o and isinstance(o, str) and o not in cache}
+    if missing:
+        db = db if db is not None else get_db()
+        docs = list(db.users.find(
+            {"$or": [{field: {"$in": list(missing)}} for field in USER_MATCH_FIELDS]},
+            {"userId": 1, "email": 1, "name": 1, "picture": 1},
+        ))
+        by_field = {field: {} for field in USER_MATCH_FIELDS}
+        for doc in docs:
+            for field in USER_MATCH_FIELDS:
+                value = doc.get(field)
+                if isinstance(value, str) and value in missing:
+                    by_field[field].setdefault(value, doc)
+        for owner_id in missing:
+            doc = next((by_field[f][owner_id] for f in USER_MATCH_FIELDS if owner_id in by_field[f]), None)
+            if doc:
+                cache[owner_id] = {
+                    "name": doc.get("name", doc.get("email", "Unknown User")),
+                    "email": doc.get("email", ""),
+                    "picture": doc.get("picture", ""),
+                }
+            else:
+                cache[owner_id] = {
+                    "name": f"User {owner_id[:8]}",
+                    "email": owner_id if "@" in owner_id else "",
+                    "picture": "",
+                }
+    return {o: cache.get(o, {"name": "Unknown User", "email": "", "picture": ""}) for o in owner_ids}
+
+
 def init_collections():
-    """Initialize MongoDB collections and indexes"""
+    """Initialize MongoDB collections and indexes (the db_migrate step)"""
     try:
-        db = get_db()
-        
-        # Create collections if they don't exist
-        collections = ['videos', 'transcripts', 'tags', 'jobs', 'likes', 'views', 'views_unique', 'users']
-        for collection_name in collections:
-            if collection_name not in db.list_collection_names():
-                db.create_collection(collection_name)
-        
-        # Ensure indexes
-        db.videos.create_index([("videoId", 1)], unique=True)
-        db.transcripts.create_index([("videoId", 1)], unique=True)
-        db.transcripts.create_index([("text", "text")])
-        db.tags.create_index([("videoId", 1)], unique=True)
-        db.tags.create_index([("keywords", 1)])
-        db.jobs.create_index([("jobId", 1)], unique=True)
-        db.jobs.create_index([("videoId", 1)])
-        db.likes.create_index([("videoId", 1), ("userId", 1)], unique=True)
-        db.likes.create_index([("videoId", 1)])
-        db.views.create_index([("videoId", 1)], unique=True)
-        # For deduped views
-        db.views_unique.create_index([("videoId", 1), ("userId", 1)], unique=True, sparse=True)
-        db.views_unique.create_index([("videoId", 1), ("sessionId", 1)], unique=True, sparse=True)
-        db.users.create_index([("email", 1)], unique=True)
-        
-        print("✅ MongoDB collections and indexes initialized successfully")
+        from db_migrate import migrate
+        migrate(get_db())
         
     except Exception as e:
         print(f"⚠️ Error initializing MongoDB collections: {e}")
         raise
-
-
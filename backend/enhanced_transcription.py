@@ -7,16 +7,19 @@ import json
 import re
 from PIL import Image
 import pytesseract
-from vosk import Model, KaldiRecognizer
+from vosk import KaldiRecognizer
 import wave
 import logging
+from media_demux import (
+    SAMPLE_RATE, PCM_CHUNK_BYTES, TRANSCRIPTION_STREAMING, DemuxError, open_pcm_stream, iter_stream
+)
+from model_registry import model_registry
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class EnhancedTranscription:
     def __init__(self):
-        self.vosk_model = None
         self.tesseract_config = '--oem 3 --psm 6 -c tessedit_char_whitelist=ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789.,!?;:()[]{}"\'-'
         
         try:
@@ -24,18 +27,14 @@ class EnhancedTranscription:
         except Exception as e:
             logger.error(f"Failed to load transcription models: {e}")
     
+    @property
+    def vosk_model(self):
+        """Shared Vosk model from the process-wide registry (loaded on first use)"""
+        return model_registry.get('vosk')
+    
     def _load_models(self):
-        """Load Vosk and Tesseract models"""
+        """Configure Tesseract (the Vosk model loads lazily from the registry)"""
         try:
-            # Load Vosk model
-            model_path = "vosk-model-small-en-us-0.15"
-            if os.path.exists(model_path):
-                logger.info("Loading Vosk model...")
-                self.vosk_model = Model(model_path)
-                logger.info("✅ Vosk model loaded successfully")
-            else:
-                logger.warning("Vosk model not found, speech recognition disabled")
-            
             # Check Tesseract availability - ENHANCED CONFIGURATION
             try:
                 # Set Tesseract path directly since we know it's installed
@@ -79,8 +78,13 @@ class EnhancedTranscription:
         except Exception as e:
             logger.error(f"Error loading models: {e}")
     
-    def extract_frames_for_ocr(self, video_path, num_frames=10):
+    def extract_frames_for_ocr(self, video_path, num_frames=10, media=None):
         """Extract frames for subtitle/caption detection"""
+        if media is not None:
+            try:
+                return media.load_frames(num_frames)
+            except DemuxError as e:
+                logger.warning(f"Demuxed frames unavailable, decoding them again: {e}")
         try:
             cap = cv2.VideoCapture(video_path)
             if not cap.isOpened():
@@ -181,38 +185,52 @@ class EnhancedTranscription:
             logger.error(f"Error extracting text from regions: {e}")
             return []
     
-    def transcribe_speech(self, video_path):
-        """Transcribe speech using Vosk"""
+    def transcribe_speech(self, video_path, media=None):
+        """Transcribe speech using Vosk (reusing demuxed PCM when `media` is given)"""
+        wf = None
+        temp_audio = None
+        proc = None
         try:
             if not self.vosk_model:
                 return "", []
             
-            # Extract audio from video
-            temp_audio = tempfile.NamedTemporaryFile(suffix='.wav', delete=False)
-            temp_audio.close()
-            
-            # Convert video to WAV audio
-            cmd = [
-                'ffmpeg', '-i', video_path, 
-                '-vn', '-acodec', 'pcm_s16le', 
-                '-ar', '16000', '-ac', '1', 
-                '-y', temp_audio.name
-            ]
-            
-            subprocess.run(cmd, capture_output=True, check=True)
+            if media is not None:
+                if not media.has_pcm:
+                    return "", []
+                sample_rate = media.sample_rate
+                chunks = media.iter_pcm(PCM_CHUNK_BYTES)
+            elif TRANSCRIPTION_STREAMING:
+                # Stream PCM straight from ffmpeg's stdout: no temp WAV, flat memory
+                proc = open_pcm_stream(video_path)
+                sample_rate = SAMPLE_RATE
+                chunks = iter_stream(proc.stdout, PCM_CHUNK_BYTES)
+            else:
+                # Extract audio from video
+                temp_audio = tempfile.NamedTemporaryFile(suffix='.wav', delete=False)
+                temp_audio.close()
+                
+                # Convert video to WAV audio
+                cmd = [
+                    'ffmpeg', '-i', video_path, 
+                    '-vn', '-acodec', 'pcm_s16le', 
+                    '-ar', '16000', '-ac', '1', 
+                    '-y', temp_audio.name
+                ]
+                
+                subprocess.run(cmd, capture_output=True, check=True)
+                
+                wf = wave.open(temp_audio.name, "rb")
+                sample_rate = wf.getframerate()
+                chunks = iter(lambda: wf.readframes(4000), b'')
             
             # Transcribe with Vosk
-            wf = wave.open(temp_audio.name, "rb")
-            rec = KaldiRecognizer(self.vosk_model, wf.getframerate())
+            rec = KaldiRecognizer(self.vosk_model, sample_rate)
             rec.SetWords(True)
             
             transcript_text = ""
             segments = []
             
-            while True:
-                data = wf.readframes(4000)
-                if len(data) == 0:
-                    break
+            for data in chunks:
                 if rec.AcceptWaveform(data):
                     result = json.loads(rec.Result())
                     if result.get('text'):
@@ -234,14 +252,21 @@ class EnhancedTranscription:
             if final_result.get('text'):
                 transcript_text += " " + final_result['text']
             
-            wf.close()
-            os.unlink(temp_audio.name)
-            
             return transcript_text.strip(), segments
             
         except Exception as e:
             logger.error(f"Speech transcription failed: {e}")
             return "", []
+        finally:
+            if proc is not None:
+                proc.stdout.close()
+                if proc.poll() is None:
+                    proc.kill()
+                proc.wait()
+            if wf is not None:
+                wf.close()
+            if temp_audio is not None and os.path.exists(temp_audio.name):
+                os.unlink(temp_audio.name)
     
     def clean_and_merge_transcripts(self, speech_text, subtitle_texts, speech_segments):
         """Clean and merge speech and subtitle transcripts"""
@@ -320,19 +345,19 @@ class EnhancedTranscription:
             logger.error(f"Error cleaning text: {e}")
             return text
     
-    def transcribe_video(self, video_path):
+    def transcribe_video(self, video_path, media=None):
         """Main function: transcribe video using all available methods"""
         try:
             logger.info(f"Starting enhanced transcription for: {video_path}")
             
             # Step 1: Speech transcription
-            speech_text, speech_segments = self.transcribe_speech(video_path)
+            speech_text, speech_segments = self.transcribe_speech(video_path, media)
             logger.info(f"Speech transcription: {len(speech_segments)} segments")
             
             # Step 2: Subtitle/caption extraction
             subtitle_texts = []
             try:
-                frames = self.extract_frames_for_ocr(video_path)
+                frames = self.extract_frames_for_ocr(video_path, media=media)
                 for frame_info in frames:
                     text_regions = self.detect_text_regions(frame_info['frame'])
                     if text_regions:
@@ -5,18 +5,30 @@ import json
 import re
 import wave
 import logging
-from vosk import Model, KaldiRecognizer
+from vosk import KaldiRecognizer
+from media_demux import (
+    SAMPLE_RATE, PCM_CHUNK_BYTES, TRANSCRIPTION_STREAMING, DemuxError, open_pcm_stream, iter_stream
+)
+from parallel_transcription import should_parallelize, transcribe_pcm_file, transcribe_pcm_stream
+from model_registry import model_registry
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class EnhancedTranscriptionSimple:
     def __init__(self):
-        self.vosk_model = None
-        self.model_loaded = False
         self.model_loading = False
         # Don't load models during initialization - load them lazily
     
+    @property
+    def vosk_model(self):
+        """Shared Vosk model from the process-wide registry (loaded on first use)"""
+        return model_registry.get('vosk')
+    
+    @property
+    def model_loaded(self):
+        return model_registry.is_loaded('vosk')
+    
     def _load_models(self):
         """Load Vosk model lazily"""
         if self.model_loaded or self.model_loading:
@@ -24,35 +36,25 @@ class EnhancedTranscriptionSimple:
         
         self.model_loading = True
         try:
-            # Load Vosk model - ENHANCED PATH RESOLUTION
-            model_paths = [
-                "vosk-model-small-en-us-0.15",
-                os.path.join(os.getcwd(), "vosk-model-small-en-us-0.15"),
-                os.path.join(os.path.dirname(__file__), "vosk-model-small-en-us-0.15")
-            ]
-            
-            model_path = None
-            for path in model_paths:
-                if os.path.exists(path):
-                    model_path = path
-                    break
-            
-            if model_path:
-                logger.info(f"Loading Vosk model from {model_path}...")
-                self.vosk_model = Model(model_path)
+            if self.vosk_model is not None:
                 logger.info("✅ Vosk model loaded successfully - REAL AI SPEECH RECOGNITION ENABLED")
-                self.model_loaded = True
             else:
                 logger.warning("Vosk model not found, speech recognition disabled")
-                logger.warning("Available paths checked: " + ", ".join(model_paths))
-                
-        except Exception as e:
-            logger.error(f"Error loading models: {e}")
         finally:
             self.model_loading = False
     
-    def transcribe_speech(self, video_path):
-        """Transcribe speech using Vosk"""
+    def transcribe_speech(self, video_path, media=None, on_partial=None):
+        """Transcribe speech using Vosk
+        
+        If `media` (MediaArtifacts) is given, its already-decoded PCM is used
+        instead of extracting audio again; long recordings are recognized in
+        parallel chunks, cut from the stream as it is decoded.
+        `on_partial(text, audio_seconds)` is called as each utterance is
+        recognized.
+        """
+        wf = None
+        temp_audio = None
+        proc = None
         try:
             # Load models lazily if not already loaded
             self._load_models()
@@ -60,64 +62,121 @@ class EnhancedTranscriptionSimple:
             if not self.vosk_model:
                 return "", []
             
-            # Extract audio from video
-            temp_audio = tempfile.NamedTemporaryFile(suffix='.wav', delete=False)
-            temp_audio.close()
-            
-            # Convert video to WAV audio
-            cmd = [
-                'ffmpeg', '-i', video_path, 
-                '-vn', '-acodec', 'pcm_s16le', 
-                '-ar', '16000', '-ac', '1', 
-                '-y', temp_audio.name
-            ]
-            
-            subprocess.run(cmd, capture_output=True, check=True)
-            
-            # Transcribe with Vosk
-            wf = wave.open(temp_audio.name, "rb")
-            rec = KaldiRecognizer(self.vosk_model, wf.getframerate())
-            rec.SetWords(True)
-            
-            transcript_text = ""
-            segments = []
+            if media is not None:
+                if not media.has_pcm:
+                    return "", []
+                if media.audio_path and should_parallelize(media.duration):
+                    result = transcribe_pcm_file(media.audio_path, 'vosk', on_partial=on_partial)
+                    if result is not None:
+                        text, segments, _ = result
+                        return text, segments
+                elif should_parallelize(media.duration):
+                    # Chunks are cut from the stream and recognized while the rest decodes
+                    result = transcribe_pcm_stream(media.iter_pcm(), 'vosk', on_partial=on_partial,
+                                                   work_dir=media.work_dir)
+                    if result is None:
+                        return "", []
+                    text, segments, _ = result
+                    return text, segments
+                sample_rate = media.sample_rate
+                chunks = media.iter_pcm(PCM_CHUNK_BYTES)
+            elif TRANSCRIPTION_STREAMING:
+                # Stream PCM straight from ffmpeg's stdout: no temp WAV, flat memory
+                proc = open_pcm_stream(video_path)
+                sample_rate = SAMPLE_RATE
+                chunks = iter_stream(proc.stdout, PCM_CHUNK_BYTES)
+            else:
+                # Extract audio from video
+                temp_audio = tempfile.NamedTemporaryFile(suffix='.wav', delete=False)
+                temp_audio.close()
+                
+                # Convert video to WAV audio
+                cmd = [
+                    'ffmpeg', '-i', video_path, 
+                    '-vn', '-acodec', 'pcm_s16le', 
+                    '-ar', '16000', '-ac', '1', 
+                    '-y', temp_audio.name
+                ]
+                
+                subprocess.run(cmd, capture_output=True, check=True)
+                
+                wf = wave.open(temp_audio.name, "rb")
+                sample_rate = wf.getframerate()
+                chunks = iter(lambda: wf.readframes(4000), b'')
             
-            while True:
-                data = wf.readframes(4000)
-                if len(data) == 0:
-                    break
-                if rec.AcceptWaveform(data):
-                    result = json.loads(rec.Result())
-                    if result.get('text'):
-                        transcript_text += " " + result['text']
-                    
-                    # Extract word-level timing
-                    if result.get('result'):
-                        for word_info in result['result']:
-                            segments.append({
-                                "start_time": word_info['start'],
-                                "end_time": word_info['end'],
-                                "word": word_info['word'],
-                                "confidence": word_info.get('conf', 0.0),
-                                "source": "speech"
-                            })
-            
-            # Get final result
-            final_result = json.loads(rec.FinalResult())
-            if final_result.get('text'):
-                transcript_text += " " + final_result['text']
-            
-            wf.close()
-            os.unlink(temp_audio.name)
-            
-            return transcript_text.strip(), segments
+            return self.recognize_pcm(chunks, sample_rate, on_partial)
             
         except Exception as e:
             logger.error(f"Speech transcription failed: {e}")
             return "", []
+        finally:
+            if proc is not None:
+                proc.stdout.close()
+                if proc.poll() is None:
+                    proc.kill()
+                proc.wait()
+            if wf is not None:
+                wf.close()
+            if temp_audio is not None and os.path.exists(temp_audio.name):
+                os.unlink(temp_audio.name)
+    
+    def recognize_pcm(self, chunks, sample_rate, on_partial=None):
+        """Run Vosk over an iterable of s16le mono PCM chunks.
+
+        Returns (text, segments) with word times relative to the first chunk.
+        """
+        rec = KaldiRecognizer(self.vosk_model, sample_rate)
+        rec.SetWords(True)
+        
+        transcript_text = ""
+        segments = []
+        bytes_seen = 0
+        
+        for data in chunks:
+            bytes_seen += len(data)
+            if rec.AcceptWaveform(data):
+                result = json.loads(rec.Result())
+                if result.get('text'):
+                    transcript_text += " " + result['text']
+                
+                # Extract word-level timing
+                if result.get('result'):
+                    for word_info in result['result']:
+                        segments.append(self._word_segment(word_info))
+                
+                if on_partial:
+                    try:
+                        on_partial(transcript_text.strip(), bytes_seen / (2 * sample_rate))
+                    except Exception as e:
+                        logger.debug(f"Partial transcript callback failed: {e}")
+        
+        # Get final result
+        final_result = json.loads(rec.FinalResult())
+        if final_result.get('text'):
+            transcript_text += " " + final_result['text']
+        for word_info in final_result.get('result', []):
+            segments.append(self._word_segment(word_info))
+        
+        return transcript_text.strip(), segments
     
-    def extract_subtitles_ffmpeg(self, video_path):
+    @staticmethod
+    def _word_segment(word_info):
+        return {
+            "start_time": word_info['start'],
+            "end_time": word_info['end'],
+            "word": word_info['word'],
+            "confidence": word_info.get('conf', 0.0),
+            "source": "speech"
+        }
+    
+    def extract_subtitles_ffmpeg(self, video_path, media=None):
         """Extract subtitles using ffmpeg (if available)"""
+        if media is not None:
+            # The demux pass already extracted any text subtitle track
+            try:
+                return media.read_subtitle_lines()
+            except DemuxError as e:
+                logger.warning(f"Demuxed subtitles unavailable, extracting them again: {e}")
         try:
             # Check if video has embedded subtitles
             cmd = [
@@ -218,19 +277,22 @@ class EnhancedTranscriptionSimple:
             logger.error(f"Error merging transcripts: {e}")
             return speech_text or "Transcription failed"
     
-    def transcribe_video(self, video_path):
-        """Main function: transcribe video using available methods"""
+    def transcribe_video(self, video_path, media=None, on_partial=None):
+        """Main function: transcribe video using available methods
+        
+        Pass `media` from media_demux.demux_media to reuse a single decode.
+        """
         try:
             # Load models lazily if not already loaded
             self._load_models()
             logger.info(f"Starting enhanced transcription for: {video_path}")
             
             # Step 1: Speech transcription
-            speech_text, speech_segments = self.transcribe_speech(video_path)
+            speech_text, speech_segments = self.transcribe_speech(video_path, media, on_partial)
             logger.info(f"Speech transcription: {len(speech_segments)} segments")
             
             # Step 2: Subtitle extraction (using ffmpeg)
-            subtitle_texts = self.extract_subtitles_ffmpeg(video_path)
+            subtitle_texts = self.extract_subtitles_ffmpeg(video_path, media)
             logger.info(f"Subtitle extraction: {len(subtitle_texts)} subtitle lines found")
             
             # Step 3: Merge and clean transcripts
@@ -0,0 +1,26 @@
+"""
+Fake Sentence Encoder
+A deterministic bag-of-words stand-in for SentenceTransformer.encode, shared
+by the semantic search tests and benchmark_semantic_index.py --fake so they
+run without downloading MiniLM. Registered as the 'minilm' model.
+"""
+
+import zlib
+
+import numpy as np
+
+
+class FakeEncoder:
+    """Deterministic stand-in for SentenceTransformer.encode"""
+    dim = 64
+
+    def encode(self, text, **kwargs):
+        if isinstance(text, list):
+            return np.stack([self._vector(t) for t in text]) if text else np.zeros((0, self.dim), dtype='float32')
+        return self._vector(text)
+
+    def _vector(self, text):
+        vec = np.zeros(self.dim, dtype='float32')
+        for word in text.lower().split():
+            vec[zlib.crc32(word.encode()) % self.dim] += 1.0
+        return vec / (np.linalg.norm(vec) or 1.0)
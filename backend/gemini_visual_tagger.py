@@ -172,7 +172,7 @@ class GeminiVisualTagger:
             logger.error(f"Error analyzing frame with Gemini AI: {e}")
             return None
     
-    def tag_video(self, video_path):
+    def tag_video(self, video_path, media=None):
         """Generate AI-powered visual tags using Gemini AI"""
         try:
             if not self.available:
@@ -181,8 +181,11 @@ class GeminiVisualTagger:
             
             logger.info(f"Starting Gemini AI visual tagging for: {video_path}")
             
-            # Extract frames
-            frame_paths, temp_dir = self.extract_frames_gemini(video_path, num_frames=3)
+            # Extract frames (demuxed frames belong to the caller, no temp dir to clean)
+            if media is not None:
+                frame_paths, temp_dir = media.frame_paths(3), None
+            else:
+                frame_paths, temp_dir = self.extract_frames_gemini(video_path, num_frames=3)
             if not frame_paths:
                 logger.warning("No frames extracted from video")
                 return ["video-content", "frame-extraction-failed"]
@@ -0,0 +1,106 @@
+"""
+Hybrid Search
+Runs several retrievers (semantic vector search, keyword BM25F) concurrently
+under one latency budget and fuses their ranked lists with reciprocal rank
+fusion:
+
+    rrf(d) = sum_r  1 / (k + rank_r(d))
+
+RRF only needs ranks, so the retrievers' incomparable scores (cosine vs
+BM25F) never have to be calibrated against each other. A retriever that
+misses the budget or fails is left out of the fusion instead of delaying it;
+every result records the rank each contributing retriever gave it.
+"""
+
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, Dict, List, Tuple
+
+from config import HYBRID_SEARCH_BUDGET_MS, HYBRID_RRF_K
+
+logger = logging.getLogger(__name__)
+
+# Shared across requests: a retriever that overran its budget finishes in the
+# background (warming its caches) without holding up the response
+_retriever_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix='hybrid-search')
+
+
+def _timed(retrieve: Callable[[], List[Dict]]) -> Tuple[List[Dict], float]:
+    started = time.perf_counter()
+    results = retrieve()
+    return results or [], (time.perf_counter() - started) * 1000
+
+
+def run_retrievers(retrievers: Dict[str, Callable[[], List[Dict]]],
+                   budget_ms: float = HYBRID_SEARCH_BUDGET_MS) -> Tuple[Dict[str, List[Dict]], Dict[str, Dict]]:
+    """Run retrievers concurrently; returns ({name: results}, {name: status}).
+
+    Whatever finished within budget_ms is used. If no retriever has found
+    anything by then (an empty ranking, e.g. from a cold index, does not
+    count), waits until one does or all are done, so a slow backend degrades
+    latency instead of returning nothing.
+    """
+    futures = {_retriever_pool.submit(_timed, retrieve): name for name, retrieve in retrievers.items()}
+    results: Dict[str, List[Dict]] = {}
+    status: Dict[str, Dict] = {}
+
+    def collect(done):
+        for future in done:
+            name = futures[future]
+            if name in status:
+                continue
+            try:
+                ranked, ms = future.result()
+                results[name] = ranked
+                status[name] = {'status': 'ok', 'count': len(ranked), 'ms': round(ms, 1)}
+            except Exception as e:
+                logger.warning(f"⚠️ {name} retriever failed: {e}")
+                status[name] = {'status': 'error', 'error': str(e)}
+
+    done, pending = wait(futures, timeout=budget_ms / 1000.0)
+    collect(done)
+    while not any(results.values()) and pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        collect(done)
+    for future in pending:
+        future.cancel()
+        status[futures[future]] = {'status': 'timeout', 'budgetMs': budget_ms}
+    return results, status
+
+
+def reciprocal_rank_fusion(ranked: Dict[str, List[Dict]], k: int = HYBRID_RRF_K) -> List[Dict]:
+    """Merge ranked result lists by videoId, best fused score first.
+
+    Each merged result is a copy of the first retriever's result (filled in
+    with fields only the others have) plus 'retrievers' ({name: rank}) and
+    'rrfScore'; 'relevance' becomes the fused score relative to the best one.
+    """
+    fused: Dict[str, Dict] = {}
+    for name, results in ranked.items():
+        for rank, result in enumerate(results, 1):
+            video_id = result.get('videoId')
+            if not video_id:
+                continue
+            entry = fused.get(video_id)
+            if entry is None:
+                entry = fused[video_id] = dict(result, retrievers={}, rrfScore=0.0)
+            else:
+                for key, value in result.items():
+                    entry.setdefault(key, value)
+            if name not in entry['retrievers']:
+                entry['retrievers'][name] = rank
+                entry['rrfScore'] += 1.0 / (k + rank)
+    merged = sorted(fused.values(), key=lambda entry: -entry['rrfScore'])
+    best = merged[0]['rrfScore'] if merged else 1.0
+    for entry in merged:
+        entry['relevance'] = round(entry['rrfScore'] / best, 3)
+        entry['search_type'] = 'hybrid'
+    return merged
+
+
+def hybrid_search(retrievers: Dict[str, Callable[[], List[Dict]]],
+                  budget_ms: float = HYBRID_SEARCH_BUDGET_MS) -> Tuple[List[Dict], Dict[str, Dict]]:
+    """Fused results and per-retriever status ({'status', 'count', 'ms'})"""
+    results, status = run_retrievers(retrievers, budget_ms)
+    return reciprocal_rank_fusion(results), status
@@ -0,0 +1,263 @@
+"""
+Job Events
+Fan-out of processing progress to server-sent event streams
+(GET /jobs/<videoId>/events): step transitions, partial transcript text,
+completion and failure.
+
+Every web process runs one watcher thread for all of its open streams, so
+the Mongo cost does not grow with the number of watchers:
+
+- changestream: one db.jobs.watch() cursor. Job writes from any worker
+  process (set_job, JobWriter, job_queue) arrive as they happen. Needs a
+  replica set.
+- poll: one jobs query per JOB_EVENTS_POLL_SECONDS, for the videos that
+  currently have watchers.
+
+JOB_EVENTS_SOURCE=auto uses a change stream when the server supports one
+and polls otherwise (standalone servers, mongomock). Writes made in this
+process are also published straight to its watchers (publish()), which is
+all tests need. A video's events are deduplicated by the job's updatedAt, so
+the same write arriving from both paths is sent once.
+"""
+
+import os
+import json
+import queue
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, Iterator, Optional, Set
+
+from pymongo.errors import OperationFailure, PyMongoError
+
+from config import JOB_EVENTS_SOURCE, JOB_EVENTS_POLL_SECONDS, JOB_EVENTS_KEEPALIVE_SECONDS, JOB_EVENTS_QUEUE_SIZE
+
+logger = logging.getLogger(__name__)
+
+EVENT_FIELDS = ('videoId', 'status', 'updatedAt', 'details.step', 'details.partialTranscript', 'details.error')
+EVENT_PROJECTION = {'_id': 0, **{field: 1 for field in EVENT_FIELDS}}
+TERMINAL_STATUSES = ('completed', 'error')
+_RETRY_SECONDS = 5.0
+
+
+class Subscription:
+    """One stream's queue of job states for a video; the oldest are dropped if it falls behind"""
+
+    def __init__(self, video_id: str, max_size: int = JOB_EVENTS_QUEUE_SIZE):
+        self.video_id = video_id
+        self.queue: 'queue.Queue[Dict]' = queue.Queue(max(1, int(max_size)))
+
+    def put(self, job: Dict):
+        while True:
+            try:
+                self.queue.put_nowait(job)
+                return
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()  # states are snapshots, only the latest matters
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout: float) -> Optional[Dict]:
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class JobEventHub:
+    """Per-process fan-out of job documents to the subscriptions watching them"""
+
+    def __init__(self, source: str = JOB_EVENTS_SOURCE, poll_interval: float = JOB_EVENTS_POLL_SECONDS, db=None):
+        self.source = source
+        self.poll_interval = poll_interval
+        self.active_source = None  # changestream | poll, once the watcher has started
+        self._db = db
+        self._lock = threading.Lock()
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+        self._latest: Dict[str, datetime] = {}  # videoId -> updatedAt of the last state delivered
+        self._thread = None
+        self._pid = None
+        self._stop = threading.Event()
+
+    def _get_db(self):
+        if self._db is not None:
+            return self._db
+        from db_mongo import get_db  # db_mongo publishes through this module
+        return get_db()
+
+    def subscribe(self, video_id: str) -> Subscription:
+        subscription = Subscription(video_id)
+        with self._lock:
+            self._subscribers.setdefault(video_id, set()).add(subscription)
+        self._ensure_watcher()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.video_id, set())
+            subscribers.discard(subscription)
+            if not subscribers:
+                self._subscribers.pop(subscription.video_id, None)
+                self._latest.pop(subscription.video_id, None)
+
+    def watched(self) -> int:
+        with self._lock:
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    def seen(self, job: Dict):
+        """Record a state a stream read itself, so the same write is not delivered again"""
+        self._is_new(job)
+
+    def _is_new(self, job: Dict) -> bool:
+        video_id, updated_at = job.get('videoId'), job.get('updatedAt')
+        with self._lock:
+            if video_id not in self._subscribers:
+                return False
+            latest = self._latest.get(video_id)
+            if updated_at is not None and latest is not None and updated_at <= latest:
+                return False
+            if updated_at is not None:
+                self._latest[video_id] = updated_at
+            return True
+
+    def publish(self, job: Dict):
+        """Deliver a job state ({videoId, status, details, updatedAt}) to the video's subscriptions"""
+        if not self._is_new(job):
+            return
+        with self._lock:
+            subscribers = list(self._subscribers.get(job['videoId'], ()))
+        for subscription in subscribers:
+            subscription.put(job)
+
+    # --- watcher thread ---
+
+    def _ensure_watcher(self):
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():  # a forked child needs its own
+                return
+            self._pid = os.getpid()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True, name='job-events')
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                if self.source in ('auto', 'changestream') and self._watch_changes():
+                    continue
+                self._poll()
+            except PyMongoError as e:
+                logger.warning(f"⚠️ Job event watcher error, retrying in {_RETRY_SECONDS:.0f}s: {e}")
+                self._stop.wait(_RETRY_SECONDS)
+
+    def _watch_changes(self) -> bool:
+        """Publish job changes from a change stream until stopped; False if the server has none"""
+        jobs = self._get_db().jobs
+        if not callable(getattr(type(jobs), 'watch', None)):
+            return self._unsupported('the driver has no change streams')
+        pipeline = [
+            # Heartbeats and lock changes leave updatedAt alone
+            {'$match': {'$or': [{'operationType': {'$in': ['insert', 'replace']}},
+                                {'updateDescription.updatedFields.updatedAt': {'$exists': True}}]}},
+            {'$project': {f'fullDocument.{field}': 1 for field in EVENT_FIELDS}},
+        ]
+        try:
+            with jobs.watch(pipeline, full_document='updateLookup') as stream:
+                self.active_source = 'changestream'
+                logger.info("✅ Job events: watching a change stream")
+                while not self._stop.is_set() and stream.alive:
+                    change = stream.try_next()
+                    if change and change.get('fullDocument'):
+                        self.publish(change['fullDocument'])
+        except OperationFailure as e:
+            if self.active_source == 'changestream':
+                raise  # the stream broke after starting: reconnect
+            return self._unsupported(str(e))
+        return True
+
+    def _unsupported(self, reason: str) -> bool:
+        if self.source == 'changestream':
+            raise OperationFailure(f"Job events need change streams: {reason}")
+        self.source = 'poll'
+        logger.info(f"ℹ️ Job events: polling every {self.poll_interval}s ({reason})")
+        return False
+
+    def _poll(self):
+        """One query per interval for every watched video, however many streams watch them"""
+        self.active_source = 'poll'
+        jobs = self._get_db().jobs
+        while not self._stop.wait(self.poll_interval):
+            with self._lock:
+                video_ids = list(self._subscribers)
+                oldest = [self._latest.get(video_id) for video_id in video_ids]
+            if not video_ids:
+                continue
+            query = {'videoId': {'$in': video_ids}}
+            if oldest and None not in oldest:
+                query['updatedAt'] = {'$gt': min(oldest)}
+            for job in jobs.find(query, EVENT_PROJECTION):
+                self.publish(job)
+
+
+hub = JobEventHub()
+
+
+def publish(job: Dict):
+    """Hand a job write made in this process to the local watchers (no-op without any)"""
+    hub.publish(job)
+
+
+def event_for(job: Dict, previous: Optional[Dict] = None) -> Optional[tuple]:
+    """(event name, data) for a job state, given the previously sent one; None if nothing visible changed"""
+    details = job.get('details') or {}
+    updated_at = job.get('updatedAt')
+    data = {
+        'videoId': job.get('videoId'),
+        'status': job.get('status', 'unknown'),
+        'currentStep': details.get('step', ''),
+        'updatedAt': updated_at.isoformat() if isinstance(updated_at, datetime) else updated_at,
+    }
+    if data['status'] == 'completed':
+        return 'complete', data
+    if data['status'] == 'error':
+        return 'error', dict(data, error=details.get('error'))
+    previous_details = (previous or {}).get('details') or {}
+    partial = details.get('partialTranscript')
+    if previous is None or data['status'] != previous.get('status') or data['currentStep'] != previous_details.get('step'):
+        return 'step', dict(data, partialTranscript=partial) if partial else data
+    if partial and partial != previous_details.get('partialTranscript'):
+        return 'partial', dict(data, partialTranscript=partial)
+    return None
+
+
+def format_sse(event: str, data: Dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def stream(subscription: Subscription, job: Dict, keepalive: float = JOB_EVENTS_KEEPALIVE_SECONDS,
+           event_hub: Optional[JobEventHub] = None) -> Iterator[str]:
+    """SSE messages for a subscription, starting from the job state the caller read after subscribing.
+
+    Ends after the completion or error event; unsubscribes when the client goes away.
+    """
+    event_hub = event_hub or hub
+    previous = None
+    try:
+        event_hub.seen(job)
+        while True:
+            if job is None:
+                yield ': keepalive\n\n'  # also how a closed connection is noticed
+            else:
+                event = event_for(job, previous)
+                if event:
+                    yield format_sse(*event)
+                    previous = job
+                    if job.get('status') in TERMINAL_STATUSES:
+                        return
+            job = subscription.get(keepalive)
+    finally:
+        event_hub.unsubscribe(subscription)
@@ -0,0 +1,290 @@
+"""
+Background Job Queue for Video Processing
+Jobs live in the Mongo `jobs` collection (one per videoId) and are claimed
+atomically by a pool of worker processes, so HTTP requests return immediately.
+"""
+
+import os
+import time
+import uuid
+import atexit
+import socket
+import logging
+import threading
+import multiprocessing
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+import db_mongo
+from db_mongo import get_db, metadata_owner
+from model_registry import model_registry
+from config import (
+    JOB_WORKERS, JOB_MAX_ATTEMPTS, JOB_RETRY_BACKOFF_SECONDS,
+    JOB_POLL_INTERVAL_SECONDS, JOB_HEARTBEAT_SECONDS, JOB_STALE_SECONDS
+)
+
+logger = logging.getLogger(__name__)
+
+LOCK_FIELDS = {'lockedBy': '', 'lockToken': '', 'lockedAt': '', 'heartbeatAt': ''}
+
+
+_indexed_db = None  # the database whose unique jobId index was last confirmed
+
+
+def require_job_indexes(db=None):
+    """Raise unless the jobs collection has the unique jobId index (created by db_migrate.py).
+
+    Checked once per process and database: without the index two concurrent
+    enqueues would both insert a job for the same video.
+    """
+    global _indexed_db
+    db = db if db is not None else get_db()
+    if db is _indexed_db:
+        return
+    indexes = db.jobs.index_information().values()
+    if not any(index.get('unique') and [field for field, _ in index['key']] == ['jobId'] for index in indexes):
+        raise RuntimeError("jobs collection has no unique jobId index; run `python db_migrate.py` before "
+                           "starting web or job workers")
+    _indexed_db = db
+
+
+def enqueue_job(video_id: str, owner_id: str | None = None) -> Dict:
+    """Queue a video for processing. Re-enqueueing an active job is a no-op.
+
+    One conditional upsert: it only matches a job that is not active. For an
+    active job the upsert's insert collides with the unique jobId index and
+    the existing job is returned, so concurrent enqueues cannot both win.
+    That index comes from db_migrate.py; require_job_indexes() refuses to
+    enqueue without it.
+    """
+    db = get_db()
+    require_job_indexes(db)
+    now = datetime.utcnow()
+    try:
+        return db.jobs.find_one_and_update(
+            {'videoId': video_id, '$nor': [
+                {'status': 'queued'},
+                {'status': 'processing', 'heartbeatAt': {'$gt': now - timedelta(seconds=JOB_STALE_SECONDS)}},
+            ]},
+            {
+                '$set': {
+                    'jobId': video_id,  # one job per video, matches set_job
+                    'videoId': video_id,
+                    'status': 'queued',
+                    'details': {'step': 'queued', 'ownerId': owner_id},
+                    'ownerId': metadata_owner(video_id) or owner_id,
+                    'attempts': 0,
+                    'availableAt': now,
+                    'queuedAt': now,
+                    'updatedAt': now,
+                },
+                '$unset': {**LOCK_FIELDS, 'lastError': ''},
+                '$setOnInsert': {'createdAt': now},
+            },
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+    except DuplicateKeyError:
+        return db.jobs.find_one({'videoId': video_id}) or {}
+
+
+def claim_next_job(worker_id: str) -> Optional[Dict]:
+    """Atomically move the oldest runnable queued job to processing."""
+    now = datetime.utcnow()
+    return get_db().jobs.find_one_and_update(
+        {'status': 'queued', 'availableAt': {'$lte': now}},
+        {
+            '$set': {
+                'status': 'processing',
+                'details': {'step': 'starting'},
+                'lockedBy': worker_id,
+                'lockToken': uuid.uuid4().hex,
+                'lockedAt': now,
+                'heartbeatAt': now,
+                'updatedAt': now,
+            },
+            '$inc': {'attempts': 1},
+        },
+        sort=[('availableAt', 1)],
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+def heartbeat(job: Dict) -> bool:
+    """Refresh the claim; returns False if the job was reaped out from under us."""
+    res = get_db().jobs.update_one(
+        {'videoId': job['videoId'], 'lockToken': job['lockToken']},
+        {'$set': {'heartbeatAt': datetime.utcnow()}},
+    )
+    return res.matched_count == 1
+
+
+def release_job(job: Dict):
+    """Drop the claim after the handler finished (it already wrote the final status)."""
+    get_db().jobs.update_one(
+        {'videoId': job['videoId'], 'lockToken': job['lockToken']},
+        {'$unset': LOCK_FIELDS},
+    )
+
+
+def fail_job(job: Dict, error: str, stale_before: datetime | None = None) -> bool:
+    """Schedule a retry with exponential backoff, or mark the job as failed.
+
+    With stale_before (the reaper), only if the worker has not heartbeated
+    since then. Returns False if the claim was no longer ours to fail.
+    """
+    attempts = int(job.get('attempts', 1) or 1)
+    now = datetime.utcnow()
+    if attempts < JOB_MAX_ATTEMPTS:
+        delay = JOB_RETRY_BACKOFF_SECONDS * (2 ** (attempts - 1))
+        update = {
+            'status': 'queued',
+            'details': {'step': 'retry_scheduled', 'error': error, 'attempt': attempts},
+            'availableAt': now + timedelta(seconds=delay),
+            'lastError': error,
+            'updatedAt': now,
+        }
+        logger.warning(f"Job {job['videoId']} failed (attempt {attempts}/{JOB_MAX_ATTEMPTS}), retrying in {delay:.0f}s: {error}")
+    else:
+        update = {
+            'status': 'error',
+            'details': {'error': error, 'attempts': attempts},
+            'lastError': error,
+            'updatedAt': now,
+        }
+        logger.error(f"Job {job['videoId']} failed permanently after {attempts} attempts: {error}")
+    claim = {'videoId': job['videoId'], 'lockToken': job['lockToken']}
+    if stale_before is not None:
+        claim['heartbeatAt'] = {'$lt': stale_before}  # a heartbeat since the reaper's read keeps the job
+    res = get_db().jobs.update_one(claim, {'$set': update, '$unset': LOCK_FIELDS})
+    return res.matched_count == 1
+
+
+def reap_stuck_jobs() -> int:
+    """Requeue (or fail) processing jobs whose worker stopped heartbeating."""
+    db = get_db()
+    cutoff = datetime.utcnow() - timedelta(seconds=JOB_STALE_SECONDS)
+    stuck = list(db.jobs.find({
+        'status': 'processing',
+        'lockToken': {'$exists': True},
+        'heartbeatAt': {'$lt': cutoff},
+    }))
+    reaped = 0
+    for job in stuck:
+        if fail_job(job, 'Worker stopped responding', stale_before=cutoff):
+            logger.warning(f"Reaped stuck job {job['videoId']} (worker {job.get('lockedBy')})")
+            reaped += 1
+    return reaped
+
+
+def run_job(handler: Callable[[Dict], None], job: Dict):
+    """Run one claimed job with a background heartbeat."""
+    stop = threading.Event()
+
+    def _beat():
+        while not stop.wait(JOB_HEARTBEAT_SECONDS):
+            try:
+                if not heartbeat(job):
+                    logger.warning(f"Lost claim on job {job['videoId']}")
+                    return
+            except Exception as e:
+                logger.warning(f"Heartbeat failed for job {job['videoId']}: {e}")
+
+    beater = threading.Thread(target=_beat, daemon=True)
+    beater.start()
+    try:
+        handler(job)
+        release_job(job)
+    except Exception as e:
+        logger.error(f"Job {job['videoId']} raised: {e}")
+        fail_job(job, str(e))
+    finally:
+        stop.set()
+
+
+def _worker_main(handler: Callable[[Dict], None], worker_id: str, stop_event):
+    """Worker process loop: claim, run, repeat."""
+    db_mongo.reset_db()  # never share a MongoClient across fork
+    logger.info(f"👷 Job worker {worker_id} started")
+    while not stop_event.is_set():
+        try:
+            job = claim_next_job(worker_id)
+        except Exception as e:
+            logger.error(f"Worker {worker_id} could not claim a job: {e}")
+            job = None
+        if not job:
+            model_registry.evict_idle()
+            stop_event.wait(JOB_POLL_INTERVAL_SECONDS)
+            continue
+        logger.info(f"👷 Worker {worker_id} processing {job['videoId']} (attempt {job.get('attempts')})")
+        run_job(handler, job)
+
+
+class JobWorkerPool:
+    """Supervises N worker processes and periodically reaps stuck jobs."""
+
+    def __init__(self, handler: Callable[[Dict], None], concurrency: int = JOB_WORKERS):
+        self.handler = handler
+        self.concurrency = max(1, int(concurrency))
+        self.stop_event = multiprocessing.Event()
+        self.processes: List[multiprocessing.Process] = []
+        self._host = f"{socket.gethostname()}:{os.getpid()}"
+
+    def _spawn(self, slot: int) -> multiprocessing.Process:
+        worker_id = f"{self._host}/{slot}"
+        proc = multiprocessing.Process(
+            target=_worker_main, args=(self.handler, worker_id, self.stop_event),
+            # Not daemonic: a job may fan out to its own transcription process pool
+            name=f"job-worker-{slot}", daemon=False,
+        )
+        proc.start()
+        return proc
+
+    def start(self):
+        require_job_indexes()  # fail at startup, not with duplicate jobs later
+        self.processes = [self._spawn(i) for i in range(self.concurrency)]
+        logger.info(f"✅ Started {self.concurrency} job workers")
+
+    def supervise_once(self):
+        """Restart crashed workers and reap jobs they left behind."""
+        for i, proc in enumerate(self.processes):
+            if not proc.is_alive() and not self.stop_event.is_set():
+                logger.warning(f"Job worker {proc.name} exited ({proc.exitcode}), restarting")
+                self.processes[i] = self._spawn(i)
+        try:
+            reap_stuck_jobs()
+        except Exception as e:
+            logger.warning(f"Stuck-job reaper failed: {e}")
+
+    def run(self):
+        """Block forever supervising workers (used by worker.py)."""
+        self.start()
+        try:
+            while not self.stop_event.is_set():
+                self.supervise_once()
+                time.sleep(JOB_HEARTBEAT_SECONDS)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def start_in_background(self):
+        """Start workers plus a daemon supervisor thread (used by `python app.py`)."""
+        self.start()
+        atexit.register(self.stop)  # workers are not daemonic, stop them with the app
+
+        def _supervise():
+            while not self.stop_event.wait(JOB_HEARTBEAT_SECONDS):
+                self.supervise_once()
+
+        threading.Thread(target=_supervise, daemon=True, name='job-supervisor').start()
+
+    def stop(self, timeout: float = 10.0):
+        self.stop_event.set()
+        for proc in self.processes:
+            proc.join(timeout)
+            if proc.is_alive():
+                proc.terminate()
@@ -0,0 +1,282 @@
+"""
+Keyword Index for Traditional Search
+An inverted index in the keyword_index collection: one posting per
+(term, videoId, field) with the term's token positions in that field. Fields
+are the video title, its tags and its transcript.
+
+Terms are lowercased and lightly stemmed (suffix stripping, no dictionary),
+so "surfing", "surfs" and "surf" share a posting. Lookups are exact term
+matches plus anchored prefix matches ("surfb" -> "surfboard"), both of which
+use the term index; the unanchored case-insensitive $regex scans they replace
+read every document.
+
+Each posting also stores its tf, the field's length and the video's filter
+attributes (search_filters.index_attributes), and keyword_stats keeps the
+corpus totals (video count, summed field lengths), so filtering happens in
+the posting query and BM25F ranking (keyword_ranking) needs nothing beyond
+the postings it looked up.
+
+db_mongo keeps postings current on save_transcript / save_tags /
+upsert_video; rebuild_index() backfills a corpus indexed before this existed
+or in an older format (python keyword_index.py --rebuild).
+"""
+
+import re
+import logging
+from typing import Dict, Iterable, List, Optional
+
+from pymongo import DeleteMany, InsertOne, UpdateMany
+
+from search_filters import SearchFilters, index_attributes
+
+logger = logging.getLogger(__name__)
+
+FIELDS = ('title', 'tags', 'transcript')
+MIN_PREFIX_LENGTH = 3  # shorter query terms match exactly only
+INDEX_VERSION = 3  # postings carry tf, field length (BM25F) and filter attributes
+CORPUS_STATS_ID = 'corpus'
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_SUFFIXES = ('ing', 'ed', 'es', 's')
+_VOWELS = set('aeiouy')
+
+
+def stem(token: str) -> str:
+    """Strip common English inflections: waves/wave -> wav, hiking/hike -> hik, parties/party -> parti"""
+    if len(token) <= 3 or token.isdigit():
+        return token
+    if token.endswith('ies') and len(token) > 4:
+        token = token[:-2]
+    elif not token.endswith(('ss', 'us', 'is', 'eed')):
+        for suffix in _SUFFIXES:
+            root = token[:-len(suffix)]
+            if not token.endswith(suffix) or len(root) < 3 or not _VOWELS & set(root):
+                continue
+            if suffix == 'es' and not root.endswith(('s', 'x', 'z', 'ch', 'sh')):
+                continue  # "waves": strip just the s
+            if suffix in ('ing', 'ed') and len(root) >= 4 and root[-1] == root[-2] and root[-1] not in 'lsz':
+                root = root[:-1]  # running -> run
+            token = root
+            break
+    if token.endswith('e') and len(token) > 3:
+        token = token[:-1]  # so "hike" meets "hiking"
+    elif token.endswith('y') and len(token) > 3 and token[-2] not in _VOWELS:
+        token = token[:-1] + 'i'  # so "party" meets "parties"
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased, stemmed terms in order (their index is the position)"""
+    return [stem(token) for token in _TOKEN_RE.findall((text or '').lower())]
+
+
+def query_terms(query: str) -> List[str]:
+    """Distinct stemmed query terms, in query order"""
+    return list(dict.fromkeys(tokenize(query)))
+
+
+def field_text(field: str, value) -> str:
+    if field == 'tags':
+        return ' '.join(str(tag) for tag in (value or []))
+    return value or ''
+
+
+def video_attributes(db, video_id: str) -> Dict:
+    video = db.videos.find_one({'videoId': video_id}, {'duration': 1, 'ownerId': 1, 'uploadedAt': 1}) or {}
+    tags_doc = db.tags.find_one({'videoId': video_id}, {'keywords': 1}) or {}
+    return index_attributes(video, tags_doc.get('keywords'))
+
+
+def index_field(db, video_id: str, field: str, value, attributes: Optional[Dict] = None):
+    """Replace the postings of one field of a video and update the corpus stats"""
+    index_fields(db, video_id, {field: value}, attributes)
+
+
+def index_fields(db, video_id: str, values: Dict[str, object], attributes: Optional[Dict] = None,
+                 refresh_attributes: bool = False):
+    """Replace the postings of several fields of a video ({field: value}) in one bulk write
+    and update the corpus stats; refresh_attributes also sets `attributes` on the
+    video's other postings"""
+    # Current length of every indexed field of the video, in one round-trip
+    previous = {group['_id']: group.get('length', 0) for group in db.keyword_index.aggregate([
+        {'$match': {'videoId': video_id}},
+        {'$group': {'_id': '$field', 'length': {'$first': '$length'}}},
+    ])}
+    if attributes is None:
+        attributes = video_attributes(db, video_id)
+    operations = []
+    inc = {}
+    indexed = set(previous) - set(values)
+    for field, value in values.items():
+        terms = tokenize(field_text(field, value))
+        positions: Dict[str, List[int]] = {}
+        for position, term in enumerate(terms):
+            positions.setdefault(term, []).append(position)
+        operations.append(DeleteMany({'videoId': video_id, 'field': field}))
+        # Field length and filter attributes ride along on every posting, so ranking
+        # and filtering need no extra reads
+        operations.extend(
+            InsertOne({'term': term, 'videoId': video_id, 'field': field, 'positions': pos, 'tf': len(pos),
+                       'length': len(terms), 'attrs': attributes})
+            for term, pos in positions.items()
+        )
+        inc[f'totalLength.{field}'] = len(terms) - (previous.get(field) or 0)
+        if positions:
+            indexed.add(field)
+    if refresh_attributes:
+        operations.append(UpdateMany({'videoId': video_id}, {'$set': {'attrs': attributes}}))
+    db.keyword_index.bulk_write(operations, ordered=True)
+    if bool(indexed) != bool(previous):
+        inc['docs'] = 1 if indexed else -1
+    db.keyword_stats.update_one({'_id': CORPUS_STATS_ID}, {'$inc': inc}, upsert=True)
+
+
+def update_attributes(db, video_id: str, attributes: Optional[Dict] = None):
+    """Refresh the filter attributes on a video's postings (owner, duration, date or tags changed)"""
+    if attributes is None:
+        attributes = video_attributes(db, video_id)
+    db.keyword_index.update_many({'videoId': video_id}, {'$set': {'attrs': attributes}})
+
+
+def remove_video(db, video_id: str):
+    lengths = {p['field']: p.get('length', 0) for p in db.keyword_index.find({'videoId': video_id}, {'field': 1, 'length': 1})}
+    db.keyword_index.delete_many({'videoId': video_id})
+    if lengths:
+        inc = {f'totalLength.{field}': -length for field, length in lengths.items()}
+        inc['docs'] = -1
+        db.keyword_stats.update_one({'_id': CORPUS_STATS_ID}, {'$inc': inc}, upsert=True)
+
+
+def corpus_stats(db) -> Dict:
+    """{'docs': indexed videos, 'avgLength': {field: mean terms per video}}"""
+    stats = db.keyword_stats.find_one({'_id': CORPUS_STATS_ID}) or {}
+    docs = max(int(stats.get('docs', 0) or 0), 0)
+    totals = stats.get('totalLength') or {}
+    return {
+        'docs': docs,
+        'avgLength': {field: (totals.get(field, 0) / docs if docs else 0.0) for field in FIELDS},
+    }
+
+
+def ensure_indexes(db):
+    db.keyword_index.create_index([('term', 1), ('field', 1)])
+    db.keyword_index.create_index([('videoId', 1), ('field', 1)])
+
+
+def rebuild_index(db) -> int:
+    """Index every video from scratch; returns the number of videos indexed"""
+    db.keyword_index.delete_many({})
+    db.keyword_stats.delete_many({})
+    count = 0
+    transcripts = {doc['videoId']: doc.get('text', '') for doc in db.transcripts.find({}, {'videoId': 1, 'text': 1})}
+    tags = {doc['videoId']: doc.get('keywords', []) for doc in db.tags.find({}, {'videoId': 1, 'keywords': 1})}
+    projection = {'videoId': 1, 'originalName': 1, 'filename': 1, 'duration': 1, 'ownerId': 1, 'uploadedAt': 1}
+    for video in db.videos.find({}, projection):
+        video_id = video.get('videoId')
+        if not video_id:
+            continue
+        attributes = index_attributes(video, tags.get(video_id, []))
+        index_field(db, video_id, 'title', video.get('originalName') or video.get('filename') or '', attributes)
+        index_field(db, video_id, 'tags', tags.get(video_id, []), attributes)
+        index_field(db, video_id, 'transcript', transcripts.get(video_id, ''), attributes)
+        count += 1
+    db.keyword_stats.update_one({'_id': CORPUS_STATS_ID}, {'$set': {'version': INDEX_VERSION}}, upsert=True)
+    logger.info(f"✅ Keyword index rebuilt for {count} videos")
+    return count
+
+
+def ensure_index(db):
+    """Rebuild once when videos exist but the index is missing or from an older format"""
+    stats = db.keyword_stats.find_one({'_id': CORPUS_STATS_ID}, {'version': 1}) or {}
+    if stats.get('version') != INDEX_VERSION and db.videos.find_one({}, {'_id': 1}) is not None:
+        rebuild_index(db)
+
+
+class KeywordMatch:
+    """Postings of one video for a query, per field: exact term positions, the
+    total tf of longer terms each query term prefixes, and the field length"""
+
+    def __init__(self):
+        self.exact: Dict[str, Dict[str, List[int]]] = {field: {} for field in FIELDS}
+        self.prefix: Dict[str, Dict[str, int]] = {field: {} for field in FIELDS}
+        self.lengths: Dict[str, int] = {}
+
+    def coverage(self, terms: List[str], field: str) -> float:
+        """Fraction of query terms present in the field"""
+        if not terms:
+            return 0.0
+        return sum(1 for term in terms if term in self.exact[field]) / len(terms)
+
+    def has_phrase(self, terms: List[str], field: str) -> bool:
+        """All query terms at consecutive positions, in order"""
+        if not terms or any(term not in self.exact[field] for term in terms):
+            return False
+        starts = set(self.exact[field][terms[0]])
+        for offset, term in enumerate(terms[1:], 1):
+            starts &= {position - offset for position in self.exact[field][term]}
+        return bool(starts)
+
+    def has_prefix(self, fields: Iterable[str] = FIELDS) -> bool:
+        return any(self.prefix[field] for field in fields)
+
+    def matches_term(self, term: str, fields: Iterable[str] = FIELDS) -> bool:
+        return any(term in self.exact[f] or term in self.prefix[f] for f in fields)
+
+
+def _term_clause(term: str, prefix: bool) -> Dict:
+    if prefix and len(term) >= MIN_PREFIX_LENGTH:
+        return {'term': {'$regex': '^' + re.escape(term)}}  # anchored: an index range scan
+    return {'term': term}
+
+
+def document_frequencies(db, terms: List[str], fields: Iterable[str] = FIELDS, prefix: bool = True) -> Dict[str, int]:
+    """term -> number of videos in the whole corpus that lookup() would match it in, ignoring filters.
+
+    BM25F's idf compares this with the corpus size, so a filtered lookup must
+    not supply its own (smaller) counts. One count per term, grouped server-side.
+    """
+    frequencies = {}
+    for term in terms:
+        counted = list(db.keyword_index.aggregate([
+            {'$match': {**_term_clause(term, prefix), 'field': {'$in': list(fields)}}},
+            {'$group': {'_id': '$videoId'}},
+            {'$count': 'videos'},
+        ]))
+        frequencies[term] = counted[0]['videos'] if counted else 0
+    return frequencies
+
+
+def lookup(db, query: str, fields: Iterable[str] = FIELDS, prefix: bool = True,
+           filters: Optional[SearchFilters] = None) -> Dict[str, KeywordMatch]:
+    """videoId -> KeywordMatch for every video with a query term (or a term it prefixes)
+    that passes `filters` (checked against the postings' attributes)"""
+    terms = query_terms(query)
+    if not terms:
+        return {}
+    clauses = [_term_clause(term, prefix) for term in terms]
+    matches: Dict[str, KeywordMatch] = {}
+    posting_query = {'$or': clauses, 'field': {'$in': list(fields)}}
+    if filters is not None:
+        posting_query.update(filters.mongo_query('attrs.'))
+    postings = db.keyword_index.find(posting_query,
+                                     {'term': 1, 'videoId': 1, 'field': 1, 'positions': 1, 'tf': 1, 'length': 1})
+    for posting in postings:
+        match = matches.setdefault(posting['videoId'], KeywordMatch())
+        term, field = posting['term'], posting['field']
+        positions = posting.get('positions', [])
+        match.lengths[field] = posting.get('length', len(positions))
+        if term in terms:
+            match.exact[field][term] = positions
+        for query_term in terms:
+            if term != query_term and term.startswith(query_term):
+                tf = match.prefix[field].get(query_term, 0)
+                match.prefix[field][query_term] = tf + posting.get('tf', len(positions))
+    return matches
+
+
+if __name__ == "__main__":
+    import sys
+    from db_mongo import get_db
+    if '--rebuild' not in sys.argv:
+        print("Usage: python keyword_index.py --rebuild")
+        sys.exit(1)
+    print(f"✅ Indexed {rebuild_index(get_db())} videos")
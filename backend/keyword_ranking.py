@@ -0,0 +1,74 @@
+"""
+BM25F Ranking for Keyword Search
+Scores KeywordMatch postings (keyword_index.lookup) with BM25F: each field's
+term frequency is normalized by that field's length relative to its corpus
+average, weighted, summed into one pseudo-frequency and saturated once per
+query term:
+
+    tf~(t, d) = sum_f  w_f * tf_f / (1 - b_f + b_f * len_f / avglen_f)
+    score(d)  = sum_t  idf(t) * tf~ / (k1 + tf~)
+
+Term frequencies and field lengths are stored on the postings at index time
+and the corpus averages in keyword_stats, so scoring a candidate costs
+O(query terms x fields), independent of how long its transcript is. A term's
+document frequency is the number of videos its postings cover (exact or
+prefix) in the whole corpus: a lookup narrowed by filters only sees part of
+it, so filtered searches pass keyword_index.document_frequencies() in.
+Prefix-only matches count at PREFIX_WEIGHT, and a multi-term query found as
+a phrase is boosted by PHRASE_BOOST.
+"""
+
+import math
+from typing import Dict, Iterable, List, Optional
+
+from keyword_index import FIELDS, KeywordMatch, corpus_stats
+
+K1 = 1.2
+FIELD_WEIGHTS = {'title': 5.0, 'tags': 2.0, 'transcript': 1.0}  # one title hit outweighs one transcript hit
+FIELD_B = {'title': 0.5, 'tags': 0.5, 'transcript': 0.75}  # short fields vary less in length
+PREFIX_WEIGHT = 0.5
+PHRASE_BOOST = 1.5
+
+
+def idf(docs: int, df: int) -> float:
+    return math.log(1 + (docs - df + 0.5) / (df + 0.5))
+
+
+def bm25f_scores(db, matches: Dict[str, KeywordMatch], terms: List[str],
+                 fields: Iterable[str] = FIELDS, df: Optional[Dict[str, int]] = None) -> Dict[str, float]:
+    """videoId -> BM25F score for every matched video.
+
+    `df` (term -> corpus document frequency) is required when `matches` came
+    from a filtered lookup; otherwise it is counted from the matches.
+    """
+    if not matches or not terms:
+        return {}
+    fields = list(fields)
+    stats = corpus_stats(db)
+    if df is None:
+        df = {term: sum(1 for m in matches.values() if m.matches_term(term, fields)) for term in terms}
+    docs = max(stats['docs'], len(matches), *df.values())
+    idfs = {term: idf(docs, df.get(term, 0)) for term in terms}
+    scores = {}
+    for video_id, match in matches.items():
+        score = 0.0
+        for term in terms:
+            pseudo_tf = 0.0
+            for field in fields:
+                tf = len(match.exact[field].get(term, ())) + PREFIX_WEIGHT * match.prefix[field].get(term, 0)
+                if not tf:
+                    continue
+                avg_length = stats['avgLength'].get(field) or match.lengths.get(field, 1) or 1
+                b = FIELD_B[field]
+                pseudo_tf += FIELD_WEIGHTS[field] * tf / (1 - b + b * match.lengths.get(field, 0) / avg_length)
+            score += idfs[term] * pseudo_tf / (K1 + pseudo_tf)
+        if len(terms) > 1 and any(match.has_phrase(terms, field) for field in fields):
+            score *= PHRASE_BOOST
+        scores[video_id] = score
+    return scores
+
+
+def rank(scores: Dict[str, float], limit: Optional[int] = None) -> List[str]:
+    """Video ids by descending score"""
+    ranked = sorted(scores, key=lambda video_id: -scores[video_id])
+    return ranked[:limit] if limit else ranked
@@ -0,0 +1,83 @@
+"""
+Deferred Imports for Fast Cold Start
+Heavy optional modules (torch, transformers, vosk, cv2, faiss, ...) are
+checked with importlib.util.find_spec at startup, which does not execute
+them, and only imported when a request first touches the object that
+needs them.
+"""
+
+import importlib
+import importlib.util
+import logging
+import threading
+from typing import Any, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def module_installed(name: str) -> bool:
+    """True if `name` can be imported, without importing it."""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+class LazyImport:
+    """Stand-in for `from <module> import <attr>` that imports on first use.
+
+    Attribute access and calls are forwarded to the real object. If the
+    import fails, the ImportError is remembered and re-raised on every use.
+    """
+
+    def __init__(self, module: str, attr: Optional[str] = None, requires: Iterable[str] = ()):
+        self._module = module
+        self._attr = attr
+        self._requires = tuple(requires)
+        self._target = None
+        self._error: Optional[ImportError] = None
+        self._lock = threading.Lock()
+
+    def missing(self) -> list:
+        """Required modules that are not installed (nothing is imported)."""
+        return [name for name in (*self._requires, self._module) if not module_installed(name)]
+
+    def installed(self) -> bool:
+        return not self.missing()
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._target is not None
+
+    @property
+    def error(self) -> Optional[str]:
+        return str(self._error) if self._error else None
+
+    def resolve(self) -> Any:
+        if self._target is not None:
+            return self._target
+        with self._lock:
+            if self._target is None:
+                if self._error is not None:
+                    raise self._error
+                try:
+                    module = importlib.import_module(self._module)
+                    self._target = getattr(module, self._attr) if self._attr else module
+                    logger.info(f"Imported {self._module}{'.' + self._attr if self._attr else ''} on first use")
+                except ImportError as e:
+                    self._error = e
+                    raise
+        return self._target
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith('__'):
+            # copy/pickle/inspect probing dunders must not trigger the import
+            raise AttributeError(name)
+        return getattr(self.resolve(), name)
+
+    def __call__(self, *args, **kwargs):
+        return self.resolve()(*args, **kwargs)
+
+    def __repr__(self) -> str:
+        state = 'loaded' if self.is_loaded else 'deferred'
+        return f"<LazyImport {self._module}{'.' + self._attr if self._attr else ''} ({state})>"
@@ -0,0 +1,319 @@
+"""
+Single-Decode Media Demux
+Opens a video once and produces everything the analyzers need: probe metadata,
+16 kHz mono PCM audio, evenly sampled frames, embedded text subtitles, and a
+thumbnail. Transcription, tagging and OCR consume these instead of re-decoding.
+
+In streaming mode the PCM never touches disk: an audio-only ffmpeg writes it
+to stdout and the recognizer consumes it as it is decoded. Frames, subtitles
+and the thumbnail come from a second ffmpeg reading the same file at the same
+time, so they are ready as soon as that pass ends instead of waiting for the
+recognizer to read the last of the audio. Each stream is still decoded once.
+"""
+
+import os
+import json
+import shutil
+import logging
+import tempfile
+import threading
+import subprocess
+from typing import Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000  # Vosk / Whisper input rate
+PCM_CHUNK_BYTES = 8000  # 4000 frames of s16le mono, 0.25s of audio
+DEMUX_FRAME_COUNT = int(os.environ.get('DEMUX_FRAME_COUNT', '10'))
+TRANSCRIPTION_STREAMING = os.environ.get('TRANSCRIPTION_STREAMING', 'true').lower() == 'true'
+# Subtitle codecs ffmpeg can convert to SRT (bitmap subtitles would fail the whole decode)
+TEXT_SUBTITLE_CODECS = {'subrip', 'srt', 'ass', 'ssa', 'mov_text', 'webvtt', 'text'}
+
+
+class DemuxError(RuntimeError):
+    """A demux decode failed; analyzers should decode the video themselves."""
+
+
+def probe_media(video_path: str) -> Dict:
+    """Return ffprobe format + stream metadata as a dict."""
+    cmd = [
+        'ffprobe', '-v', 'quiet', '-print_format', 'json',
+        '-show_format', '-show_streams', video_path
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout or '{}')
+
+
+def open_pcm_stream(video_path: str) -> subprocess.Popen:
+    """Start an audio-only ffmpeg decode writing s16le mono PCM to stdout."""
+    cmd = [
+        'ffmpeg', '-v', 'error', '-i', video_path,
+        '-vn', '-ac', '1', '-ar', str(SAMPLE_RATE),
+        '-acodec', 'pcm_s16le', '-f', 's16le', 'pipe:1'
+    ]
+    return subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+
+
+def iter_stream(stream, chunk_bytes: int = PCM_CHUNK_BYTES) -> Iterator[bytes]:
+    """Yield fixed-size chunks from a binary stream until EOF."""
+    while True:
+        data = stream.read(chunk_bytes)
+        if not data:
+            break
+        yield data
+
+
+def evenly_spaced(items: list, count: Optional[int]) -> list:
+    """Pick `count` evenly spaced items (all of them if count is None or larger)."""
+    if count is None or count >= len(items):
+        return list(items)
+    if count <= 0:
+        return []
+    step = len(items) / count
+    return [items[int(i * step)] for i in range(count)]
+
+
+class MediaArtifacts:
+    """Decoded outputs of one demux pass, stored in a private work directory.
+
+    When audio is streamed, exactly one consumer must read it via iter_pcm()
+    (or call drain_audio()); file artifacts are ready once wait() returns.
+    wait() and drain_audio() raise DemuxError if their ffmpeg failed.
+    """
+
+    def __init__(self, video_path: str, work_dir: str, probe: Dict):
+        self.video_path = video_path
+        self.work_dir = work_dir
+        self.probe = probe or {}
+        self.sample_rate = SAMPLE_RATE
+        self.audio_path: Optional[str] = None
+        self.audio_stream = None  # ffmpeg stdout in streaming mode
+        self.subtitle_path: Optional[str] = None
+        self.thumbnail_path: Optional[str] = None
+        self.frames: List[Dict] = []  # [{'path', 'timestamp'}]
+        self._proc: Optional[subprocess.Popen] = None  # file outputs (frames, subtitles, thumbnail)
+        self._audio_proc: Optional[subprocess.Popen] = None  # streamed PCM
+        self.error: Optional[str] = None  # file decode failure
+        self.audio_error: Optional[str] = None  # audio decode failure
+        self._requested: Dict = {}
+        self._wait_lock = threading.Lock()
+
+    def _streams(self, codec_type: str) -> List[Dict]:
+        return [s for s in self.probe.get('streams', []) if s.get('codec_type') == codec_type]
+
+    @property
+    def duration(self) -> float:
+        try:
+            return float((self.probe.get('format') or {}).get('duration') or 0)
+        except (TypeError, ValueError):
+            return 0.0
+
+    @property
+    def has_audio(self) -> bool:
+        return bool(self._streams('audio'))
+
+    @property
+    def has_video(self) -> bool:
+        return bool(self._streams('video'))
+
+    @property
+    def has_subtitles(self) -> bool:
+        return bool(self._streams('subtitle'))
+
+    @property
+    def has_pcm(self) -> bool:
+        return bool(self.audio_path or self.audio_stream)
+
+    def wait(self):
+        """Block until the file outputs are written and collect them; DemuxError if that decode failed."""
+        with self._wait_lock:
+            if self._proc is not None:
+                proc, self._proc = self._proc, None
+                if proc.wait() != 0:
+                    self.error = f"ffmpeg exited with {proc.returncode}: {self._read_log('ffmpeg.log')}"
+                    logger.warning(f"Demux decode failed for {self.video_path}: {self.error}")
+                else:
+                    self._collect_outputs()
+            if self.error:
+                raise DemuxError(self.error)
+
+    def _finish_audio(self):
+        """Reap the audio decode once its pipe is at EOF, recording a failure."""
+        proc, self._audio_proc = self._audio_proc, None
+        if proc is not None and proc.wait() != 0:
+            self.audio_error = f"ffmpeg exited with {proc.returncode}: {self._read_log('ffmpeg-audio.log')}"
+            logger.warning(f"Demux audio decode failed for {self.video_path}: {self.audio_error}")
+
+    def _read_log(self, name: str) -> str:
+        try:
+            with open(os.path.join(self.work_dir, name), 'r', errors='ignore') as f:
+                return f.read()[-500:].strip()
+        except OSError:
+            return ''
+
+    def _collect_outputs(self):
+        req = self._requested
+        if self.audio_path and not os.path.exists(self.audio_path):
+            self.audio_path = None
+        if self.subtitle_path and not os.path.exists(self.subtitle_path):
+            self.subtitle_path = None
+        thumb = req.get('thumbnail_path')
+        if thumb and os.path.exists(thumb):
+            self.thumbnail_path = thumb
+        num_frames, duration = req.get('num_frames', 0), self.duration
+        spacing = duration / num_frames if duration > 0 and num_frames > 0 else 1.0
+        self.frames = []
+        for i in range(num_frames):
+            path = os.path.join(self.work_dir, f'frame_{i + 1:03d}.jpg')
+            if os.path.exists(path):
+                self.frames.append({'path': path, 'timestamp': round(i * spacing, 3)})
+
+    def frame_paths(self, num_frames: Optional[int] = None) -> List[str]:
+        """JPEG paths of the sampled frames, optionally thinned to num_frames."""
+        self.wait()
+        return [f['path'] for f in evenly_spaced(self.frames, num_frames)]
+
+    def load_frames(self, num_frames: Optional[int] = None) -> List[Dict]:
+        """Decode sampled frames to RGB arrays: [{'frame', 'timestamp'}]."""
+        import cv2
+        self.wait()
+        loaded = []
+        for info in evenly_spaced(self.frames, num_frames):
+            image = cv2.imread(info['path'])
+            if image is not None:
+                loaded.append({'frame': cv2.cvtColor(image, cv2.COLOR_BGR2RGB), 'timestamp': info['timestamp']})
+        return loaded
+
+    def iter_pcm(self, chunk_bytes: int = PCM_CHUNK_BYTES) -> Iterator[bytes]:
+        """Yield raw s16le mono PCM in fixed-size chunks (streamed or from disk)."""
+        if self.audio_stream is not None:
+            stream, self.audio_stream = self.audio_stream, None  # single consumer
+            try:
+                yield from iter_stream(stream, chunk_bytes)
+            finally:
+                self._drain(stream)
+                self._finish_audio()
+            return
+        if not self.audio_path or not os.path.exists(self.audio_path):
+            return
+        with open(self.audio_path, 'rb') as f:
+            yield from iter_stream(f, chunk_bytes)
+
+    @staticmethod
+    def _drain(stream):
+        """Read a pipe to EOF so ffmpeg can exit."""
+        try:
+            while stream.read(1 << 16):
+                pass
+            stream.close()
+        except (OSError, ValueError):
+            pass
+
+    def drain_audio(self):
+        """Discard streamed audio nobody consumed, then raise DemuxError if the audio decode failed.
+
+        Call it after the audio consumer is done: a recognizer that reads a
+        failed stream just sees less (or no) audio.
+        """
+        if self.audio_stream is not None:
+            stream, self.audio_stream = self.audio_stream, None
+            self._drain(stream)
+        self._finish_audio()
+        if self.audio_error:
+            raise DemuxError(self.audio_error)
+
+    def read_subtitle_lines(self) -> List[str]:
+        """Text lines of the extracted subtitle track (SRT numbering/timings stripped)."""
+        self.wait()
+        if not self.subtitle_path or not os.path.exists(self.subtitle_path):
+            return []
+        with open(self.subtitle_path, 'r', encoding='utf-8', errors='ignore') as f:
+            lines = [line.strip() for line in f]
+        return [line for line in lines if line and not line.isdigit() and '-->' not in line]
+
+    def cleanup(self):
+        for proc in (self._proc, self._audio_proc):
+            if proc is not None and proc.poll() is None:
+                proc.kill()
+                proc.wait()
+        self._proc = self._audio_proc = None
+        if self.audio_stream is not None:
+            self.audio_stream.close()
+            self.audio_stream = None
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+
+def _pcm_args(target: str) -> List[str]:
+    return ['-map', '0:a:0', '-vn', '-ac', '1', '-ar', str(SAMPLE_RATE),
+            '-acodec', 'pcm_s16le', '-f', 's16le', target]
+
+
+def _start(cmd: List[str], log_path: str, stdout=None) -> subprocess.Popen:
+    with open(log_path, 'wb') as log:
+        return subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=stdout, stderr=log)
+
+
+def demux_media(video_path: str, num_frames: int = DEMUX_FRAME_COUNT,
+                thumbnail_path: Optional[str] = None,
+                stream_audio: bool = TRANSCRIPTION_STREAMING) -> MediaArtifacts:
+    """Probe once, then decode once with ffmpeg writing every artifact.
+
+    Pass thumbnail_path to also (re)write the thumbnail from the same decode.
+    With stream_audio the call returns as soon as ffmpeg starts: PCM arrives
+    on media.iter_pcm() while a separate pass writes the file artifacts, which
+    media.wait() waits for. Raises on probe/decode failure (streaming: from
+    wait() / drain_audio()); callers fall back to per-analyzer decoding.
+    """
+    probe = probe_media(video_path)
+    media = MediaArtifacts(video_path, tempfile.mkdtemp(prefix='demux_'), probe)
+    media._requested = {'num_frames': num_frames, 'thumbnail_path': thumbnail_path}
+
+    stream_audio = stream_audio and media.has_audio
+
+    outputs = []
+    if media.has_audio and not stream_audio:
+        media.audio_path = os.path.join(media.work_dir, 'audio.pcm')
+        outputs += _pcm_args(media.audio_path)
+
+    subtitle_streams = media._streams('subtitle')
+    if subtitle_streams and subtitle_streams[0].get('codec_name') in TEXT_SUBTITLE_CODECS:
+        media.subtitle_path = os.path.join(media.work_dir, 'subtitles.srt')
+        outputs += ['-map', '0:s:0', '-c:s', 'srt', media.subtitle_path]
+
+    duration = media.duration
+    if media.has_video and num_frames > 0:
+        # fps=N/duration spreads N frames across the whole clip
+        rate = f"{num_frames}/{duration:.3f}" if duration > 0 else '1'
+        outputs += ['-map', '0:v:0', '-an', '-vf', f'fps={rate}', '-frames:v', str(num_frames),
+                    '-q:v', '2', os.path.join(media.work_dir, 'frame_%03d.jpg')]
+
+    if media.has_video and thumbnail_path:
+        seek = min(1.0, duration / 2) if duration > 0 else 0
+        outputs += ['-map', '0:v:0', '-an', '-ss', f'{seek:.3f}', '-frames:v', '1', '-q:v', '2', thumbnail_path]
+
+    ffmpeg = ['ffmpeg', '-nostdin', '-v', 'error', '-y', '-i', video_path]
+    if stream_audio:
+        try:
+            media._audio_proc = _start(ffmpeg + _pcm_args('pipe:1'), os.path.join(media.work_dir, 'ffmpeg-audio.log'),
+                                       stdout=subprocess.PIPE)
+            media.audio_stream = media._audio_proc.stdout
+            if outputs:
+                media._proc = _start(ffmpeg + outputs, os.path.join(media.work_dir, 'ffmpeg.log'))
+        except Exception:
+            media.cleanup()
+            raise
+        logger.info(f"Demuxing {video_path}: {duration:.1f}s, streaming audio")
+        return media
+
+    try:
+        subprocess.run(ffmpeg + outputs, capture_output=True, check=True)
+    except Exception:
+        media.cleanup()
+        raise
+    media._collect_outputs()
+
+    logger.info(
+        f"Demuxed {video_path}: {duration:.1f}s, audio={'yes' if media.audio_path else 'no'}, "
+        f"frames={len(media.frames)}, subtitles={'yes' if media.subtitle_path else 'no'}"
+    )
+    return media
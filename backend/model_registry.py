@@ -0,0 +1,233 @@
+"""
+Process-wide Model Registry
+Every heavy model (Vosk, YOLO, CLIP, MiniLM) is loaded at most once per
+process, lazily on first use, and shared by every component that needs it.
+
+Sharing across processes relies on fork: models preloaded in the parent
+(MODEL_PRELOAD) are inherited copy-on-write by job workers and transcription
+pools, and gc.freeze() keeps the collector from touching (and so copying)
+those pages. Hugging Face weights stored as safetensors are already
+memory-mapped by their loaders. Idle or oversized models can be evicted;
+the next get() reloads them.
+"""
+
+import os
+import gc
+import time
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from config import MODEL_PRELOAD, MODEL_IDLE_SECONDS, MODEL_MEMORY_LIMIT_MB, EMBEDDING_THREADS
+
+logger = logging.getLogger(__name__)
+
+VOSK_MODEL_NAME = "vosk-model-small-en-us-0.15"
+CLIP_MODEL_NAME = "openai/clip-vit-base-patch32"
+SENTENCE_MODEL_NAME = "all-MiniLM-L6-v2"
+
+
+def current_rss_bytes() -> int:
+    """Resident set size of this process (0 if it cannot be read)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except Exception:
+        return 0
+
+
+class _Entry:
+    def __init__(self, name: str, loader: Callable[[], Any], description: str):
+        self.name = name
+        self.loader = loader
+        self.description = description
+        self.model = None
+        self.error: Optional[str] = None
+        self.load_seconds = 0.0
+        self.rss_bytes = 0
+        self.loaded_at: Optional[float] = None
+        self.last_used: Optional[float] = None
+        self.uses = 0
+        self.lock = threading.Lock()
+
+
+class ModelRegistry:
+    """Lazily loads named models once and tracks their cost."""
+
+    def __init__(self):
+        self._entries: Dict[str, _Entry] = {}
+
+    def register(self, name: str, loader: Callable[[], Any], description: str = ''):
+        self._entries[name] = _Entry(name, loader, description)
+
+    def names(self) -> List[str]:
+        return list(self._entries)
+
+    def get(self, name: str) -> Optional[Any]:
+        """Return the model, loading it on first use. None if it failed to load.
+
+        A failed load is not retried on every call; warm() retries it.
+        """
+        entry = self._entries[name]
+        if entry.model is None and entry.error is None:
+            self._load(entry)
+        if entry.model is not None:
+            entry.last_used = time.time()
+            entry.uses += 1
+        return entry.model
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._entries and self._entries[name].model is not None
+
+    def _load(self, entry: _Entry):
+        with entry.lock:
+            if entry.model is not None:
+                return
+            rss_before = current_rss_bytes()
+            started = time.time()
+            try:
+                logger.info(f"Loading model '{entry.name}'...")
+                entry.model = entry.loader()
+                entry.error = None
+            except Exception as e:
+                entry.error = str(e)
+                logger.error(f"Failed to load model '{entry.name}': {e}")
+                return
+            entry.load_seconds = round(time.time() - started, 3)
+            # Approximate: other threads may allocate while we load
+            entry.rss_bytes = max(0, current_rss_bytes() - rss_before)
+            entry.loaded_at = time.time()
+            logger.info(f"✅ Model '{entry.name}' loaded in {entry.load_seconds}s "
+                        f"(+{entry.rss_bytes / (1024 * 1024):.0f} MB RSS)")
+        self.enforce_memory_limit(keep=entry.name)
+
+    def warm(self, names: Optional[Iterable[str]] = None) -> Dict[str, bool]:
+        """Load models now (retrying earlier failures); returns name -> loaded."""
+        status = {}
+        for name in (names or self.names()):
+            if name not in self._entries:
+                logger.warning(f"Unknown model '{name}'")
+                status[name] = False
+                continue
+            self._entries[name].error = None
+            status[name] = self.get(name) is not None
+        return status
+
+    def preload(self, names: Optional[Iterable[str]] = None) -> Dict[str, bool]:
+        """Warm models in a parent process so forked children share their pages."""
+        names = list(names if names is not None else MODEL_PRELOAD)
+        if not names:
+            return {}
+        status = self.warm(names)
+        gc.collect()
+        gc.freeze()  # stop the cyclic GC from writing to (and so copying) inherited pages
+        return status
+
+    def unload(self, name: str) -> bool:
+        """Drop this process's reference; callers holding one keep it alive until done."""
+        entry = self._entries.get(name)
+        if entry is None or entry.model is None:
+            return False
+        with entry.lock:
+            entry.model = None
+            entry.rss_bytes = 0
+            entry.loaded_at = None
+        gc.collect()
+        logger.info(f"🧹 Model '{name}' unloaded")
+        return True
+
+    def evict_idle(self, idle_seconds: float = MODEL_IDLE_SECONDS) -> List[str]:
+        """Unload models unused for idle_seconds (no-op when idle_seconds <= 0)."""
+        if idle_seconds <= 0:
+            return []
+        cutoff = time.time() - idle_seconds
+        idle = [e.name for e in self._entries.values()
+                if e.model is not None and (e.last_used or e.loaded_at or 0) < cutoff]
+        return [name for name in idle if self.unload(name)]
+
+    def enforce_memory_limit(self, limit_mb: float = MODEL_MEMORY_LIMIT_MB,
+                             keep: Optional[str] = None) -> List[str]:
+        """Evict least recently used models until process RSS is under limit_mb."""
+        if limit_mb <= 0:
+            return []
+        evicted = []
+        loaded = sorted((e for e in self._entries.values() if e.model is not None and e.name != keep),
+                        key=lambda e: e.last_used or e.loaded_at or 0)
+        for entry in loaded:
+            if current_rss_bytes() <= limit_mb * 1024 * 1024:
+                break
+            if self.unload(entry.name):
+                evicted.append(entry.name)
+        return evicted
+
+    def stats(self) -> Dict[str, Dict]:
+        """Per-model load state, load time, RSS cost and usage."""
+        return {
+            e.name: {
+                'description': e.description,
+                'loaded': e.model is not None,
+                'error': e.error,
+                'loadSeconds': e.load_seconds,
+                'rssMB': round(e.rss_bytes / (1024 * 1024), 1),
+                'uses': e.uses,
+                'lastUsedAt': e.last_used,
+            }
+            for e in self._entries.values()
+        }
+
+
+# -----------------------------
+# Loaders (heavy imports happen here, on first use)
+# -----------------------------
+
+def _load_vosk():
+    from vosk import Model
+    model_paths = [
+        VOSK_MODEL_NAME,
+        os.path.join(os.getcwd(), VOSK_MODEL_NAME),
+        os.path.join(os.path.dirname(__file__), VOSK_MODEL_NAME)
+    ]
+    for path in model_paths:
+        if os.path.exists(path):
+            return Model(path)
+    raise FileNotFoundError("Vosk model not found, checked: " + ", ".join(model_paths))
+
+
+def torch_device() -> str:
+    import torch
+    return 'cuda' if torch.cuda.is_available() else 'cpu'
+
+
+def _load_yolo():
+    from ultralytics import YOLO
+    return YOLO('yolov8n.pt')
+
+
+def _load_clip():
+    from transformers import CLIPProcessor, CLIPModel
+    model = CLIPModel.from_pretrained(CLIP_MODEL_NAME).to(torch_device())
+    model.eval()
+    return {'model': model, 'processor': CLIPProcessor.from_pretrained(CLIP_MODEL_NAME)}
+
+
+def _load_sentence_model():
+    import torch
+    from sentence_transformers import SentenceTransformer
+    model = SentenceTransformer(SENTENCE_MODEL_NAME)
+    if model.device.type == 'cpu':
+        # Batched encoding scales with intra-op threads (process-wide setting)
+        torch.set_num_threads(EMBEDDING_THREADS or os.cpu_count() or 1)
+    return model
+
+
+# Global instance
+model_registry = ModelRegistry()
+model_registry.register('vosk', _load_vosk, 'Vosk small English speech recognizer')
+model_registry.register('yolo', _load_yolo, 'YOLOv8n object detector')
+model_registry.register('clip', _load_clip, 'CLIP ViT-B/32 scene classifier')
+model_registry.register('minilm', _load_sentence_model, 'MiniLM sentence embeddings')
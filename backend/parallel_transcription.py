@@ -0,0 +1,398 @@
+"""
+Chunked Parallel Speech Recognition
+Long recordings are split into ~TRANSCRIPTION_CHUNK_SECONDS pieces at the
+quietest point near each boundary, recognized in a process pool (one Vosk or
+faster-whisper model per process), and stitched back together with word
+timestamps shifted to the full recording.
+
+Each chunk is decoded with a little overlap on both sides so words cut by an
+imperfect split are still heard whole; while stitching, a word is kept only
+by the chunk whose core range contains its midpoint, so overlap never
+produces duplicates.
+
+transcribe_pcm_file splits a PCM file already on disk. transcribe_pcm_stream
+takes the PCM as ffmpeg decodes it: each chunk is cut as soon as enough
+audio has arrived, written to its own small file, and deleted once
+recognized, so disk use stays at a few chunks however long the recording.
+"""
+
+import os
+import shutil
+import logging
+import subprocess
+import tempfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from config import (
+    JOB_WORKERS, PARALLEL_TRANSCRIPTION, PARALLEL_TRANSCRIPTION_MIN_SECONDS,
+    TRANSCRIPTION_CHUNK_SECONDS, TRANSCRIPTION_CHUNK_OVERLAP_SECONDS, TRANSCRIPTION_PROCESSES
+)
+from media_demux import SAMPLE_RATE, PCM_CHUNK_BYTES
+
+logger = logging.getLogger(__name__)
+
+SPLIT_SEARCH_SECONDS = 5.0  # look this far either side of a boundary for silence
+ENERGY_FRAME_MS = 30
+
+# Per-process recognizer, loaded once by the pool initializer
+_worker_engine = None
+_worker_engine_name = None
+
+
+def transcription_processes() -> int:
+    """Process count for one job: explicit setting, or the cores left per job worker."""
+    if TRANSCRIPTION_PROCESSES > 0:
+        return TRANSCRIPTION_PROCESSES
+    return max(1, (os.cpu_count() or 1) // max(1, JOB_WORKERS))
+
+
+def should_parallelize(duration: float) -> bool:
+    """Whether audio of this length is worth splitting across processes."""
+    return (PARALLEL_TRANSCRIPTION and duration >= PARALLEL_TRANSCRIPTION_MIN_SECONDS
+            and transcription_processes() > 1)
+
+
+def find_split_points(samples: np.ndarray, sample_rate: int = SAMPLE_RATE,
+                      chunk_seconds: float = TRANSCRIPTION_CHUNK_SECONDS,
+                      search_seconds: float = SPLIT_SEARCH_SECONDS) -> List[int]:
+    """Sample offsets to cut at: the lowest-energy frame near every chunk boundary.
+
+    Only the search windows are read, so a memory-mapped file stays on disk.
+    """
+    total = len(samples)
+    chunk = int(chunk_seconds * sample_rate)
+    search = int(search_seconds * sample_rate)
+    frame = max(1, int(sample_rate * ENERGY_FRAME_MS / 1000))
+    splits = []
+    pos = 0
+    while chunk > 0 and total - pos > chunk + search:
+        lo, hi = _search_window(pos, chunk, search, total)
+        pos = _quietest(np.asarray(samples[lo:hi], dtype=np.float32), lo, frame, pos + chunk)
+        splits.append(pos)
+    return splits
+
+
+def _search_window(pos: int, chunk: int, search: int, total: int) -> Tuple[int, int]:
+    """Sample range to look for the split ending the chunk that starts at pos"""
+    target = pos + chunk
+    return max(pos + chunk // 2, target - search), min(total, target + search)
+
+
+def _quietest(window: np.ndarray, lo: int, frame: int, default: int) -> int:
+    """Offset of the middle of the lowest-energy frame of window (which starts at offset lo)"""
+    frames = len(window) // frame
+    if not frames:
+        return default
+    energy = np.square(window[:frames * frame].astype(np.float32).reshape(frames, frame)).mean(axis=1)
+    return lo + int(np.argmin(energy)) * frame + frame // 2
+
+
+def spool_chunks(pcm_chunks: Iterable[bytes], work_dir: str, sample_rate: int = SAMPLE_RATE,
+                 chunk_seconds: float = TRANSCRIPTION_CHUNK_SECONDS,
+                 search_seconds: float = SPLIT_SEARCH_SECONDS,
+                 overlap_seconds: float = TRANSCRIPTION_CHUNK_OVERLAP_SECONDS) -> Iterator[Tuple[str, Dict]]:
+    """Cut s16le PCM into chunk files as it arrives: yields (path, chunk) like plan_chunks.
+
+    The splits are the ones find_split_points would pick on the whole
+    recording. Only the audio since the current chunk's start is held in
+    memory; the caller owns (and deletes) the files.
+    """
+    chunk = int(chunk_seconds * sample_rate)
+    search = int(search_seconds * sample_rate)
+    overlap = int(overlap_seconds * sample_rate)
+    frame = max(1, int(sample_rate * ENERGY_FRAME_MS / 1000))
+    raw = bytearray()
+    raw_start = 0  # sample offset of raw[0]
+    pos = 0  # core start of the next chunk
+    index = 0
+
+    def write(core_end: int, end: int) -> Tuple[str, Dict]:
+        start = max(0, pos - overlap)
+        path = os.path.join(work_dir, f'chunk_{index:04d}.pcm')
+        with open(path, 'wb') as f:
+            f.write(raw[(start - raw_start) * 2:(end - raw_start) * 2])
+        return path, {'index': index, 'start': start, 'end': end, 'core_start': pos, 'core_end': core_end}
+
+    def cut(total: int, final: bool) -> Iterator[Tuple[str, Dict]]:
+        nonlocal raw_start, pos, index
+        # Until the stream ends, also wait for the overlap after the furthest possible split
+        while chunk > 0 and total - pos > chunk + search + (0 if final else overlap):
+            lo, hi = _search_window(pos, chunk, search, total)
+            window = np.frombuffer(bytes(raw[(lo - raw_start) * 2:(hi - raw_start) * 2]), dtype='<i2')
+            split = _quietest(window, lo, frame, pos + chunk)
+            yield write(split, min(total, split + overlap))
+            index += 1
+            pos = split
+            drop = pos - overlap - raw_start
+            if drop > 0:
+                del raw[:drop * 2]
+                raw_start += drop
+
+    for data in pcm_chunks:
+        raw += data
+        yield from cut(raw_start + len(raw) // 2, final=False)
+    total = raw_start + len(raw) // 2
+    yield from cut(total, final=True)
+    if total > pos:
+        yield write(total, total)
+
+
+def plan_chunks(total_samples: int, splits: List[int], overlap_samples: int) -> List[Dict]:
+    """Chunk ranges in samples: the decoded `start`/`end` and the owned `core_*` range."""
+    bounds = [0] + list(splits) + [total_samples]
+    return [
+        {
+            'index': i,
+            'start': max(0, bounds[i] - overlap_samples),
+            'end': min(total_samples, bounds[i + 1] + overlap_samples),
+            'core_start': bounds[i],
+            'core_end': bounds[i + 1],
+        }
+        for i in range(len(bounds) - 1)
+    ]
+
+
+def stitch_words(results: List[Dict], sample_rate: int = SAMPLE_RATE) -> List[Dict]:
+    """Merge per-chunk words (already in absolute time) and drop overlap duplicates."""
+    results = sorted(results, key=lambda r: r['chunk']['index'])
+    words = []
+    for n, result in enumerate(results):
+        chunk = result['chunk']
+        core_start = chunk['core_start'] / sample_rate
+        core_end = chunk['core_end'] / sample_rate
+        last = n == len(results) - 1
+        for word in result['words']:
+            mid = (word['start_time'] + word['end_time']) / 2
+            if mid >= core_start and (mid < core_end or last):
+                words.append(word)
+    return words
+
+
+def _load_engine(engine: str, options: Dict):
+    if engine == 'vosk':
+        from enhanced_transcription_simple import EnhancedTranscriptionSimple
+        transcriber = EnhancedTranscriptionSimple()
+        transcriber._load_models()
+        if not transcriber.vosk_model:
+            raise RuntimeError('Vosk model not available')
+        return transcriber
+    if engine == 'whisper':
+        from faster_whisper import WhisperModel
+        return WhisperModel(
+            options.get('model_size', 'tiny.en'),
+            device='cpu',
+            compute_type=options.get('compute_type', 'int8'),
+            cpu_threads=options.get('cpu_threads', 1),
+        )
+    raise ValueError(f"Unknown transcription engine: {engine}")
+
+
+def _init_worker(engine: str, options: Dict):
+    """Pool initializer: load one model per process."""
+    global _worker_engine, _worker_engine_name
+    _worker_engine = _load_engine(engine, options)
+    _worker_engine_name = engine
+
+
+def _read_pcm(pcm_path: str, chunk: Dict, file_start: int = 0) -> np.ndarray:
+    return np.fromfile(pcm_path, dtype='<i2', count=chunk['end'] - chunk['start'],
+                       offset=(chunk['start'] - file_start) * 2)
+
+
+def _shift(word: Dict, offset: float) -> Dict:
+    word = dict(word)
+    for key in ('start_time', 'end_time'):
+        if word.get(key) is not None:
+            word[key] = round(float(word[key]) + offset, 3)
+    return word
+
+
+def _recognize_chunk(pcm_path: str, chunk: Dict, options: Dict, file_start: int = 0) -> Dict:
+    """Recognize one chunk in a pool process; word times come back absolute.
+
+    file_start is the sample offset of the file's first sample (a chunk file
+    from spool_chunks holds only its chunk).
+    """
+    samples = _read_pcm(pcm_path, chunk, file_start)
+    offset = chunk['start'] / SAMPLE_RATE
+    confidences = []
+
+    if _worker_engine_name == 'vosk':
+        pcm = samples.tobytes()
+        _, words = _worker_engine.recognize_pcm(
+            (pcm[i:i + PCM_CHUNK_BYTES] for i in range(0, len(pcm), PCM_CHUNK_BYTES)), SAMPLE_RATE
+        )
+    else:
+        segments, _info = _worker_engine.transcribe(
+            samples.astype(np.float32) / 32768.0,
+            language=options.get('language', 'en'),
+            task='transcribe',
+            vad_filter=True,
+            word_timestamps=True,
+            beam_size=5,
+            best_of=5,
+            condition_on_previous_text=False,
+        )
+        words = []
+        for seg in segments:
+            if getattr(seg, 'avg_logprob', None) is not None:
+                confidences.append(max(min(1.0 + float(seg.avg_logprob), 1.0), 0.0))
+            for w in getattr(seg, 'words', None) or []:
+                if w.start is None or w.end is None or not w.word.strip():
+                    continue
+                words.append({
+                    'word': w.word.strip(),
+                    'start_time': float(w.start),
+                    'end_time': float(w.end),
+                    'confidence': 0.0
+                })
+
+    # Words with no timing cannot be placed, so they cannot be stitched either
+    words = [_shift(w, offset) for w in words if w.get('start_time') is not None and w.get('end_time') is not None]
+    return {'chunk': chunk, 'words': words, 'confidences': confidences}
+
+
+class _PartialReporter:
+    """Collects chunk results; reports the contiguous finished prefix so partials stay in order"""
+
+    def __init__(self, on_partial: Optional[Callable[[str, float], None]]):
+        self.on_partial = on_partial
+        self.results: Dict[int, Dict] = {}
+        self.reported = 0
+
+    def add(self, result: Dict):
+        self.results[result['chunk']['index']] = result
+        prefix = self.reported
+        while self.reported in self.results:
+            self.reported += 1
+        if self.on_partial and self.reported > prefix:
+            done = [self.results[i] for i in range(self.reported)]
+            try:
+                self.on_partial(' '.join(w['word'] for w in stitch_words(done)),
+                                done[-1]['chunk']['core_end'] / SAMPLE_RATE)
+            except Exception as e:
+                logger.debug(f"Partial transcript callback failed: {e}")
+
+    def transcript(self) -> Tuple[str, List[Dict], List[float]]:
+        ordered = [self.results[i] for i in sorted(self.results)]
+        words = stitch_words(ordered)
+        confidences = [c for r in ordered for c in r['confidences']]
+        return ' '.join(w['word'] for w in words), words, confidences
+
+
+def transcribe_pcm_file(pcm_path: str, engine: str, options: Optional[Dict] = None,
+                        on_partial: Optional[Callable[[str, float], None]] = None,
+                        processes: Optional[int] = None) -> Optional[Tuple[str, List[Dict], List[float]]]:
+    """Recognize a raw s16le mono 16 kHz PCM file in parallel chunks.
+
+    Returns (text, words, segment_confidences), or None when the audio is too
+    short to split or the pool could not run, so callers fall back to their
+    sequential path. `on_partial(text, audio_seconds)` fires as the finished
+    prefix of the recording grows.
+    """
+    options = dict(options or {})
+    processes = processes or transcription_processes()
+    total = os.path.getsize(pcm_path) // 2
+    if not total:
+        return None
+    samples = np.memmap(pcm_path, dtype='<i2', mode='r', shape=(total,))
+    try:
+        splits = find_split_points(samples)
+    finally:
+        del samples
+    chunks = plan_chunks(total, splits, int(TRANSCRIPTION_CHUNK_OVERLAP_SECONDS * SAMPLE_RATE))
+    if len(chunks) < 2 or processes < 2:
+        return None
+
+    processes = min(processes, len(chunks))
+    if engine == 'whisper':
+        options.setdefault('cpu_threads', max(1, (os.cpu_count() or 1) // processes))
+    logger.info(f"Transcribing {total / SAMPLE_RATE:.0f}s of audio in {len(chunks)} chunks on {processes} processes ({engine})")
+
+    reporter = _PartialReporter(on_partial)
+    try:
+        with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker,
+                                 initargs=(engine, options)) as pool:
+            futures = [pool.submit(_recognize_chunk, pcm_path, chunk, options) for chunk in chunks]
+            for future in as_completed(futures):
+                reporter.add(future.result())
+    except Exception as e:
+        logger.warning(f"Parallel transcription failed, falling back to sequential: {e}")
+        return None
+    return reporter.transcript()
+
+
+def transcribe_pcm_stream(pcm_chunks: Iterable[bytes], engine: str, options: Optional[Dict] = None,
+                          on_partial: Optional[Callable[[str, float], None]] = None,
+                          processes: Optional[int] = None,
+                          work_dir: Optional[str] = None) -> Optional[Tuple[str, List[Dict], List[float]]]:
+    """Recognize streamed s16le mono 16 kHz PCM in parallel chunks while it is decoded.
+
+    Chunks are cut by spool_chunks and deleted once recognized. Reading stops
+    while 2 x processes chunks wait for the pool, which holds ffmpeg back, so
+    at most that many chunk files exist. The stream cannot be read twice:
+    if the pool fails, the remaining chunks are recognized in this process.
+    Returns (text, words, segment_confidences), or None for empty audio.
+    """
+    options = dict(options or {})
+    processes = max(1, processes or transcription_processes())
+    if engine == 'whisper':
+        options.setdefault('cpu_threads', max(1, (os.cpu_count() or 1) // processes))
+    spool_dir = tempfile.mkdtemp(prefix='chunks_', dir=work_dir)
+    spool = spool_chunks(pcm_chunks, spool_dir)
+    reporter = _PartialReporter(on_partial)
+    unrecognized = {}  # chunk index -> (path, chunk), from spooled until its result is in
+    pending = {}  # future -> chunk index
+
+    def collect(futures):
+        for future in futures:
+            reporter.add(future.result())
+            path, _ = unrecognized.pop(pending.pop(future))
+            os.unlink(path)
+
+    try:
+        try:
+            with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker,
+                                     initargs=(engine, options)) as pool:
+                for path, chunk in spool:
+                    unrecognized[chunk['index']] = (path, chunk)
+                    pending[pool.submit(_recognize_chunk, path, chunk, options, chunk['start'])] = chunk['index']
+                    if len(pending) >= 2 * processes:
+                        collect(wait(pending, return_when=FIRST_COMPLETED).done)
+                collect(as_completed(list(pending)))
+        except Exception as e:
+            logger.warning(f"Parallel transcription failed, recognizing the rest in this process: {e}")
+            _init_worker(engine, options)
+            for path, chunk in [unrecognized[i] for i in sorted(unrecognized)] + list(spool):
+                reporter.add(_recognize_chunk(path, chunk, options, chunk['start']))
+                os.unlink(path)
+    finally:
+        shutil.rmtree(spool_dir, ignore_errors=True)
+    if not reporter.results:
+        return None
+    logger.info(f"Transcribed {len(reporter.results)} streamed chunks on {processes} processes ({engine})")
+    return reporter.transcript()
+
+
+def transcribe_audio_file(audio_path: str, engine: str, options: Optional[Dict] = None,
+                          on_partial: Optional[Callable[[str, float], None]] = None):
+    """Decode any audio/video file to PCM, then run transcribe_pcm_file on it."""
+    fd, pcm_path = tempfile.mkstemp(suffix='.pcm', prefix='chunks_')
+    os.close(fd)
+    try:
+        cmd = [
+            'ffmpeg', '-v', 'error', '-y', '-i', audio_path,
+            '-vn', '-ac', '1', '-ar', str(SAMPLE_RATE),
+            '-acodec', 'pcm_s16le', '-f', 's16le', pcm_path
+        ]
+        subprocess.run(cmd, capture_output=True, check=True)
+        return transcribe_pcm_file(pcm_path, engine, options, on_partial)
+    except Exception as e:
+        logger.warning(f"Could not decode {audio_path} for parallel transcription: {e}")
+        return None
+    finally:
+        if os.path.exists(pcm_path):
+            os.unlink(pcm_path)
@@ -0,0 +1,82 @@
+"""
+Search Caches
+Small thread-safe LRU caches with optional TTL and hit/miss counters. Every
+cache registers itself by name so /health can report them all without
+importing the (heavier) modules that own them.
+"""
+
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable
+
+_caches: Dict[str, 'LRUCache'] = {}
+
+_MISSING = object()
+
+
+class LRUCache:
+    """Bounded LRU map; entries older than ttl_seconds (if > 0) count as misses."""
+
+    def __init__(self, name: str, max_size: int, ttl_seconds: float = 0):
+        self.name = name
+        self.max_size = max(0, int(max_size))
+        self.ttl_seconds = ttl_seconds
+        self._entries: 'OrderedDict[Hashable, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        _caches[name] = self
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is not _MISSING and self.ttl_seconds > 0 and time.time() - entry[1] > self.ttl_seconds:
+                del self._entries[key]
+                entry = _MISSING
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any):
+        if not self.max_size:
+            return
+        with self._lock:
+            self._entries[key] = (value, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'maxSize': self.max_size,
+            'ttlSeconds': self.ttl_seconds,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hitRate': round(self.hits / lookups, 3) if lookups else None,
+        }
+
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Stats for every cache created in this process."""
+    return {name: cache.stats() for name, cache in _caches.items()}
+
+
+def normalize_query(query: str) -> str:
+    """Case- and whitespace-insensitive cache key (MiniLM is uncased)."""
+    return ' '.join((query or '').lower().split())
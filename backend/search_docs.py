@@ -0,0 +1,191 @@
+"""
+Search Documents
+A denormalized projection of every video in the search_docs collection,
+holding everything a search result shows: title, owner display info,
+duration, upload date, thumbnail, transcript preview, tags and like/view
+counts. Formatting a page of results is then one indexed $in read instead of
+joining videos, transcripts, tags, users, likes and views at query time.
+
+db_mongo keeps documents current on upsert_video / save_transcript /
+save_tags, and app.py on likes, views, profile changes and deletes. Each
+write updates only the fields it changed; a video without a document (indexed
+before this existed) gets one built from the source collections the first
+time it is fetched, or all at once with python search_docs.py --rebuild.
+"""
+
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+TRANSCRIPT_PREVIEW_CHARS = 200
+VIDEO_FIELDS = ('originalName', 'filename', 'ownerId', 'duration', 'uploadedAt', 'thumbnails')
+
+
+def transcript_preview(text: str) -> str:
+    text = text or ''
+    return text[:TRANSCRIPT_PREVIEW_CHARS] + '...' if len(text) > TRANSCRIPT_PREVIEW_CHARS else text
+
+
+def _owner_info(db, owner_ids: Iterable[str]) -> Dict[str, Dict]:
+    from db_mongo import resolve_users  # db_mongo imports this module
+    return resolve_users(owner_ids, db=db)
+
+
+def _video_fields(db, video: Dict) -> Dict:
+    """search_docs fields derived from (some of) a video document's fields"""
+    fields = {}
+    if 'originalName' in video or 'filename' in video:
+        fields['title'] = video.get('originalName') or video.get('filename') or 'Untitled Video'
+    if 'ownerId' in video:
+        owner_id = video.get('ownerId') or ''
+        fields['ownerId'] = owner_id
+        fields['owner'] = _owner_info(db, [owner_id])[owner_id]
+    if 'duration' in video:
+        fields['duration'] = float(video.get('duration') or 0)
+    if 'uploadedAt' in video:
+        uploaded_at = video.get('uploadedAt') or ''
+        fields['uploadedAt'] = uploaded_at.isoformat() if isinstance(uploaded_at, datetime) else uploaded_at
+    if 'thumbnails' in video:
+        fields['thumbnail'] = (video.get('thumbnails') or {}).get('default')
+    return fields
+
+
+def build_doc(db, video_id: str) -> Optional[Dict]:
+    """The full search document, read from the source collections (None if the video is gone)"""
+    video = db.videos.find_one({'videoId': video_id})
+    if not video:
+        return None
+    transcript = (db.transcripts.find_one({'videoId': video_id}, {'text': 1}) or {}).get('text', '')
+    tags = (db.tags.find_one({'videoId': video_id}, {'keywords': 1}) or {}).get('keywords', [])
+    doc = {
+        'videoId': video_id,
+        'transcriptPreview': transcript_preview(transcript),
+        'transcriptLength': len(transcript),
+        'tags': tags,
+        'likes': db.likes.count_documents({'videoId': video_id}),
+        'views': int((db.views.find_one({'videoId': video_id}) or {}).get('count', 0)),
+        'updatedAt': datetime.utcnow(),
+    }
+    doc.update(_video_fields(db, {field: video.get(field) for field in VIDEO_FIELDS}))
+    return doc
+
+
+def refresh(db, video_id: str) -> Optional[Dict]:
+    """Rebuild one document from the source collections"""
+    doc = build_doc(db, video_id)
+    if doc is None:
+        remove(db, video_id)
+    else:
+        db.search_docs.replace_one({'videoId': video_id}, doc, upsert=True)
+    return doc
+
+
+def _update(db, video_id: str, fields: Dict):
+    """Set fields on an existing document; a video without one gets a full build"""
+    if not fields:
+        return
+    result = db.search_docs.update_one({'videoId': video_id}, {'$set': dict(fields, updatedAt=datetime.utcnow())})
+    if not result.matched_count:
+        refresh(db, video_id)
+
+
+def update_video(db, video_id: str, video_fields: Dict):
+    """Video metadata changed (only the VIDEO_FIELDS in video_fields are read)"""
+    _update(db, video_id, _video_fields(db, {k: v for k, v in video_fields.items() if k in VIDEO_FIELDS}))
+
+
+def update_content(db, video_id: str, transcript: Optional[str] = None, tags: Optional[List[str]] = None):
+    """Transcript and/or tags changed (None = unchanged)"""
+    fields = {}
+    if transcript is not None:
+        fields.update(transcriptPreview=transcript_preview(transcript), transcriptLength=len(transcript))
+    if tags is not None:
+        fields['tags'] = list(tags)
+    _update(db, video_id, fields)
+
+
+def update_transcript(db, video_id: str, text: str):
+    update_content(db, video_id, transcript=text or '')
+
+
+def update_tags(db, video_id: str, tags: List[str]):
+    update_content(db, video_id, tags=tags or [])
+
+
+def update_likes(db, video_id: str, likes: int):
+    db.search_docs.update_one({'videoId': video_id}, {'$set': {'likes': int(likes)}})
+
+
+def add_view(db, video_id: str):
+    db.search_docs.update_one({'videoId': video_id}, {'$inc': {'views': 1}})
+
+
+def update_owner(db, owner_ids: Iterable[str]):
+    """A user's display info changed: refresh it on every video stored under any of their ids"""
+    for owner_id, info in _owner_info(db, [o for o in owner_ids if o]).items():
+        db.search_docs.update_many({'ownerId': owner_id}, {'$set': {'owner': info}})
+
+
+def remove(db, video_id: str):
+    db.search_docs.delete_one({'videoId': video_id})
+
+
+def fetch(db, video_ids: Iterable[str]) -> Dict[str, Dict]:
+    """videoId -> search document, in one query; missing documents are built on the way"""
+    video_ids = [video_id for video_id in dict.fromkeys(video_ids) if video_id]
+    if not video_ids:
+        return {}
+    docs = {doc['videoId']: doc for doc in db.search_docs.find({'videoId': {'$in': video_ids}}, {'_id': 0})}
+    for video_id in video_ids:
+        if video_id not in docs:
+            doc = refresh(db, video_id)
+            if doc is not None:
+                doc.pop('_id', None)
+                docs[video_id] = doc
+    return docs
+
+
+def result_fields(doc: Dict) -> Dict:
+    """The search result fields every search path returns, from a search document"""
+    owner = doc.get('owner') or {}
+    return {
+        'id': doc['videoId'],
+        'videoId': doc['videoId'],
+        'title': doc.get('title', 'Untitled Video'),
+        'user': owner.get('name', 'Unknown User'),  # Show actual user name
+        'userEmail': owner.get('email', ''),  # Include email for reference
+        'userPicture': owner.get('picture', ''),  # Include profile picture
+        'duration': doc.get('duration', 0),
+        'uploadedAt': doc.get('uploadedAt', ''),
+        'thumbnail': doc.get('thumbnail'),
+        'transcript': doc.get('transcriptPreview', ''),
+        'tags': doc.get('tags', []),
+        'views': doc.get('views', 0),
+        'likes': doc.get('likes', 0),
+        'category': 'general',  # Default category
+    }
+
+
+def ensure_indexes(db):
+    db.search_docs.create_index([('videoId', 1)], unique=True)
+    db.search_docs.create_index([('ownerId', 1)])
+
+
+def rebuild(db) -> int:
+    """Build every video's document and drop orphans; returns the number built"""
+    video_ids = [video['videoId'] for video in db.videos.find({}, {'videoId': 1}) if video.get('videoId')]
+    db.search_docs.delete_many({'videoId': {'$nin': video_ids}})
+    count = sum(1 for video_id in video_ids if refresh(db, video_id) is not None)
+    logger.info(f"✅ Search documents rebuilt for {count} videos")
+    return count
+
+
+if __name__ == "__main__":
+    import sys
+    from db_mongo import get_db
+    if '--rebuild' not in sys.argv:
+        print("Usage: python search_docs.py --rebuild")
+        sys.exit(1)
+    print(f"✅ Built {rebuild(get_db())} search documents")
@@ -0,0 +1,130 @@
+"""
+Search Filters
+One normalized form of the /global-search filters, applied inside each index
+rather than to a short list of results afterwards:
+
+- duration: all | short (< 60s) | medium (60-300s) | long (> 300s)
+- ownerId:  only this owner's videos
+- date:     today | week | month | year, or dateFrom / dateTo (ISO dates, inclusive)
+- tags:     any of these tags (case-insensitive)
+
+The keyword index stores index_attributes() on every posting and filters in
+its Mongo query (mongo_query); the semantic index keeps the same attributes
+in its per-video metadata (matches).
+"""
+
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+DURATION_BUCKETS = ('short', 'medium', 'long')
+DATE_PRESETS = {'today': 1, 'week': 7, 'month': 30, 'year': 365}
+
+
+def duration_bucket(duration) -> str:
+    duration = float(duration or 0)
+    if duration < 60:
+        return 'short'
+    if duration <= 300:
+        return 'medium'
+    return 'long'
+
+
+def _iso(value) -> str:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value or '')
+
+
+def index_attributes(video: Dict, tags: Optional[List] = None) -> Dict:
+    """Filterable attributes of a video, as stored in the indexes"""
+    return {
+        'durationBucket': duration_bucket(video.get('duration', 0)),
+        'ownerId': video.get('ownerId') or '',
+        'uploadedAt': _iso(video.get('uploadedAt')),
+        'tags': sorted({str(tag).strip().lower() for tag in (tags or []) if str(tag).strip()}),
+    }
+
+
+def _parse_date(value) -> Optional[datetime]:
+    try:
+        return datetime.fromisoformat(str(value).replace('Z', '+00:00')).replace(tzinfo=None)
+    except (TypeError, ValueError):
+        return None
+
+
+class SearchFilters:
+    """Normalized filters; `key()` identifies them in caches"""
+
+    def __init__(self, duration: str = 'all', owner_id: Optional[str] = None, date_from: Optional[str] = None,
+                 date_until: Optional[str] = None, tags: Optional[List[str]] = None):
+        self.duration = duration if duration in DURATION_BUCKETS else 'all'
+        self.owner_id = owner_id or None
+        self.date_from = date_from  # ISO string, inclusive
+        self.date_until = date_until  # ISO string, exclusive
+        self.tags = sorted({str(tag).strip().lower() for tag in (tags or []) if str(tag).strip()})
+
+    @classmethod
+    def from_request(cls, filters: Optional[Dict]) -> 'SearchFilters':
+        filters = filters or {}
+        date_from = date_until = None
+        preset = str(filters.get('date') or '').lower()
+        if preset in DATE_PRESETS:
+            date_from = (datetime.utcnow() - timedelta(days=DATE_PRESETS[preset])).isoformat()
+        parsed = _parse_date(filters.get('dateFrom')) if filters.get('dateFrom') else None
+        if parsed:
+            date_from = parsed.isoformat()
+        parsed = _parse_date(filters.get('dateTo')) if filters.get('dateTo') else None
+        if parsed:
+            # A bare date includes that whole day
+            date_only = len(str(filters.get('dateTo'))) <= 10
+            date_until = (parsed + (timedelta(days=1) if date_only else timedelta(microseconds=1))).isoformat()
+        tags = filters.get('tags') or []
+        if isinstance(tags, str):
+            tags = tags.split(',')
+        return cls(duration=str(filters.get('duration') or 'all').lower(), owner_id=filters.get('ownerId'),
+                   date_from=date_from, date_until=date_until, tags=tags)
+
+    @property
+    def active(self) -> bool:
+        return bool(self.duration != 'all' or self.owner_id or self.date_from or self.date_until or self.tags)
+
+    def key(self) -> tuple:
+        return (self.duration, self.owner_id, self.date_from, self.date_until, tuple(self.tags))
+
+    def matches(self, video: Dict) -> bool:
+        """Check a video document or search metadata (duration, ownerId, uploadedAt, tags)"""
+        if not self.active:
+            return True
+        return self.matches_attributes(index_attributes(video, video.get('tags')))
+
+    def matches_attributes(self, attributes: Dict) -> bool:
+        if self.duration != 'all' and attributes.get('durationBucket') != self.duration:
+            return False
+        if self.owner_id and attributes.get('ownerId') != self.owner_id:
+            return False
+        uploaded_at = attributes.get('uploadedAt') or ''
+        if self.date_from and not (uploaded_at and uploaded_at >= self.date_from):
+            return False
+        if self.date_until and not (uploaded_at and uploaded_at < self.date_until):
+            return False
+        if self.tags and not set(self.tags) & set(attributes.get('tags') or []):
+            return False
+        return True
+
+    def mongo_query(self, prefix: str = '') -> Dict:
+        """The same conditions against stored index_attributes (under `prefix`)"""
+        query: Dict = {}
+        if self.duration != 'all':
+            query[f'{prefix}durationBucket'] = self.duration
+        if self.owner_id:
+            query[f'{prefix}ownerId'] = self.owner_id
+        if self.date_from or self.date_until:
+            bounds = {}
+            if self.date_from:
+                bounds['$gte'] = self.date_from
+            if self.date_until:
+                bounds['$lt'] = self.date_until
+            query[f'{prefix}uploadedAt'] = bounds
+        if self.tags:
+            query[f'{prefix}tags'] = {'$in': self.tags}
+        return query
@@ -0,0 +1,82 @@
+"""
+Cursor Pagination for Search
+A search ranks its (filtered) results once and stores them as a session in
+an LRU cache; the cursor returned with each page names the session and the
+next offset. Later pages are slices of the same list, so they stay stable
+while the index changes and cost no new search. A cursor whose session has
+expired is honoured by searching again from its offset.
+
+A cursor also carries a digest of the search it belongs to (normalized
+query, filters, mode), so it cannot page through another search's results:
+a cursor sent with a different search is rejected, live session or not.
+"""
+
+import json
+import base64
+import hashlib
+import uuid
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from config import SEARCH_SESSION_CACHE_SIZE, SEARCH_SESSION_TTL_SECONDS
+from search_cache import LRUCache
+
+search_sessions = LRUCache('search_sessions', SEARCH_SESSION_CACHE_SIZE, SEARCH_SESSION_TTL_SECONDS)
+
+
+def search_digest(key: Hashable) -> str:
+    """Short digest of a search key, e.g. (normalized query, filters.key(), mode)"""
+    return hashlib.sha1(repr(key).encode('utf-8')).hexdigest()[:12]
+
+
+def encode_cursor(session_id: str, offset: int, digest: str = '') -> str:
+    raw = json.dumps({'s': session_id, 'o': offset, 'k': digest}, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Optional[Tuple[str, int, str]]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        data = json.loads(raw)
+        return str(data['s']), max(int(data['o']), 0), str(data.get('k', ''))
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+def paginate(search: Callable[[], Tuple[List[Dict], Dict[str, Any]]], limit: int, page: int = 1,
+             cursor: Optional[str] = None, key: Hashable = None) -> Dict[str, Any]:
+    """One page of a search: {'results', 'total', 'offset', 'nextCursor', 'info'}.
+
+    `search` returns (ranked results, info) and only runs when there is no
+    live session for the cursor. Without a cursor, `page` picks the offset.
+    `key` identifies the search (query, filters, mode); sessions and cursors
+    are bound to it. Raises ValueError for a malformed cursor or one issued
+    for another search.
+    """
+    digest = search_digest(key)
+    offset = (max(page, 1) - 1) * limit
+    session = None
+    session_id = None
+    if cursor:
+        decoded = decode_cursor(cursor)
+        if decoded is None:
+            raise ValueError('Invalid cursor')
+        session_id, offset, cursor_digest = decoded
+        if cursor_digest != digest:
+            raise ValueError('Cursor belongs to a different search')
+        session = search_sessions.get(session_id)
+        if session is not None and session['digest'] != digest:
+            raise ValueError('Cursor belongs to a different search')
+    if session is None:
+        results, info = search()
+        session_id = uuid.uuid4().hex
+        session = {'results': results, 'info': info, 'digest': digest}
+        search_sessions.put(session_id, session)
+    results = session['results']
+    next_offset = offset + limit
+    return {
+        'results': results[offset:next_offset],
+        'total': len(results),
+        'offset': offset,
+        'nextCursor': encode_cursor(session_id, next_offset, digest) if next_offset < len(results) else None,
+        'info': session['info'],
+    }
@@ -0,0 +1,201 @@
+"""
+Segment Store
+Word-level transcript segments ({start_time, end_time, word, confidence,
+source}) in a compact columnar form, instead of one BSON subdocument per word.
+The transcript document holds them as `segmentsPacked`:
+
+    {'v': 1, 'count': n, 'codec': 'zstd' | 'zlib' | 'none', 'idBytes': 2 | 4,
+     'sources': [...], 'duration': last end time, 'blob': Binary}
+
+The (compressed) blob is the columns back to back, ordered by start time:
+start, end and confidence as float32 (NaN = no confidence), word ids into
+the vocabulary (uint16, or uint32 for large vocabularies), source ids
+(uint8), then the vocabulary as NUL-separated UTF-8. zstd is used when the
+zstandard package is installed, zlib otherwise (SEGMENT_COMPRESSION).
+
+PackedSegments decodes lazily: counting words needs only the header, and a
+time range (between) is located by binary search on the start column.
+Transcripts saved before this format keep their `segments` list; load()
+reads either.
+"""
+
+import zlib
+from typing import Dict, List, Optional
+
+import numpy as np
+from bson import Binary
+
+from config import SEGMENT_COMPRESSION
+from lazy_import import module_installed
+
+FORMAT_VERSION = 1
+ZSTD_AVAILABLE = module_installed('zstandard')
+_TIME_DIGITS = 3
+_CONFIDENCE_DIGITS = 4
+
+
+def _codec() -> str:
+    if SEGMENT_COMPRESSION == 'zstd' and not ZSTD_AVAILABLE:
+        return 'zlib'
+    return SEGMENT_COMPRESSION if SEGMENT_COMPRESSION in ('zstd', 'zlib', 'none') else 'zlib'
+
+
+def _compress(raw: bytes, codec: str) -> bytes:
+    if codec == 'zstd':
+        import zstandard
+        return zstandard.ZstdCompressor(level=3).compress(raw)
+    if codec == 'zlib':
+        return zlib.compress(raw, 6)
+    return raw
+
+
+def _decompress(blob: bytes, codec: str) -> bytes:
+    if codec == 'zstd':
+        import zstandard
+        return zstandard.ZstdDecompressor().decompress(blob)
+    if codec == 'zlib':
+        return zlib.decompress(blob)
+    return blob
+
+
+def _float(value, default=np.nan) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def pack(segments: Optional[List[Dict]], codec: Optional[str] = None) -> Optional[Dict]:
+    """The segmentsPacked document for a list of word segments (None if there are none)"""
+    words = [seg for seg in (segments or []) if isinstance(seg, dict) and seg.get('word') is not None]
+    if not words:
+        return None
+    codec = codec or _codec()
+    words.sort(key=lambda seg: _float(seg.get('start_time'), 0.0))
+    vocab: Dict[str, int] = {}
+    sources: Dict[str, int] = {}
+    word_ids = [vocab.setdefault(str(seg['word']), len(vocab)) for seg in words]
+    source_ids = [sources.setdefault(str(seg.get('source') or ''), len(sources)) for seg in words]
+    id_bytes = 2 if len(vocab) <= 0xFFFF else 4
+    starts = np.array([_float(seg.get('start_time'), 0.0) for seg in words], dtype='<f4')
+    ends = np.array([_float(seg.get('end_time'), 0.0) for seg in words], dtype='<f4')
+    raw = b''.join((
+        starts.tobytes(),
+        ends.tobytes(),
+        np.array([_float(seg.get('confidence')) for seg in words], dtype='<f4').tobytes(),
+        np.array(word_ids, dtype='<u2' if id_bytes == 2 else '<u4').tobytes(),
+        np.array(source_ids, dtype='u1').tobytes(),
+        '\x00'.join(vocab).encode('utf-8'),
+    ))
+    return {
+        'v': FORMAT_VERSION,
+        'count': len(words),
+        'codec': codec,
+        'idBytes': id_bytes,
+        'sources': list(sources),
+        'duration': round(float(ends.max()), _TIME_DIGITS),
+        'blob': Binary(_compress(raw, codec)),
+    }
+
+
+class PackedSegments:
+    """Read access to a segmentsPacked document; columns are decoded on first use"""
+
+    def __init__(self, packed: Optional[Dict]):
+        self.header = packed or {}
+        self.count = int(self.header.get('count', 0))
+        self._columns = None
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def duration(self) -> float:
+        return float(self.header.get('duration', 0.0))
+
+    def _decode(self):
+        if self._columns is None:
+            n = self.count
+            raw = _decompress(bytes(self.header['blob']), self.header.get('codec', 'none'))
+            id_dtype = '<u2' if self.header.get('idBytes', 2) == 2 else '<u4'
+            id_size = np.dtype(id_dtype).itemsize
+            offset = 0
+            columns = {}
+            for name, dtype, size in (('start', '<f4', 4), ('end', '<f4', 4), ('confidence', '<f4', 4),
+                                      ('word', id_dtype, id_size), ('source', 'u1', 1)):
+                columns[name] = np.frombuffer(raw, dtype=dtype, count=n, offset=offset)
+                offset += n * size
+            columns['vocab'] = raw[offset:].decode('utf-8').split('\x00')
+            self._columns = columns
+        return self._columns
+
+    def _range(self, start: Optional[float], end: Optional[float]) -> range:
+        """Indexes of the words overlapping [start, end)"""
+        if not self.count:
+            return range(0)
+        columns = self._decode()
+        lo, hi = 0, self.count
+        if end is not None:
+            hi = int(np.searchsorted(columns['start'], end, side='left'))
+        if start is not None:
+            lo = int(np.searchsorted(columns['start'], start, side='left'))
+            while lo > 0 and columns['end'][lo - 1] > start:
+                lo -= 1  # starts before the range, still being spoken at its start
+        return range(lo, max(lo, hi))
+
+    def between(self, start: Optional[float] = None, end: Optional[float] = None) -> List[Dict]:
+        """Word segments overlapping [start, end) seconds (None = unbounded), as dicts"""
+        indexes = self._range(start, end)
+        if not indexes:
+            return []
+        columns = self._decode()
+        sources = self.header.get('sources') or ['']
+        segments = []
+        for i in indexes:
+            segment = {
+                'start_time': round(float(columns['start'][i]), _TIME_DIGITS),
+                'end_time': round(float(columns['end'][i]), _TIME_DIGITS),
+                'word': columns['vocab'][columns['word'][i]],
+            }
+            confidence = float(columns['confidence'][i])
+            if not np.isnan(confidence):
+                segment['confidence'] = round(confidence, _CONFIDENCE_DIGITS)
+            source = sources[columns['source'][i]]
+            if source:
+                segment['source'] = source
+            segments.append(segment)
+        return segments
+
+    def to_list(self) -> List[Dict]:
+        return self.between()
+
+    def columns(self, start: Optional[float] = None, end: Optional[float] = None) -> Dict:
+        """Words overlapping [start, end) as parallel JSON arrays with their own vocabulary"""
+        indexes = self._range(start, end)
+        if not indexes:
+            return {'count': 0, 'start': [], 'end': [], 'confidence': [], 'wordIds': [], 'vocab': []}
+        columns = self._decode()
+        window = slice(indexes.start, indexes.stop)
+        used, word_ids = np.unique(columns['word'][window], return_inverse=True)
+        confidence = np.round(columns['confidence'][window].astype(float), _CONFIDENCE_DIGITS)
+        return {
+            'count': len(indexes),
+            'start': np.round(columns['start'][window].astype(float), _TIME_DIGITS).tolist(),
+            'end': np.round(columns['end'][window].astype(float), _TIME_DIGITS).tolist(),
+            'confidence': [None if np.isnan(c) else c for c in confidence.tolist()],
+            'wordIds': word_ids.tolist(),
+            'vocab': [columns['vocab'][i] for i in used],
+        }
+
+
+def load(transcript: Optional[Dict]) -> PackedSegments:
+    """The segments of a transcript document, packed or in the legacy list form"""
+    transcript = transcript or {}
+    if transcript.get('segmentsPacked'):
+        return PackedSegments(transcript['segmentsPacked'])
+    return PackedSegments(pack(transcript.get('segments'), codec='none'))
+
+
+def segments_of(transcript: Optional[Dict]) -> List[Dict]:
+    """All word segments of a transcript document, as dicts"""
+    return load(transcript).to_list()
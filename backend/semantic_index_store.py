@@ -0,0 +1,149 @@
+"""
+On-Disk Semantic Index Snapshots
+A snapshot is a directory holding the vectors (vectors.npy + ids.npy, plus
+index.faiss when an approximate index tier is in use) and a compact
+metadata.json sidecar: format version, embedding model, index tier, and per
+video its passage vector ids and time spans, content hash and search-result
+metadata.
+
+Snapshots are written to a fresh directory and published by atomically
+replacing the CURRENT pointer, so any number of processes can load the
+latest one while another writes. Vectors are memory-mapped read-only;
+processes share those pages until they modify their own copy. So is an
+HNSW index; IVF indexes are read into memory, because FAISS maps their
+inverted lists as OnDiskInvertedLists, which can never be made writable.
+"""
+
+import os
+import json
+import shutil
+import hashlib
+import logging
+import uuid
+from datetime import datetime
+from typing import Dict, Optional
+
+import numpy as np
+
+from vector_index import l2_normalize
+
+logger = logging.getLogger(__name__)
+
+INDEX_FORMAT_VERSION = 3  # 2: one vector per transcript passage, 3: normalized + quantized
+KEEP_SNAPSHOTS = 2
+MMAP_TIERS = ('hnsw',)  # IVF inverted lists would come back as read-only OnDiskInvertedLists
+
+
+def content_hash(model_name: str, text: str) -> str:
+    """Identifies what a vector was computed from; a mismatch means re-encode."""
+    return hashlib.sha1(f"{model_name}\n{text}".encode('utf-8')).hexdigest()[:16]
+
+
+def _current_dir(index_dir: str) -> Optional[str]:
+    try:
+        with open(os.path.join(index_dir, 'CURRENT')) as f:
+            name = f.read().strip()
+    except OSError:
+        return None
+    path = os.path.join(index_dir, name)
+    return path if name and os.path.isdir(path) else None
+
+
+def save_snapshot(index_dir: str, vectors: np.ndarray, ids: np.ndarray, videos: Dict[str, Dict],
+                  model_name: str, next_id: int, faiss_index=None, ann: Optional[Dict] = None) -> str:
+    """Write a new snapshot and make it CURRENT.
+
+    `videos`: videoId -> {ids, spans, hash, meta}; `ann`: tier info for `faiss_index`.
+    """
+    os.makedirs(index_dir, exist_ok=True)
+    name = f"snapshot-{datetime.utcnow().strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:6]}"
+    path = os.path.join(index_dir, name)
+    os.makedirs(path)
+
+    np.save(os.path.join(path, 'vectors.npy'), np.ascontiguousarray(vectors))
+    np.save(os.path.join(path, 'ids.npy'), np.asarray(ids, dtype='int64'))
+    if faiss_index is not None:
+        import faiss
+        faiss.write_index(faiss_index, os.path.join(path, 'index.faiss'))
+    sidecar = {
+        'version': INDEX_FORMAT_VERSION,
+        'model': model_name,
+        'dim': int(vectors.shape[1]) if vectors.ndim == 2 else 0,
+        'count': int(len(ids)),
+        'dtype': str(vectors.dtype),
+        'normalized': True,
+        'ann': ann if faiss_index is not None else {'tier': 'flat'},
+        'nextId': int(next_id),
+        'createdAt': datetime.utcnow().isoformat(),
+        'videos': videos,
+    }
+    with open(os.path.join(path, 'metadata.json'), 'w', encoding='utf-8') as f:
+        json.dump(sidecar, f, separators=(',', ':'), default=str)
+
+    pointer = os.path.join(index_dir, f'CURRENT.{uuid.uuid4().hex[:6]}')
+    with open(pointer, 'w') as f:
+        f.write(name)
+    os.replace(pointer, os.path.join(index_dir, 'CURRENT'))
+    _prune(index_dir, keep=name)
+    logger.info(f"💾 Saved semantic index snapshot {name} ({len(ids)} vectors)")
+    return path
+
+
+def _prune(index_dir: str, keep: str):
+    """Remove old snapshots (the newest few stay for readers still mapping them)."""
+    snapshots = sorted(n for n in os.listdir(index_dir)
+                       if n.startswith('snapshot-') and os.path.isdir(os.path.join(index_dir, n)))
+    for name in snapshots[:-KEEP_SNAPSHOTS]:
+        if name != keep:
+            shutil.rmtree(os.path.join(index_dir, name), ignore_errors=True)
+
+
+def load_snapshot(index_dir: str, model_name: str, use_faiss: bool) -> Optional[Dict]:
+    """Map the CURRENT snapshot read-only; None if missing, unusable, or from another format/model.
+
+    Returns {'vectors', 'ids', 'videos', 'nextId', 'ann', 'faiss_index', 'faiss_mmapped', 'migrated'}.
+    Version 2 snapshots are migrated in memory: their float32 vectors are
+    L2-normalized (exactly what re-encoding would give) and their ANN index
+    dropped; the caller re-saves them in the current format.
+    """
+    path = _current_dir(index_dir)
+    if path is None:
+        return None
+    try:
+        with open(os.path.join(path, 'metadata.json'), encoding='utf-8') as f:
+            sidecar = json.load(f)
+        version = sidecar.get('version')
+        if version not in (2, INDEX_FORMAT_VERSION) or sidecar.get('model') != model_name:
+            logger.info(f"Ignoring semantic index snapshot {path}: format/model changed")
+            return None
+        vectors = np.load(os.path.join(path, 'vectors.npy'), mmap_mode='r')
+        ids = np.load(os.path.join(path, 'ids.npy'), mmap_mode='r')
+        faiss_index, faiss_mmapped = None, False
+        faiss_path = os.path.join(path, 'index.faiss')
+        if version == 2:
+            logger.info(f"Migrating semantic index snapshot {path} to format {INDEX_FORMAT_VERSION}")
+            vectors = l2_normalize(vectors) if len(ids) else vectors
+            sidecar['ann'] = {'tier': 'flat'}
+        elif use_faiss and os.path.exists(faiss_path):
+            import faiss
+            flags = getattr(faiss, 'IO_FLAG_MMAP', 0) | getattr(faiss, 'IO_FLAG_READ_ONLY', 0)
+            if flags and (sidecar.get('ann') or {}).get('tier') not in MMAP_TIERS:
+                flags = 0
+            try:
+                faiss_index = faiss.read_index(faiss_path, flags)
+                faiss_mmapped = bool(flags)
+            except RuntimeError:
+                faiss_index = faiss.read_index(faiss_path)
+    except Exception as e:
+        logger.warning(f"Could not load semantic index snapshot {path}: {e}")
+        return None
+    return {
+        'vectors': vectors,
+        'ids': ids,
+        'videos': sidecar.get('videos', {}),
+        'nextId': sidecar.get('nextId', 0),
+        'ann': sidecar.get('ann') or {'tier': 'flat'},
+        'faiss_index': faiss_index,
+        'faiss_mmapped': faiss_mmapped,
+        'migrated': version != INDEX_FORMAT_VERSION,
+    }
@@ -8,50 +8,100 @@ import logging
 import numpy as np
 from typing import List, Dict, Tuple, Optional
 import json
-from datetime import datetime
+import time
+import threading
+from datetime import datetime, timedelta
 
-# Try to import AI libraries
-try:
-    from sentence_transformers import SentenceTransformer
-    import torch
-    SEMANTIC_SEARCH_AVAILABLE = True
+from model_registry import model_registry, SENTENCE_MODEL_NAME
+from lazy_import import module_installed
+from config import (
+    SEMANTIC_INDEX_SYNC_SECONDS, SEMANTIC_INDEX_SYNC_LOOKBACK_SECONDS, SEMANTIC_INDEX_DIR, SEMANTIC_INDEX_SAVE_SECONDS,
+    EMBEDDING_BATCH_SIZE, SEMANTIC_PASSAGE_WORDS, SEMANTIC_PASSAGE_OVERLAP_WORDS, SEMANTIC_POOLING,
+    SEMANTIC_PASSAGE_OVERSAMPLE, QUERY_EMBEDDING_CACHE_SIZE, QUERY_EMBEDDING_CACHE_TTL_SECONDS,
+    SEARCH_RESULT_CACHE_SIZE, SEARCH_RESULT_CACHE_TTL_SECONDS
+)
+from semantic_index_store import content_hash, load_snapshot, save_snapshot
+from db_mongo import resolve_users
+import search_docs
+import segment_store
+from search_cache import LRUCache, normalize_query
+from search_filters import SearchFilters
+from vector_index import (
+    TIERS, VectorStore, ann_search, choose_tier, l2_normalize, supports_remove, train_ann_index, tune_ann_index
+)
+
+TRANSCRIPT_SNIPPET_CHARS = 300
+MAX_MOMENTS = 3  # matching timestamps returned per video
+PREFILTER_FRACTION = 0.1  # filters passing fewer videos than this share search only their passages
+TOMBSTONE_REBUILD_FRACTION = 0.2  # retrain an HNSW index once this share of it is deleted
+TRANSCRIPT_PROJECTION = {'text': 1, 'segmentsPacked': 1, 'segments.word': 1, 'segments.start_time': 1, 'segments.end_time': 1}
+
+Passage = Tuple[str, Optional[float], Optional[float]]  # (text, start seconds, end seconds)
+
+# Check AI libraries without importing them (the model registry and index build import them on first use)
+SEMANTIC_SEARCH_AVAILABLE = module_installed('sentence_transformers') and module_installed('torch')
+if SEMANTIC_SEARCH_AVAILABLE:
     print("✅ Semantic Search (Sentence Transformers) enabled")
-except ImportError as e:
-    SEMANTIC_SEARCH_AVAILABLE = False
-    print(f"⚠️ Semantic Search not available: {e}")
+else:
+    print("⚠️ Semantic Search not available: sentence_transformers/torch not installed")
     print("💡 Install with: pip install sentence-transformers torch")
 
-try:
-    import faiss
-    FAISS_AVAILABLE = True
+FAISS_AVAILABLE = module_installed('faiss')
+if FAISS_AVAILABLE:
     print("✅ FAISS vector search enabled")
-except ImportError as e:
-    FAISS_AVAILABLE = False
-    print(f"⚠️ FAISS not available: {e}")
+else:
+    print("⚠️ FAISS not available: faiss not installed")
     print("💡 Install with: pip install faiss-cpu")
 
+def split_passages(title: str, tags: List[str], transcript_text: str, segments: List[Dict],
+                   max_words: int = SEMANTIC_PASSAGE_WORDS, overlap: int = SEMANTIC_PASSAGE_OVERLAP_WORDS) -> List[Passage]:
+    """Split a transcript into overlapping, time-aligned passages.
+    
+    MiniLM truncates at 256 tokens, so each passage stays well under that.
+    Word segments ({word, start_time, end_time}) give each passage its time
+    span; without them the plain text is split and spans are None. Title and
+    tags prefix every passage so they still match on their own.
+    """
+    header = f"{title} {' '.join(tags)}".strip()
+    words = [(seg['word'], seg.get('start_time'), seg.get('end_time'))
+             for seg in segments if isinstance(seg, dict) and seg.get('word')]
+    if not words:
+        words = [(word, None, None) for word in transcript_text.split()]
+    if not words:
+        return [(header, None, None)] if header else []
+    
+    step = max(max_words - overlap, 1)
+    passages = []
+    for start in range(0, len(words), step):
+        window = words[start:start + max_words]
+        text = f"{header} {' '.join(word for word, _, _ in window)}".strip()
+        passages.append((text, window[0][1], window[-1][2]))
+        if start + max_words >= len(words):
+            break
+    return passages
+
 class SemanticSearcher:
     def __init__(self):
-        self.model = None
-        self.index = None
-        self.video_metadata = {}
         self.embeddings_cache = {}
-        self.is_initialized = False
-        
-        if SEMANTIC_SEARCH_AVAILABLE:
-            self._initialize_model()
+        self._reset_index()
+        self._lock = threading.RLock()
+        self._sync_lock = threading.Lock()  # one sync at a time; others skip it
+        self._built = False
+        self._sync_cursor = datetime.utcnow()
+        self._applied_changes = {}  # videoId -> change version already applied
+        self._last_sync = 0.0
+        self._last_save = 0.0
+        # The MiniLM model is loaded on first use from the shared model registry
     
-    def _initialize_model(self):
-        """Initialize the sentence transformer model"""
-        try:
-            # Use a lightweight but powerful model
-            model_name = "all-MiniLM-L6-v2"  # Fast and accurate
-            self.model = SentenceTransformer(model_name)
-            self.is_initialized = True
-            logging.info(f"✅ Semantic search model loaded: {model_name}")
-        except Exception as e:
-            logging.error(f"Failed to load semantic search model: {e}")
-            self.is_initialized = False
+    @property
+    def model(self):
+        if not SEMANTIC_SEARCH_AVAILABLE:
+            return None
+        return model_registry.get('minilm')
+    
+    @property
+    def is_initialized(self) -> bool:
+        return self.model is not None
     
     def generate_embedding(self, text: str) -> Optional[np.ndarray]:
         """Generate embedding for a text string"""
@@ -64,165 +114,469 @@ class SemanticSearcher:
             if len(text) < 3:
                 return None
             
-            # Generate embedding
+            # Generate embedding (unit length, so inner product is cosine similarity)
             embedding = self.model.encode(text, convert_to_tensor=False)
-            return embedding
+            return l2_normalize(embedding)
         except Exception as e:
             logging.error(f"Failed to generate embedding: {e}")
             return None
     
+    def generate_embeddings(self, texts: List[str], batch_size: int = EMBEDDING_BATCH_SIZE) -> List[Optional[np.ndarray]]:
+        """Embed many texts in batches; results line up with `texts` (None where too short)"""
+        results: List[Optional[np.ndarray]] = [None] * len(texts)
+        if not self.is_initialized:
+            return results
+        
+        cleaned = [(text or '').strip() for text in texts]
+        # Longest first, so each batch holds texts of similar length and pads little
+        order = sorted((i for i, text in enumerate(cleaned) if len(text) >= 3),
+                       key=lambda i: len(cleaned[i]), reverse=True)
+        for start in range(0, len(order), batch_size):
+            batch = order[start:start + batch_size]
+            try:
+                embeddings = l2_normalize(self.model.encode([cleaned[i] for i in batch], batch_size=batch_size,
+                                                            convert_to_numpy=True, show_progress_bar=False))
+            except Exception as e:
+                logging.error(f"Failed to generate embeddings for batch of {len(batch)}: {e}")
+                continue
+            for i, embedding in zip(batch, embeddings):
+                results[i] = embedding
+        return results
+    
+    def has_index(self) -> bool:
+        with self._lock:
+            return self.index is not None or len(self.store) > 0
+    
+    def ensure_index(self, db) -> bool:
+        """Build the index on first use (fast-start skips the startup build)"""
+        if self._built:
+            return True
+        with self._lock:
+            return self._built or self.build_video_index(db)
+    
+    def _video_entry(self, video: Dict, transcript_text: str, segments: List[Dict], tags: List[str]) -> Tuple[List[Passage], Dict]:
+        """Passages to embed plus the metadata returned with search hits"""
+        # Get title
+        title = video.get('originalName', '')
+        
+        passages = split_passages(title, tags, transcript_text, segments)
+        metadata = {
+            'videoId': video.get('videoId'),
+            'title': title,
+            'transcript': transcript_text[:TRANSCRIPT_SNIPPET_CHARS],  # results only show a snippet
+            'tags': tags,
+            'ownerId': video.get('ownerId', ''),
+            'duration': video.get('duration', 0),
+            'uploadedAt': video.get('uploadedAt', ''),
+            'thumbnail': (video.get('thumbnails') or {}).get('default', '')
+        }
+        return passages, metadata
+    
+    def _load_video(self, db, video_id: str) -> Optional[Tuple[List[Passage], Dict]]:
+        video = db.videos.find_one({'videoId': video_id})
+        if not video:
+            return None
+        transcript = db.transcripts.find_one({'videoId': video_id}, TRANSCRIPT_PROJECTION) or {}
+        tags_doc = db.tags.find_one({'videoId': video_id}, {'keywords': 1})
+        return self._video_entry(video, transcript.get('text', ''), segment_store.segments_of(transcript),
+                                 (tags_doc or {}).get('keywords', []))
+    
+    def _load_corpus(self, db) -> Dict[str, Tuple[List[Passage], Dict]]:
+        """videoId -> (passages, metadata) for every video, in three queries"""
+        videos = [v for v in db.videos.find({}) if v.get('videoId')]
+        video_ids = [v['videoId'] for v in videos]
+        transcripts = {t['videoId']: t for t in
+                       db.transcripts.find({'videoId': {'$in': video_ids}}, {'videoId': 1, **TRANSCRIPT_PROJECTION})}
+        tags = {t['videoId']: t.get('keywords', []) for t in
+                db.tags.find({'videoId': {'$in': video_ids}}, {'videoId': 1, 'keywords': 1})}
+        corpus = {}
+        for v in videos:
+            transcript = transcripts.get(v['videoId'], {})
+            corpus[v['videoId']] = self._video_entry(v, transcript.get('text', ''), segment_store.segments_of(transcript),
+                                                     tags.get(v['videoId'], []))
+        return corpus
+    
+    @staticmethod
+    def _passages_hash(passages: List[Passage]) -> str:
+        return content_hash(SENTENCE_MODEL_NAME, '\n'.join(f"{start}|{end}|{text}" for text, start, end in passages))
+    
+    def _reset_index(self):
+        self.version = getattr(self, 'version', 0) + 1  # part of every result-cache key
+        self.store = VectorStore()
+        self.index = None  # FAISS ANN index over the store (None = exact flat search)
+        self._tier = 'flat'
+        self._trained_size = 0
+        self._tombstones = 0  # removed vectors still inside an index without removal support
+        self.passages = {}  # vector id -> (videoId, start, end)
+        self.ids_by_video = {}
+        self.video_metadata = {}  # videoId -> result metadata
+        self.hash_by_video = {}
+        self._next_id = 0
+        self._mmapped = False
+        self._dirty = False
+    
+    def _mark_changed(self):
+        self._dirty = True
+        self.version += 1
+    
+    def _make_writable(self):
+        """Copy a memory-mapped FAISS snapshot into private memory before changing it"""
+        if self._mmapped and self.index is not None:
+            import faiss
+            self.index = faiss.clone_index(self.index)
+            tune_ann_index(self.index)
+        self._mmapped = False
+    
+    def _maybe_retrain(self) -> bool:
+        """Switch tier or retrain the ANN index when the corpus outgrew it or is full of tombstones"""
+        count = len(self.store)
+        tier = choose_tier(count, FAISS_AVAILABLE, SEMANTIC_INDEX_DIR)
+        worn = self.index is not None and (self._tombstones > TOMBSTONE_REBUILD_FRACTION * self._trained_size
+                                           or count > 2 * self._trained_size)
+        if tier == self._tier and not worn:
+            return False
+        if tier == 'flat':
+            self.index = None
+        else:
+            started = time.time()
+            vectors, ids = self.store.float_arrays()
+            self.index = train_ann_index(tier, vectors, ids)
+            logging.info(f"🔄 Trained {tier} semantic index over {count} passages in {time.time() - started:.1f}s")
+        self._tier, self._trained_size, self._tombstones = tier, count, 0
+        self._mmapped = False
+        self._mark_changed()
+        return True
+    
+    def _add_vectors(self, ids: List[int], embeddings: np.ndarray):
+        """Append vectors under their int64 ids (to the store and any ANN index)"""
+        embeddings = np.asarray(embeddings, dtype='float32').reshape(len(ids), -1)
+        ids = np.asarray(ids, dtype='int64')
+        self._mark_changed()
+        self.store.add(ids, embeddings)
+        if self.index is not None:
+            self._make_writable()
+            self.index.add_with_ids(embeddings, ids)
+    
+    def _remove_vectors(self, vector_ids: List[int]):
+        if not vector_ids:
+            return
+        self._mark_changed()
+        vector_ids = np.asarray(vector_ids, dtype='int64')
+        self.store.remove(vector_ids)
+        if self.index is not None:
+            if supports_remove(self._tier):
+                self._make_writable()
+                self.index.remove_ids(vector_ids)
+            else:
+                # Hits on these ids are dropped at search time (no passage); retrained later
+                self._tombstones += len(vector_ids)
+        for vector_id in vector_ids.tolist():
+            self.passages.pop(vector_id, None)
+    
+    def _index_passages(self, video_id: str, passages: List[Passage], embeddings: List[Optional[np.ndarray]],
+                        digest: str) -> Tuple[List[int], List[np.ndarray]]:
+        """Give a video's new passages fresh ids (its old vectors must already be removed).
+        
+        Ids are never reused, so a stale vector left in an HNSW graph can never
+        resolve to a new passage. Returns the (ids, vectors) still to be added.
+        """
+        self.ids_by_video.pop(video_id, None)
+        ids, vectors = [], []
+        for (_, start, end), embedding in zip(passages, embeddings):
+            if embedding is None:
+                continue
+            vector_id = self._next_id
+            self._next_id += 1
+            self.passages[vector_id] = (video_id, start, end)
+            ids.append(vector_id)
+            vectors.append(embedding)
+        if ids:
+            self.ids_by_video[video_id] = ids
+            self.hash_by_video[video_id] = digest
+        else:
+            self.hash_by_video.pop(video_id, None)
+            self.video_metadata.pop(video_id, None)
+        return ids, vectors
+    
+    def _restore(self, snapshot: Dict):
+        """Adopt a loaded snapshot (vectors stay memory-mapped until changed)"""
+        self._reset_index()
+        # Older formats and a changed SEMANTIC_VECTOR_DTYPE are converted here and re-saved
+        converted = snapshot['migrated'] or snapshot['vectors'].dtype != np.dtype(self.store.dtype)
+        self.store = VectorStore(snapshot['vectors'], snapshot['ids'])
+        ann = snapshot['ann']
+        if snapshot['faiss_index'] is not None and ann.get('tier') in TIERS and not converted:
+            self.index = snapshot['faiss_index']
+            tune_ann_index(self.index)
+            self._mmapped = snapshot['faiss_mmapped']
+            self._tier = ann['tier']
+            self._trained_size = ann.get('trainedSize', self.index.ntotal)
+            self._tombstones = ann.get('tombstones', 0)
+        for video_id, entry in snapshot['videos'].items():
+            self.ids_by_video[video_id] = list(entry['ids'])
+            self.hash_by_video[video_id] = entry['hash']
+            self.video_metadata[video_id] = entry['meta']
+            for vector_id, (start, end) in zip(entry['ids'], entry['spans']):
+                self.passages[vector_id] = (video_id, start, end)
+        self._next_id = snapshot['nextId']
+        self._dirty = converted
+    
+    def save_index(self) -> bool:
+        """Write the current index as a new on-disk snapshot"""
+        with self._lock:
+            try:
+                videos = {
+                    video_id: {
+                        'ids': ids,
+                        'spans': [list(self.passages[i][1:]) for i in ids],
+                        'hash': self.hash_by_video.get(video_id, ''),
+                        'meta': self.video_metadata.get(video_id, {}),
+                    }
+                    for video_id, ids in self.ids_by_video.items()
+                }
+                vectors, ids = self.store.arrays()
+                ann = {'tier': self._tier, 'trainedSize': self._trained_size, 'tombstones': self._tombstones}
+                save_snapshot(SEMANTIC_INDEX_DIR, vectors, ids, videos, SENTENCE_MODEL_NAME, self._next_id,
+                              faiss_index=self.index, ann=ann)
+            except Exception as e:
+                logging.warning(f"Could not save semantic index: {e}")
+                return False
+            self._dirty = False
+            self._last_save = time.time()
+            return True
+    
     def build_video_index(self, db):
-        """Build vector index for all videos in database"""
+        """Load the saved index and re-encode only new or changed videos (searches wait for it)"""
+        with self._lock:
+            return self._build_video_index(db)
+    
+    def _build_video_index(self, db):
         if not self.is_initialized:
             logging.warning("Semantic search not initialized")
             return False
         
         try:
+            # Changes logged while we read are re-applied by the next sync
+            sync_from = datetime.utcnow()
+            
             # Get all videos with their content
-            videos = list(db.videos.find({}))
-            if not videos:
-                logging.warning("No videos found for indexing")
-                return False
+            corpus = self._load_corpus(db)
+            snapshot = load_snapshot(SEMANTIC_INDEX_DIR, SENTENCE_MODEL_NAME, FAISS_AVAILABLE)
+            if snapshot is not None:
+                self._restore(snapshot)
+            else:
+                self._reset_index()
+            self._sync_cursor = sync_from
+            self._applied_changes = {}
+            
+            # Compare content hashes: deleted/emptied videos go, new/edited ones are re-encoded
+            removed = [vid for vid in self.ids_by_video if not corpus.get(vid, ([], None))[0]]
+            stale = {vid: (passages, self._passages_hash(passages)) for vid, (passages, _) in corpus.items()
+                     if passages and self.hash_by_video.get(vid) != self._passages_hash(passages)}
+            self._remove_vectors([i for vid in [*removed, *stale] for i in self.ids_by_video.get(vid, [])])
+            for vid in removed:
+                self.ids_by_video.pop(vid, None)
+                self.hash_by_video.pop(vid, None)
+                self.video_metadata.pop(vid, None)
             
+            # One batched encode for every stale passage
+            embeddings = self.generate_embeddings([text for passages, _ in stale.values() for text, _, _ in passages])
+            ids = []
             all_embeddings = []
-            video_metadata = {}
+            offset = 0
+            for video_id, (passages, digest) in stale.items():
+                video_ids, vectors = self._index_passages(video_id, passages, embeddings[offset:offset + len(passages)], digest)
+                offset += len(passages)
+                ids.extend(video_ids)
+                all_embeddings.extend(vectors)
+            if ids:
+                self._add_vectors(ids, np.array(all_embeddings))
+            self._maybe_retrain()
             
-            for video in videos:
-                video_id = video.get('videoId')
-                if not video_id:
-                    continue
-                
-                # Get transcript
-                transcript = db.transcripts.find_one({'videoId': video_id})
-                transcript_text = transcript.get('text', '') if transcript else ''
-                
-                # Get tags
-                tags_doc = db.tags.find_one({'videoId': video_id})
-                tags = tags_doc.get('keywords', []) if tags_doc else []
-                
-                # Get title
-                title = video.get('originalName', '')
-                
-                # Combine all text for embedding
-                combined_text = f"{title} {' '.join(tags)} {transcript_text}".strip()
-                
-                if combined_text:
-                    embedding = self.generate_embedding(combined_text)
-                    if embedding is not None:
-                        all_embeddings.append(embedding)
-                        video_metadata[len(all_embeddings) - 1] = {
-                            'videoId': video_id,
-                            'title': title,
-                            'transcript': transcript_text,
-                            'tags': tags,
-                            'ownerId': video.get('ownerId', ''),
-                            'duration': video.get('duration', 0),
-                            'uploadedAt': video.get('uploadedAt', ''),
-                            'thumbnail': (video.get('thumbnails') or {}).get('default', '')
-                        }
+            # Titles/thumbnails outside the hashed text may still have changed
+            for video_id, (_, metadata) in corpus.items():
+                if video_id in self.ids_by_video and self.video_metadata.get(video_id) != metadata:
+                    self.video_metadata[video_id] = metadata
+                    self._mark_changed()
             
-            if not all_embeddings:
+            if self._dirty or snapshot is None:
+                self.save_index()
+            self._built = True
+            logging.info(f"✅ Semantic index ready: {len(self.ids_by_video)} videos, {len(self.passages)} passages "
+                         f"({len(stale)} videos encoded, {len(removed)} removed)")
+            if not self.ids_by_video:
                 logging.warning("No valid embeddings generated")
                 return False
-            
-            # Build FAISS index
-            if FAISS_AVAILABLE:
-                embeddings_array = np.array(all_embeddings).astype('float32')
-                dimension = embeddings_array.shape[1]
-                
-                # Create FAISS index
-                self.index = faiss.IndexFlatIP(dimension)  # Inner product for cosine similarity
-                self.index.add(embeddings_array)
-                
-                self.video_metadata = video_metadata
-                logging.info(f"✅ Built semantic index with {len(all_embeddings)} videos")
-                return True
-            else:
-                # Fallback to numpy-based similarity
-                self.embeddings_array = np.array(all_embeddings)
-                self.video_metadata = video_metadata
-                logging.info(f"✅ Built numpy-based semantic index with {len(all_embeddings)} videos")
-                return True
+            return True
                 
         except Exception as e:
             logging.error(f"Failed to build video index: {e}")
+            self._reset_index()  # half-applied; the next ensure_index() builds again
+            self._built = False
             return False
     
-    def search(self, query: str, top_k: int = 20) -> List[Dict]:
-        """Perform semantic search"""
+    def upsert_video(self, db, video_id: str) -> bool:
+        """Re-embed one video's passages, or only refresh its metadata if the text is unchanged"""
+        entry = self._load_video(db, video_id)
+        if entry is None:
+            return self.remove_video(video_id)
+        passages, metadata = entry
+        digest = self._passages_hash(passages)
+        if video_id in self.ids_by_video and digest == self.hash_by_video.get(video_id):
+            with self._lock:
+                if self.video_metadata.get(video_id) != metadata:
+                    self.video_metadata[video_id] = metadata  # same text, nothing to re-encode
+                    self._mark_changed()
+            return True
+        embeddings = self.generate_embeddings([text for text, _, _ in passages])
+        with self._lock:
+            self._remove_vectors(self.ids_by_video.get(video_id, []))
+            ids, vectors = self._index_passages(video_id, passages, embeddings, digest)
+            if not ids:
+                return False
+            self._add_vectors(ids, np.array(vectors))
+            self.video_metadata[video_id] = metadata
+        return True
+    
+    def remove_video(self, video_id: str) -> bool:
+        with self._lock:
+            vector_ids = self.ids_by_video.pop(video_id, None)
+            self.hash_by_video.pop(video_id, None)
+            self.video_metadata.pop(video_id, None)
+            if vector_ids is None:
+                return False
+            self._remove_vectors(vector_ids)
+        return True
+    
+    def sync_changes(self, db, force: bool = False) -> int:
+        """Apply index_changes logged by save_transcript/save_tags/deletes since the last sync.
+        
+        Throttled to one Mongo query per SEMANTIC_INDEX_SYNC_SECONDS; only changed
+        videos are re-embedded.
+        """
+        now = time.time()
+        if not self._built or (not force and now - self._last_sync < SEMANTIC_INDEX_SYNC_SECONDS):
+            return 0
+        if not self._sync_lock.acquire(blocking=force):
+            return 0  # another request is applying the same changes
+        try:
+            return self._apply_changes(db, now)
+        finally:
+            self._sync_lock.release()
+    
+    def _apply_changes(self, db, now: float) -> int:
+        self._last_sync = now
+        # Look back a little for writers whose clocks (or commits) lag ours
+        since = self._sync_cursor - timedelta(seconds=SEMANTIC_INDEX_SYNC_LOOKBACK_SECONDS)
+        applied = 0
+        for change in db.index_changes.find({'changedAt': {'$gt': since}}).sort('changedAt', 1):
+            video_id, changed_at = change['videoId'], change['changedAt']
+            version = change.get('version', changed_at)
+            if self._applied_changes.get(video_id) == version:
+                continue
+            try:
+                if change.get('op') == 'delete':
+                    self.remove_video(video_id)
+                else:
+                    self.upsert_video(db, video_id)
+                applied += 1
+            except Exception as e:
+                logging.warning(f"Semantic index update failed for {video_id}: {e}")
+            self._applied_changes[video_id] = version
+            self._sync_cursor = max(self._sync_cursor, changed_at)
+        if applied:
+            logging.info(f"🔄 Semantic index applied {applied} changes")
+        if self._dirty and now - self._last_save >= SEMANTIC_INDEX_SAVE_SECONDS:
+            self.save_index()
+        return applied
+    
+    def _passage_hits(self, query_embedding: np.ndarray, k: int) -> List[Tuple[int, float]]:
+        """Best k passages as (vector id, cosine score)"""
+        if self.index is not None:
+            # ANN tier; over-fetch by the tombstones that will be filtered out
+            return ann_search(self.index, query_embedding, k + min(self._tombstones, k))
+        return self.store.search(query_embedding, k)
+    
+    def _pool(self, hits: List[Tuple[int, float]], top_k: int) -> List[Dict]:
+        """Group passage hits per video: max (best passage) or sum (many matching passages)"""
+        matches_by_video: Dict[str, List[Tuple[float, Optional[float], Optional[float]]]] = {}
+        for vector_id, score in hits:
+            passage = self.passages.get(vector_id)
+            if passage is not None:
+                video_id, start, end = passage
+                matches_by_video.setdefault(video_id, []).append((score, start, end))
+        
+        results = []
+        for video_id, matches in matches_by_video.items():
+            if video_id not in self.video_metadata:
+                continue
+            matches.sort(key=lambda m: m[0], reverse=True)
+            best_score, start, end = matches[0]
+            metadata = self.video_metadata[video_id].copy()
+            metadata['semantic_score'] = float(sum(m[0] for m in matches) if SEMANTIC_POOLING == 'sum' else best_score)
+            metadata['matchStart'] = start
+            metadata['matchEnd'] = end
+            metadata['moments'] = [{'start': s, 'end': e, 'score': round(score, 4)}
+                                   for score, s, e in matches[:MAX_MOMENTS] if s is not None]
+            results.append(metadata)
+        results.sort(key=lambda r: r['semantic_score'], reverse=True)
+        return results[:top_k]
+    
+    def _filtered_hits(self, query_embedding: np.ndarray, top_k: int, filters: SearchFilters) -> List[Dict]:
+        """Top videos passing `filters`: pre-filter when few videos pass, else over-fetch and post-filter"""
+        allowed = [video_id for video_id, meta in list(self.video_metadata.items()) if filters.matches(meta)]
+        if not allowed:
+            return []
+        if len(allowed) <= len(self.video_metadata) * PREFILTER_FRACTION:
+            # Selective filter: exact search over only the allowed videos' passages
+            vector_ids = np.fromiter((i for video_id in allowed for i in self.ids_by_video.get(video_id, [])), dtype='int64')
+            hits = self.store.search(query_embedding, top_k * SEMANTIC_PASSAGE_OVERSAMPLE, allowed_ids=vector_ids)
+            return self._pool(hits, top_k)
+        # Broad filter: widen the over-fetch until enough videos pass or every passage was seen
+        k = top_k * SEMANTIC_PASSAGE_OVERSAMPLE
+        while True:
+            hits = self._passage_hits(query_embedding, k)
+            results = [r for r in self._pool(hits, len(self.video_metadata)) if filters.matches(r)]
+            if len(results) >= top_k or k >= len(self.passages):
+                return results[:top_k]
+            k *= 4
+    
+    def search(self, query: str, top_k: int = 20, filters: Optional[SearchFilters] = None) -> List[Dict]:
+        """Perform semantic search over passages, one result per video"""
         if not self.is_initialized:
             return []
         
         try:
-            # Generate query embedding
-            query_embedding = self.generate_embedding(query)
+            # Query embeddings are cached: repeats and page 2, 3, ... skip the forward pass
+            key = normalize_query(query)
+            query_embedding = query_embedding_cache.get(key)
+            if query_embedding is None:
+                query_embedding = self.generate_embedding(key)
+                if query_embedding is not None:
+                    query_embedding_cache.put(key, query_embedding)
             if query_embedding is None:
                 return []
             
             query_embedding = query_embedding.reshape(1, -1).astype('float32')
-            
-            if FAISS_AVAILABLE and self.index is not None:
-                # FAISS search
-                scores, indices = self.index.search(query_embedding, min(top_k, self.index.ntotal))
-                results = []
+            # Syncs change the store, ANN index and passage maps together; read them as one state
+            with self._lock:
+                if not self.passages:
+                    return []
                 
-                for score, idx in zip(scores[0], indices[0]):
-                    if idx in self.video_metadata:
-                        metadata = self.video_metadata[idx].copy()
-                        metadata['semantic_score'] = float(score)
-                        results.append(metadata)
-                
-                return results
-            else:
-                # Numpy-based similarity search
-                similarities = np.dot(self.embeddings_array, query_embedding.T).flatten()
-                top_indices = np.argsort(similarities)[::-1][:top_k]
-                
-                results = []
-                for idx in top_indices:
-                    if idx in self.video_metadata:
-                        metadata = self.video_metadata[idx].copy()
-                        metadata['semantic_score'] = float(similarities[idx])
-                        results.append(metadata)
-                
-                return results
+                if filters is not None and filters.active:
+                    return self._filtered_hits(query_embedding, top_k, filters)
+                # Over-fetch passages: several may belong to the same video
+                hits = self._passage_hits(query_embedding, top_k * SEMANTIC_PASSAGE_OVERSAMPLE)
+                return self._pool(hits, top_k)
                 
         except Exception as e:
             logging.error(f"Semantic search failed: {e}")
             return []
     
     def get_user_info(self, db, owner_id: str) -> Dict:
-        """Get user information for display - ENHANCED"""
-        if not owner_id:
-            return {'name': 'Unknown User', 'email': '', 'picture': ''}
-        
+        """Get user information for display (see db_mongo.resolve_users)"""
         try:
-            # Try multiple ways to find the user
-            user_doc = db.users.find_one({'userId': owner_id})
-            if not user_doc:
-                # Try finding by email if userId doesn't work
-                user_doc = db.users.find_one({'email': owner_id})
-            if not user_doc:
-                # Try finding by name if email doesn't work
-                user_doc = db.users.find_one({'name': owner_id})
-            
-            if user_doc:
-                user_info = {
-                    'name': user_doc.get('name', user_doc.get('email', 'Unknown User')),
-                    'email': user_doc.get('email', ''),
-                    'picture': user_doc.get('picture', '')
-                }
-                logging.info(f"✅ AI Search found user: {user_info['name']} ({user_info['email']})")
-                return user_info
-            else:
-                # Create a fallback user info based on owner_id
-                fallback_info = {
-                    'name': f"User {owner_id[:8]}" if owner_id else 'Unknown User',
-                    'email': owner_id if '@' in str(owner_id) else '',
-                    'picture': ''
-                }
-                logging.warning(f"⚠️ AI Search: No user found for ownerId: {owner_id}, using fallback: {fallback_info['name']}")
-                return fallback_info
+            return resolve_users([owner_id], db=db)[owner_id]
         except Exception as e:
             logging.error(f"Failed to get user info: {e}")
         
@@ -230,6 +584,9 @@ class SemanticSearcher:
 
 # Global instance
 semantic_searcher = SemanticSearcher()
+query_embedding_cache = LRUCache('query_embeddings', QUERY_EMBEDDING_CACHE_SIZE, QUERY_EMBEDDING_CACHE_TTL_SECONDS)
+# Owner names are looked up with the results, so results also expire by time
+search_result_cache = LRUCache('search_results', SEARCH_RESULT_CACHE_SIZE, SEARCH_RESULT_CACHE_TTL_SECONDS)
 
 def initialize_semantic_search(db):
     """Initialize semantic search with database"""
@@ -237,14 +594,29 @@ def initialize_semantic_search(db):
         return semantic_searcher.build_video_index(db)
     return False
 
-def semantic_search_videos(query: str, db, top_k: int = 20) -> List[Dict]:
-    """Perform semantic search and return formatted results"""
+def semantic_search_videos(query: str, db, top_k: int = 20, filters=None) -> List[Dict]:
+    """Perform semantic search and return formatted, filtered results.
+    
+    `filters` is the request's filter dict or a SearchFilters. Results are
+    cached per (query, index version, top_k, filters), so paging through them
+    or repeating a popular search costs a dictionary lookup.
+    """
     if not SEMANTIC_SEARCH_AVAILABLE:
         return []
     
     try:
-        # Perform semantic search
-        results = semantic_searcher.search(query, top_k)
+        # Perform semantic search (building on first use, then applying recent changes)
+        semantic_searcher.ensure_index(db)
+        semantic_searcher.sync_changes(db)
+        search_filters = filters if isinstance(filters, SearchFilters) else SearchFilters.from_request(filters)
+        cache_key = (normalize_query(query), semantic_searcher.version, top_k, search_filters.key())
+        cached = search_result_cache.get(cache_key)
+        if cached is not None:
+            return list(cached)
+        # Filters are applied inside the index, so top_k counts matching videos only
+        results = semantic_searcher.search(query, top_k, search_filters)
+        # Display fields (owner, counts, current metadata) in one search_docs read
+        docs = search_docs.fetch(db, (r.get('videoId') for r in results))
         
         # Format results for API response with duplicate detection
         formatted_results = []
@@ -253,7 +625,10 @@ def semantic_search_videos(query: str, db, top_k: int = 20) -> List[Dict]:
         
         for result in results:
             video_id = result.get('videoId')
-            title = result.get('title', 'Untitled Video')
+            doc = docs.get(video_id)
+            if doc is None:
+                continue  # deleted since the index last synced
+            title = doc.get('title', 'Untitled Video')
             
             # Skip duplicates by video ID and title
             if video_id in seen_video_ids or title in seen_titles:
@@ -266,8 +641,6 @@ def semantic_search_videos(query: str, db, top_k: int = 20) -> List[Dict]:
             
             seen_video_ids.add(video_id)
             seen_titles.add(title)
-            # Get user info
-            user_info = semantic_searcher.get_user_info(db, result.get('ownerId', ''))
             
             # Calculate relevance score (0-1) - ENHANCED for better matches
             semantic_score = result.get('semantic_score', 0)
@@ -287,21 +660,11 @@ def semantic_search_videos(query: str, db, top_k: int = 20) -> List[Dict]:
                 relevance = 0.5  # Minimum threshold
             
             formatted_result = {
-                'id': result['videoId'],
-                'videoId': result['videoId'],
-                'title': result.get('title', 'Untitled Video'),
-                'user': user_info['name'],
-                'userEmail': user_info['email'],
-                'userPicture': user_info['picture'],
-                'duration': result.get('duration', 0),
-                'uploadedAt': result.get('uploadedAt', ''),
-                'thumbnail': result.get('thumbnail', ''),
-                'transcript': result.get('transcript', '')[:200] + '...' if len(result.get('transcript', '')) > 200 else result.get('transcript', ''),
-                'tags': result.get('tags', []),
+                **search_docs.result_fields(doc),
+                'matchStart': result.get('matchStart'),  # seconds; None for untimed text
+                'matchEnd': result.get('matchEnd'),
+                'moments': result.get('moments', []),
                 'relevance': relevance,
-                'views': 0,  # Placeholder
-                'likes': 0,  # Placeholder
-                'category': 'general',  # Default category
                 'search_type': 'semantic'  # Indicate this is semantic search
             }
             
@@ -316,7 +679,8 @@ def semantic_search_videos(query: str, db, top_k: int = 20) -> List[Dict]:
                 seen_final.add(result_key)
                 final_results.append(result)
         
-        return final_results
+        search_result_cache.put(cache_key, final_results)
+        return list(final_results)
         
     except Exception as e:
         logging.error(f"Semantic search failed: {e}")
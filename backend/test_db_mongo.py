@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""Test the Mongo client factory: pool settings, pool stats, fork safety and the migration step"""
+
+import os
+import sys
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_client_pool():
+    """Clients get the configured pool; checkouts and waits are counted per process"""
+    print("🧪 Testing Mongo client pool...")
+    import db_mongo
+    from config import MONGODB_MAX_POOL_SIZE, MONGODB_WAIT_QUEUE_TIMEOUT_MS
+
+    client = db_mongo.create_client('mongodb://localhost:27017/')
+    try:
+        pool = client.options.pool_options
+        assert pool.max_pool_size == MONGODB_MAX_POOL_SIZE
+        assert pool.wait_queue_timeout == MONGODB_WAIT_QUEUE_TIMEOUT_MS / 1000
+        assert db_mongo.pool_stats in client.options.event_listeners
+    finally:
+        client.close()
+    client = db_mongo.create_client('mongodb://localhost:27017/?maxPoolSize=3&serverSelectionTimeoutMS=200')
+    try:
+        assert client.options.pool_options.max_pool_size == 3
+        assert client.options.server_selection_timeout == 0.2
+    finally:
+        client.close()
+
+    stats = db_mongo.PoolStats()
+    for _ in range(3):
+        stats.connection_check_out_started(None)
+        stats.connection_checked_out(None)
+    stats.connection_checked_in(None)
+    stats.connection_check_out_started(None)
+    stats.connection_check_out_failed(None)
+    snapshot = stats.snapshot()
+    assert (snapshot['checkedOut'], snapshot['maxCheckedOut'], snapshot['checkouts']) == (2, 3, 3)
+    assert snapshot['checkoutFailures'] == 1 and snapshot['maxWaitMs'] >= snapshot['avgWaitMs'] >= 0
+    print("✅ Pool options applied (the URI wins); checkouts, failures and waits counted")
+
+
+def test_fork_resets_client():
+    """A forked child never reuses the parent's client"""
+    if not hasattr(os, 'fork'):
+        print("⚠️ os.fork not available, skipping fork test")
+        return
+
+    print("🧪 Testing client reset after fork...")
+    import db_mongo
+    db_mongo._client, db_mongo._db = object(), object()
+    pid = os.fork()
+    if pid == 0:
+        os._exit(0 if db_mongo._client is None and db_mongo._db is None else 1)
+    _, status = os.waitpid(pid, 0)
+    assert os.WEXITSTATUS(status) == 0
+    assert db_mongo._db is not None  # the parent keeps its own
+    db_mongo.reset_db()
+    print("✅ Forked children start without a client")
+
+
+def test_migration():
+    """Indexes are created by the migration step, once per schema version"""
+    try:
+        import mongomock
+    except ImportError:
+        print("⚠️ mongomock not installed, skipping migration test")
+        return
+
+    print("🧪 Testing migrations...")
+    import db_migrate
+    db = mongomock.MongoClient()['footageflow_test_migrate']
+    assert db_migrate.migrate(db)
+    assert 'search_docs' in db.list_collection_names()
+    assert any(index['key'] == [('videoId', 1)] and index.get('unique')
+               for index in db.videos.index_information().values())
+    assert not db_migrate.migrate(db)
+    assert db_migrate.migrate(db, force=True)
+    print("✅ Migration applies once and can be forced")
+
+
+if __name__ == "__main__":
+    test_client_pool()
+    test_fork_resets_client()
+    test_migration()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""Test hybrid search: reciprocal rank fusion and the shared latency budget"""
+
+import os
+import sys
+import time
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _results(*video_ids, **fields):
+    return [dict({'videoId': vid, 'title': vid, 'relevance': 0.5}, **fields) for vid in video_ids]
+
+
+def test_reciprocal_rank_fusion():
+    """Results found by both retrievers rise; each records who ranked it where"""
+    print("🧪 Testing reciprocal rank fusion...")
+    from hybrid_search import reciprocal_rank_fusion
+
+    semantic = _results('a', 'b', 'c', moments=[{'start': 1.0}])
+    keyword = _results('c', 'd')
+    fused = reciprocal_rank_fusion({'semantic': semantic, 'keyword': keyword}, k=60)
+    assert [r['videoId'] for r in fused] == ['c', 'a', 'b', 'd']  # b and d tie at rank 2; ties keep retriever order
+    assert fused[0]['retrievers'] == {'semantic': 3, 'keyword': 1} and fused[0]['relevance'] == 1.0
+    assert fused[1]['retrievers'] == {'semantic': 1} and fused[1]['moments'] == [{'start': 1.0}]
+    assert all(r['search_type'] == 'hybrid' for r in fused)
+    assert 'retrievers' not in semantic[0]  # inputs (possibly cached) are not modified
+    print("✅ Reciprocal rank fusion test completed!")
+
+
+def test_latency_budget():
+    """A slow or failing retriever is left out instead of delaying the response"""
+    print("🧪 Testing hybrid latency budget...")
+    from hybrid_search import hybrid_search
+
+    def slow():
+        time.sleep(0.5)
+        return _results('slow')
+
+    def broken():
+        raise RuntimeError('index offline')
+
+    started = time.perf_counter()
+    fused, status = hybrid_search({'semantic': slow, 'keyword': lambda: _results('fast'), 'other': broken},
+                                  budget_ms=100)
+    elapsed = time.perf_counter() - started
+    assert elapsed < 0.4, elapsed
+    assert [r['videoId'] for r in fused] == ['fast']
+    assert status['semantic']['status'] == 'timeout' and status['other']['status'] == 'error'
+    assert status['keyword']['status'] == 'ok' and status['keyword']['count'] == 1
+    print("✅ Retrievers over budget are reported as timeouts")
+
+    fused, status = hybrid_search({'semantic': slow, 'keyword': broken}, budget_ms=50)
+    assert [r['videoId'] for r in fused] == ['slow'] and status['semantic']['status'] == 'ok'
+    print("✅ With nothing in on time, the first successful retriever is awaited")
+
+    fused, status = hybrid_search({'semantic': lambda: [], 'keyword': slow}, budget_ms=50)
+    assert [r['videoId'] for r in fused] == ['slow']
+    assert (status['semantic']['status'], status['semantic']['count']) == ('ok', 0)
+    assert status['keyword']['status'] == 'ok'
+    print("✅ An empty ranking on time does not cut off a slower retriever with hits")
+    print("✅ Hybrid latency budget test completed!")
+
+
+if __name__ == "__main__":
+    test_reciprocal_rank_fusion()
+    test_latency_budget()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""Test job progress events: per-process fan-out and the server-sent event stream"""
+
+import os
+import sys
+import time
+import json
+import threading
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _use_mock_db(name):
+    import mongomock
+    import db_mongo
+    db_mongo._client = mongomock.MongoClient()
+    db_mongo._db = db_mongo._client[name]
+    return db_mongo
+
+
+def test_fan_out():
+    """Hundreds of watchers share one poll per interval; local writes arrive at once, only once"""
+    try:
+        import mongomock  # noqa: F401
+    except ImportError:
+        print("⚠️ mongomock not installed, skipping job events fan-out test")
+        return
+
+    print("🧪 Testing job event fan-out...")
+    db_mongo = _use_mock_db('footageflow_test_job_events')
+    db = db_mongo.get_db()
+    import job_events
+    from datetime import datetime
+
+    queries = []
+    find = db.jobs.find
+    db.jobs.find = lambda *a, **kw: queries.append(a) or find(*a, **kw)
+    hub = job_events.JobEventHub(source='auto', poll_interval=0.05, db=db)
+    subscriptions = [hub.subscribe(f'w{i % 4}') for i in range(200)]
+    started = time.monotonic()
+    for i in range(4):  # written by a worker process: only the watcher thread can see it
+        db.jobs.insert_one({'videoId': f'w{i}', 'status': 'processing', 'details': {'step': 'transcription'},
+                            'updatedAt': datetime.utcnow()})
+    received = [s.get(timeout=2) for s in subscriptions]
+    time.sleep(0.3)
+    elapsed = time.monotonic() - started
+    hub.stop()
+    assert hub.active_source == 'poll'  # mongomock has no change streams
+    assert all(job and job['details']['step'] == 'transcription' for job in received)
+    assert all(s.get(timeout=0) is None for s in subscriptions)  # later polls find nothing new
+    print(f"📊 200 watchers, {len(queries)} job queries in {elapsed:.2f}s")
+    assert len(queries) <= elapsed / hub.poll_interval + 2
+    print("✅ Watchers share the poll")
+
+    watcher = job_events.hub.subscribe('w9')
+    db_mongo.set_job('w9', 'processing', {'step': 'visual_tagging'})
+    assert watcher.get(timeout=0)['details']['step'] == 'visual_tagging'
+    job_events.publish(db.jobs.find_one({'videoId': 'w9'}))  # the same write seen again
+    assert watcher.get(timeout=0) is None
+    job_events.hub.unsubscribe(watcher)
+    assert job_events.hub.watched() == 0
+    print("✅ Job event fan-out test completed!")
+
+
+def test_event_stream():
+    """The stream sends the current state, then step, partial and completion events, and ends"""
+    try:
+        import mongomock  # noqa: F401
+    except ImportError:
+        print("⚠️ mongomock not installed, skipping job event stream test")
+        return
+
+    print("🧪 Testing job event stream...")
+    db_mongo = _use_mock_db('footageflow_test_job_stream')
+    import app
+    client = app.app.test_client()
+    access, _ = app._issue_tokens({'userId': 'u1', 'email': 'ann@example.com', 'name': 'Ann'})
+    client.set_cookie('access_token', access)
+    db_mongo.upsert_video('e1', {'ownerId': 'u1'})
+    db_mongo.set_job('e1', 'processing', {'step': 'transcription'})
+    assert client.get('/jobs/nope/events').status_code == 404
+
+    def run_pipeline():
+        time.sleep(0.1)
+        db_mongo.set_job('e1', 'processing', {'step': 'transcription', 'partialTranscript': 'surf at'})
+        db_mongo.set_job('e1', 'processing', {'step': 'transcription', 'partialTranscript': 'surf at'})
+        db_mongo.set_job('e1', 'processing', {'step': 'transcription', 'partialTranscript': 'surf at sunrise'})
+        db_mongo.set_job('e1', 'processing', {'step': 'visual_tagging'})
+        db_mongo.set_job('e1', 'completed', {'step': 'completed'})
+
+    threading.Thread(target=run_pipeline, daemon=True).start()
+    response = client.get('/jobs/e1/events')
+    assert response.mimetype == 'text/event-stream'
+    events = []
+    for message in response.get_data(as_text=True).strip().split('\n\n'):
+        lines = dict(line.split(': ', 1) for line in message.splitlines())
+        events.append((lines['event'], json.loads(lines['data'])))
+    assert [name for name, _ in events] == ['step', 'partial', 'partial', 'step', 'complete']
+    assert events[2][1]['partialTranscript'] == 'surf at sunrise' and events[3][1]['currentStep'] == 'visual_tagging'
+    assert app.job_events.hub.watched() == 0
+    print("✅ Job event stream test completed!")
+
+
+if __name__ == "__main__":
+    test_fan_out()
+    test_event_stream()
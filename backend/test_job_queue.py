@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""Test the Mongo-backed processing job queue (uses mongomock, no server needed)"""
+
+import os
+import sys
+from datetime import datetime, timedelta
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _use_mock_db():
+    import mongomock
+    import db_mongo
+    db_mongo._client = mongomock.MongoClient()
+    db_mongo._db = db_mongo._client['footageflow_test']
+    import db_migrate
+    db_migrate.create_indexes(db_mongo._db)  # enqueue relies on the unique jobId index
+    return db_mongo._db
+
+
+def test_job_queue():
+    """Enqueue, claim, retry, and reap jobs"""
+    try:
+        import mongomock  # noqa: F401
+    except ImportError:
+        print("⚠️ mongomock not installed, skipping job queue test")
+        return
+
+    print("🧪 Testing job queue...")
+    db = _use_mock_db()
+    import job_queue
+
+    import db_mongo
+    db_mongo._db = db_mongo._client['footageflow_test_unmigrated']
+    try:
+        job_queue.enqueue_job('vid-1', 'user-1')
+        assert False, 'enqueued without the unique jobId index'
+    except RuntimeError as e:
+        assert 'db_migrate' in str(e)
+    db_mongo._db = db
+    print("✅ Enqueueing refuses to run before the migration")
+
+    # Enqueue is idempotent while the job is active
+    job = job_queue.enqueue_job('vid-1', 'user-1')
+    assert job['status'] == 'queued'
+    assert job_queue.enqueue_job('vid-1', 'user-1')['queuedAt'] == job['queuedAt']
+    print("✅ Enqueue is idempotent")
+
+    # Claim moves it to processing exactly once
+    claimed = job_queue.claim_next_job('worker-a')
+    assert claimed and claimed['status'] == 'processing' and claimed['attempts'] == 1
+    assert job_queue.claim_next_job('worker-b') is None
+    print("✅ Claim is exclusive")
+
+    # A failing handler schedules a retry with backoff
+    def boom(_job):
+        raise RuntimeError('decoder exploded')
+
+    job_queue.run_job(boom, claimed)
+    doc = db.jobs.find_one({'videoId': 'vid-1'})
+    assert doc['status'] == 'queued' and doc['availableAt'] > datetime.utcnow()
+    assert 'lockToken' not in doc
+    print("✅ Failure schedules a retry")
+
+    # Attempts are capped
+    db.jobs.update_one({'videoId': 'vid-1'}, {'$set': {'availableAt': datetime.utcnow(),
+                                                       'attempts': job_queue.JOB_MAX_ATTEMPTS - 1}})
+    job_queue.run_job(boom, job_queue.claim_next_job('worker-a'))
+    assert db.jobs.find_one({'videoId': 'vid-1'})['status'] == 'error'
+    print("✅ Job fails permanently after max attempts")
+
+    # A successful handler leaves its own final status and releases the lock
+    job_queue.enqueue_job('vid-2')
+    job_queue.run_job(lambda j: db.jobs.update_one({'videoId': j['videoId']}, {'$set': {'status': 'completed'}}),
+                      job_queue.claim_next_job('worker-a'))
+    doc = db.jobs.find_one({'videoId': 'vid-2'})
+    assert doc['status'] == 'completed' and 'lockToken' not in doc
+    print("✅ Success releases the claim")
+
+    # Reaper requeues jobs whose worker stopped heartbeating
+    job_queue.enqueue_job('vid-3')
+    job_queue.claim_next_job('worker-dead')
+    db.jobs.update_one({'videoId': 'vid-3'}, {'$set': {
+        'heartbeatAt': datetime.utcnow() - timedelta(seconds=job_queue.JOB_STALE_SECONDS + 5)}})
+    assert job_queue.reap_stuck_jobs() == 1
+    assert db.jobs.find_one({'videoId': 'vid-3'})['status'] == 'queued'
+    print("✅ Stuck jobs are reaped")
+
+    # A heartbeat landing between the reaper's read and its update keeps the job
+    job_queue.enqueue_job('vid-4')
+    claimed = job_queue.claim_next_job('worker-slow')
+    cutoff = datetime.utcnow()
+    db.jobs.update_one({'videoId': 'vid-4'}, {'$set': {'heartbeatAt': cutoff - timedelta(seconds=1)}})
+    assert job_queue.heartbeat(claimed)
+    assert not job_queue.fail_job(claimed, 'Worker stopped responding', stale_before=cutoff)
+    assert db.jobs.find_one({'videoId': 'vid-4'})['status'] == 'processing'
+    assert job_queue.enqueue_job('vid-4')['lockToken'] == claimed['lockToken']  # still active
+    assert db.jobs.count_documents({'videoId': 'vid-4'}) == 1
+    print("✅ Fresh heartbeats are not reaped; enqueue leaves active jobs alone")
+
+    print("✅ Job queue test completed!")
+
+
+ROUND_TRIPS = ('find', 'find_one', 'aggregate', 'count_documents', 'insert_one', 'insert_many', 'update_one',
+               'update_many', 'replace_one', 'delete_one', 'delete_many', 'bulk_write')
+
+
+class _RoundTripCounter:
+    """Wraps a database and counts calls that go to the server"""
+
+    def __init__(self, db):
+        self._db = db
+        self.calls = 0
+
+    def __getattr__(self, name):
+        collection = getattr(self._db, name)
+        counter = self
+
+        class Collection:
+            def __getattr__(self, attr):
+                method = getattr(collection, attr)
+                if attr in ROUND_TRIPS:
+                    counter.calls += 1
+                return method
+        return Collection()
+
+    __getitem__ = __getattr__
+
+
+def test_job_writer():
+    """A processing run reads the owner once, throttles steps and writes results together"""
+    try:
+        import mongomock  # noqa: F401
+    except ImportError:
+        print("⚠️ mongomock not installed, skipping job writer test")
+        return
+
+    print("🧪 Testing job writer...")
+    import time
+    import db_mongo
+    import keyword_index
+    from search_filters import SearchFilters
+    raw = _use_mock_db()
+    steps = ['starting', 'transcription', 'visual_tagging', 'emotion_analysis', 'indexing', 'story_draft', 'final_render']
+    for video_id in ('old', 'new'):
+        db_mongo.upsert_video(video_id, {'originalName': f'{video_id} clip', 'ownerId': 'u1', 'duration': 30})
+    db_mongo._db = counted = _RoundTripCounter(raw)
+
+    for step in steps:
+        db_mongo.set_job('old', 'processing', {'step': step})
+    db_mongo.save_transcript('old', 'surfing big waves')
+    db_mongo.save_tags('old', ['beach'])
+    db_mongo.set_job('old', 'completed', {'transcript': 'surfing big waves'})
+    before, counted.calls = counted.calls, 0
+
+    with db_mongo.JobWriter('new', step_interval=60) as job:
+        for step in steps:
+            job.step({'step': step})
+        job.save_transcript('surfing big waves')
+        job.save_tags(['beach'])
+        job.complete({'transcript': 'surfing big waves'})
+    after = counted.calls
+    db_mongo._db = raw
+    print(f"📊 Round-trips per processed video: {before} with per-call saves, {after} with JobWriter")
+    assert after * 3 <= before, (before, after)
+    for video_id in ('old', 'new'):
+        assert raw.jobs.find_one({'videoId': video_id})['status'] == 'completed'
+        assert raw.transcripts.find_one({'videoId': video_id})['ownerId'] == 'u1'
+        assert raw.search_docs.find_one({'videoId': video_id})['tags'] == ['beach']
+    assert set(keyword_index.lookup(raw, 'surf')) == {'old', 'new'}
+    assert set(keyword_index.lookup(raw, 'clip', filters=SearchFilters(tags=['beach']))) == {'old', 'new'}
+    print("✅ Same documents and index entries, far fewer round-trips")
+
+    job = db_mongo.JobWriter('new', step_interval=0.05)
+    job.step({'step': 'transcription'})
+    job.step({'step': 'partial', 'partialTranscript': 'surf'})
+    assert raw.jobs.find_one({'videoId': 'new'})['details']['step'] == 'transcription'
+    time.sleep(0.2)
+    assert raw.jobs.find_one({'videoId': 'new'})['details']['step'] == 'partial'
+    print("✅ Steps inside the interval are coalesced and the latest is written when it ends")
+
+    import threading
+    uncaught = []
+    excepthook, threading.excepthook = threading.excepthook, uncaught.append
+    update_one = raw.jobs.update_one
+
+    def unavailable(*args, **kwargs):
+        raise RuntimeError('primary stepped down')
+
+    try:
+        job.step({'step': 'visual_tagging'})
+        raw.jobs.update_one = unavailable
+        job.step({'step': 'emotion_analysis'})
+        time.sleep(0.2)  # the interval ends while Mongo is down
+    finally:
+        raw.jobs.update_one = update_one
+        threading.excepthook = excepthook
+    assert uncaught == [] and raw.jobs.find_one({'videoId': 'new'})['details']['step'] == 'visual_tagging'
+    job.flush()
+    assert raw.jobs.find_one({'videoId': 'new'})['details']['step'] == 'emotion_analysis'
+    print("✅ A failed timed write is logged and retried by the next flush")
+
+    try:
+        with db_mongo.JobWriter('new', step_interval=60) as job:
+            job.save_transcript('calm lake')
+            job.step({'step': 'emotion_analysis'})
+            job.step({'step': 'indexing'})
+            raise RuntimeError('analyzer crashed')
+    except RuntimeError:
+        pass
+    assert raw.transcripts.find_one({'videoId': 'new'})['text'] == 'calm lake'
+    assert raw.jobs.find_one({'videoId': 'new'})['details']['step'] == 'emotion_analysis'
+    print("✅ A failed run keeps its transcript and leaves the status to the queue")
+    print("✅ Job writer test completed!")
+
+
+if __name__ == "__main__":
+    test_job_queue()
+    test_job_writer()
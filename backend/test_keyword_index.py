@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""Test the keyword index: stemming, postings kept current on save, prefix/phrase matching and BM25F ranking"""
+
+import os
+import sys
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_stemming():
+    """Inflections of a word share one term"""
+    print("🧪 Testing keyword stemming...")
+    from keyword_index import stem, tokenize, query_terms
+
+    for words in (('surf', 'surfs', 'surfing'), ('hike', 'hiking', 'hiked'), ('party', 'parties'),
+                  ('wave', 'waves'), ('beach', 'beaches'), ('run', 'running')):
+        assert len({stem(w) for w in words}) == 1, words
+    assert stem('glass') == 'glass' and stem('string') == 'string'
+    assert tokenize('Surfing, WAVES!') == ['surf', 'wav']
+    assert query_terms('waves wave beach') == ['wav', 'beach']
+    print("✅ Stemming test completed!")
+
+
+def test_keyword_index():
+    """Saves update postings; lookups match exact terms, prefixes and phrases"""
+    try:
+        import mongomock
+    except ImportError:
+        print("⚠️ mongomock not installed, skipping keyword index test")
+        return
+
+    print("🧪 Testing keyword index...")
+    import db_mongo
+    import keyword_index
+    db_mongo._client = mongomock.MongoClient()
+    db_mongo._db = db_mongo._client['footageflow_test_keywords']
+    db = db_mongo.get_db()
+
+    db_mongo.upsert_video('k1', {'originalName': 'Surf trip', 'ownerId': 'u1'})
+    db_mongo.save_transcript('k1', 'We went surfing on big waves at sunset')
+    db_mongo.save_tags('k1', ['surfboard', 'ocean'])
+    db_mongo.upsert_video('k2', {'originalName': 'Mountain hike', 'ownerId': 'u2'})
+    db_mongo.save_transcript('k2', 'A long hike to watch sunset waves roll over the clouds')
+    db_mongo.upsert_video('k2', {'status': 'completed'})  # no title change: title postings kept
+
+    matches = keyword_index.lookup(db, 'surf')
+    assert set(matches) == {'k1'}
+    assert matches['k1'].coverage(['surf'], 'transcript') == 1.0 and matches['k1'].coverage(['surf'], 'title') == 1.0
+    assert 'surf' in matches['k1'].prefix['tags']  # surfboard
+    print("✅ Stemmed terms and prefixes match")
+
+    matches = keyword_index.lookup(db, 'sunset waves')
+    terms = keyword_index.query_terms('sunset waves')
+    assert set(matches) == {'k1', 'k2'}
+    assert not matches['k1'].has_phrase(terms, 'transcript') and matches['k2'].has_phrase(terms, 'transcript')
+    assert keyword_index.lookup(db, 'hike', fields=('title',)).keys() == {'k2'}
+    print("✅ Phrases need consecutive positions; lookups can be limited to fields")
+
+    db_mongo.save_transcript('k1', 'Calm lake at dawn')
+    assert set(keyword_index.lookup(db, 'sunset')) == {'k2'}
+    keyword_index.remove_video(db, 'k2')
+    assert keyword_index.lookup(db, 'sunset') == {}
+    print("✅ Saving a field replaces its postings; removed videos disappear")
+
+    db.keyword_index.delete_many({})
+    db.tags.insert_one({'videoId': 'k3', 'keywords': ['dog park']})
+    db.videos.insert_one({'videoId': 'k3', 'filename': 'dogs.mp4'})
+    keyword_index.ensure_index(db)
+    assert set(keyword_index.lookup(db, 'dog')) == {'k3'}
+    assert set(keyword_index.lookup(db, 'lake')) == {'k1'}
+    print("✅ An empty index is backfilled from existing videos")
+    print("✅ Keyword index test completed!")
+
+
+def test_bm25f_ranking():
+    """Field weights and length normalization order results; stats are maintained at index time"""
+    try:
+        import mongomock
+    except ImportError:
+        print("⚠️ mongomock not installed, skipping BM25F test")
+        return
+
+    print("🧪 Testing BM25F ranking...")
+    import db_mongo
+    import keyword_index
+    import keyword_ranking
+    db_mongo._client = mongomock.MongoClient()
+    db_mongo._db = db_mongo._client['footageflow_test_bm25']
+    db = db_mongo.get_db()
+
+    filler = ' '.join(['walking along the road'] * 50)
+    db_mongo.upsert_video('title', {'originalName': 'Dog park'})
+    db_mongo.save_transcript('title', filler)
+    db_mongo.upsert_video('short', {'originalName': 'Clip one'})
+    db_mongo.save_transcript('short', 'the dog park at noon')
+    db_mongo.upsert_video('long', {'originalName': 'Clip two'})
+    db_mongo.save_transcript('long', filler + ' a dog ' + filler)
+    db_mongo.upsert_video('other', {'originalName': 'Clip three'})
+    db_mongo.save_transcript('other', 'cats sleeping on the sofa')
+
+    stats = keyword_index.corpus_stats(db)
+    assert stats['docs'] == 4 and stats['avgLength']['title'] == 2.0
+    print("✅ Corpus stats are kept at index time")
+
+    terms = keyword_index.query_terms('dog')
+    matches = keyword_index.lookup(db, 'dog')
+    queries = []
+    find_one = db.keyword_stats.find_one
+    db.keyword_stats.find_one = lambda *a, **kw: queries.append(a) or find_one(*a, **kw)
+    scores = keyword_ranking.bm25f_scores(db, matches, terms)
+    del db.keyword_stats.find_one
+    assert len(queries) == 1
+    assert keyword_ranking.rank(scores) == ['title', 'short', 'long']
+    print("✅ Title beats transcript; a short transcript beats a long one; one stats read")
+
+    terms = keyword_index.query_terms('dog park')
+    scores = keyword_ranking.bm25f_scores(db, keyword_index.lookup(db, 'dog park', fields=('transcript',)), terms,
+                                          fields=('transcript',))
+    db_mongo.save_transcript('short', 'the park with a dog')
+    unordered = keyword_ranking.bm25f_scores(db, keyword_index.lookup(db, 'dog park', fields=('transcript',)), terms,
+                                             fields=('transcript',))
+    assert scores['short'] > unordered['short']
+    print("✅ Phrase matches are boosted")
+
+    from search_filters import SearchFilters
+    db_mongo.upsert_video('short', {'ownerId': 'u9'})
+    terms = keyword_index.query_terms('dog')
+    unfiltered = keyword_ranking.bm25f_scores(db, keyword_index.lookup(db, 'dog'), terms)
+    filtered = keyword_index.lookup(db, 'dog', filters=SearchFilters(owner_id='u9'))
+    assert set(filtered) == {'short'} and keyword_index.document_frequencies(db, terms) == {'dog': 3}
+    inflated = keyword_ranking.bm25f_scores(db, filtered, terms)['short']
+    corpus_df = keyword_ranking.bm25f_scores(db, filtered, terms, df=keyword_index.document_frequencies(db, terms))
+    assert abs(corpus_df['short'] - unfiltered['short']) < 1e-9 and inflated > unfiltered['short']
+    print("✅ Filters narrow the matches but not the document frequencies")
+
+    keyword_index.remove_video(db, 'long')
+    db_mongo.save_transcript('other', '')
+    stats = keyword_index.corpus_stats(db)
+    assert stats['docs'] == 3
+    assert db.keyword_stats.find_one({'_id': 'corpus'})['totalLength']['transcript'] == 200 + 5
+    print("✅ Removals and emptied fields update the stats")
+    print("✅ BM25F ranking test completed!")
+
+
+if __name__ == "__main__":
+    test_stemming()
+    test_keyword_index()
+    test_bm25f_ranking()
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""Test the single-decode media demux stage"""
+
+import os
+import sys
+import shutil
+import tempfile
+import subprocess
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_media_demux():
+    """Frame sampling, subtitle parsing, and (with ffmpeg) a real demux pass"""
+    print("🧪 Testing media demux...")
+    from media_demux import MediaArtifacts, demux_media, evenly_spaced
+
+    assert evenly_spaced(list(range(10)), 5) == [0, 2, 4, 6, 8]
+    assert evenly_spaced(list(range(3)), 5) == [0, 1, 2]
+    assert evenly_spaced(list(range(3)), None) == [0, 1, 2]
+    print("✅ Frame subsampling is evenly spaced")
+
+    work_dir = tempfile.mkdtemp(prefix='demux_test_')
+    media = MediaArtifacts('clip.mp4', work_dir, {'format': {'duration': '12.5'}, 'streams': [{'codec_type': 'audio'}]})
+    media.subtitle_path = os.path.join(work_dir, 'subtitles.srt')
+    with open(media.subtitle_path, 'w') as f:
+        f.write("1\n00:00:00,000 --> 00:00:02,000\nHello there\n\n2\n00:00:02,000 --> 00:00:04,000\nGeneral Kenobi\n")
+    assert media.duration == 12.5 and media.has_audio and not media.has_video
+    assert media.read_subtitle_lines() == ['Hello there', 'General Kenobi']
+    media.cleanup()
+    assert not os.path.exists(work_dir)
+    print("✅ Subtitle lines parsed and work dir cleaned up")
+
+    if not (shutil.which('ffmpeg') and shutil.which('ffprobe')):
+        print("⚠️ ffmpeg/ffprobe not installed, skipping real demux")
+        return
+
+    clip_dir = tempfile.mkdtemp(prefix='demux_clip_')
+    try:
+        clip = os.path.join(clip_dir, 'clip.mp4')
+        subprocess.run([
+            'ffmpeg', '-v', 'error', '-y',
+            '-f', 'lavfi', '-i', 'testsrc=duration=3:size=160x120:rate=25',
+            '-f', 'lavfi', '-i', 'sine=frequency=440:duration=3',
+            '-c:v', 'libx264', '-c:a', 'aac', '-shortest', clip
+        ], check=True, capture_output=True)
+        thumb = os.path.join(clip_dir, 'thumb.jpg')
+        media = demux_media(clip, num_frames=6, thumbnail_path=thumb, stream_audio=False)
+        try:
+            assert media.audio_path and os.path.getsize(media.audio_path) > 16000 * 2 * 2  # > 2s of PCM
+            assert len(media.frames) == 6
+            assert media.thumbnail_path == thumb and os.path.exists(thumb)
+            print("✅ One ffmpeg pass produced PCM, frames and thumbnail")
+        finally:
+            media.cleanup()
+
+        media = demux_media(clip, num_frames=6, stream_audio=True)
+        try:
+            assert media.audio_path is None and media.has_pcm
+            streamed = sum(len(chunk) for chunk in media.iter_pcm())
+            assert streamed > 16000 * 2 * 2
+            assert len(media.frame_paths()) == 6
+            print("✅ Streaming mode piped PCM without a temp file")
+        finally:
+            media.cleanup()
+    finally:
+        shutil.rmtree(clip_dir, ignore_errors=True)
+
+    print("✅ Media demux test completed!")
+
+
+def _fake_ffmpeg(media, log_name, script, stdout=None):
+    """A stand-in decode process: runs `script` with python, stderr to the media's log"""
+    from media_demux import _start
+    return _start([sys.executable, '-c', script], os.path.join(media.work_dir, log_name), stdout=stdout)
+
+
+def test_streaming_readiness_and_failures():
+    """Frames are ready while streamed audio is unread; failed decodes raise DemuxError"""
+    print("🧪 Testing streamed demux readiness and failures...")
+    from media_demux import MediaArtifacts, DemuxError
+
+    media = MediaArtifacts('clip.mp4', tempfile.mkdtemp(prefix='demux_test_'), {'streams': [{'codec_type': 'video'}]})
+    media._requested = {'num_frames': 1}
+    try:
+        # The audio decode blocks on a full pipe nobody reads yet
+        media._audio_proc = _fake_ffmpeg(media, 'ffmpeg-audio.log',
+                                         'import sys\nwhile True: sys.stdout.buffer.write(bytes(65536))',
+                                         stdout=subprocess.PIPE)
+        media.audio_stream = media._audio_proc.stdout
+        frame = os.path.join(media.work_dir, 'frame_001.jpg')
+        media._proc = _fake_ffmpeg(media, 'ffmpeg.log', f"open({frame!r}, 'wb').close()")
+        assert media.frame_paths() == [frame]
+        print("✅ Frames are ready before the audio is consumed")
+    finally:
+        media.cleanup()
+
+    media = MediaArtifacts('clip.mp4', tempfile.mkdtemp(prefix='demux_test_'), {})
+    try:
+        media._proc = _fake_ffmpeg(media, 'ffmpeg.log', "import sys; sys.stderr.write('Invalid data'); sys.exit(1)")
+        media._audio_proc = _fake_ffmpeg(
+            media, 'ffmpeg-audio.log',
+            "import sys; sys.stdout.buffer.write(bytes(100)); sys.stderr.write('Decoding error'); sys.exit(1)",
+            stdout=subprocess.PIPE)
+        media.audio_stream = media._audio_proc.stdout
+        for _ in range(2):  # every later caller sees the failure too
+            try:
+                media.wait()
+                assert False, 'failed frame decode not reported'
+            except DemuxError as e:
+                assert 'Invalid data' in str(e)
+        assert sum(len(chunk) for chunk in media.iter_pcm()) == 100
+        try:
+            media.drain_audio()
+            assert False, 'failed audio decode not reported'
+        except DemuxError as e:
+            assert 'Decoding error' in str(e)
+        print("✅ Failed decodes raise DemuxError with ffmpeg's message")
+    finally:
+        media.cleanup()
+
+
+def test_pipeline_falls_back():
+    """A failed streamed decode makes the pipeline branches decode the file themselves"""
+    print("🧪 Testing per-analyzer fallback after a failed demux...")
+    import app
+    from media_demux import DemuxError
+
+    class FailedMedia:
+        error = None
+
+        def wait(self):
+            raise DemuxError('ffmpeg exited with 1')
+
+        drain_audio = wait
+
+    class Job:
+        def save_tags(self, tags):
+            self.tags = tags
+
+        def save_transcript(self, text, segments):
+            self.transcript = text
+
+        def step(self, details):
+            pass
+
+    calls = []
+    tagger, transcribe = app.generate_simple_tags, app._transcribe
+    app.generate_simple_tags = lambda path, media=None: calls.append(('tags', media)) or ['beach']
+    app._transcribe = lambda vid, path, job, media=None: calls.append(('speech', media)) or ('surf', [])
+    try:
+        job = Job()
+        assert app.tag_for_pipeline('v1', 'clip.mp4', job, FailedMedia()) == ['beach']
+        media = FailedMedia()
+        assert app.transcribe_for_pipeline('v1', 'clip.mp4', job, media) == ('surf', [])
+    finally:
+        app.generate_simple_tags, app._transcribe = tagger, transcribe
+    assert calls == [('tags', None), ('speech', media), ('speech', None)]
+    print("✅ Tagging and transcription retry without the demux")
+
+
+if __name__ == "__main__":
+    test_media_demux()
+    test_streaming_readiness_and_failures()
+    test_pipeline_falls_back()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""Test silence-aligned chunking and stitching for parallel transcription"""
+
+import os
+import sys
+
+import numpy as np
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_parallel_transcription():
+    """Splits land in silence, chunks cover the audio, overlap words are kept once"""
+    print("🧪 Testing parallel transcription chunking...")
+    from parallel_transcription import find_split_points, plan_chunks, stitch_words
+
+    rate = 1000
+    # 30s of "speech" with 1s silent gaps starting at 9.5s and 19.5s
+    t = np.arange(30 * rate)
+    samples = (8000 * np.sin(t * 0.3)).astype(np.int16)
+    for gap in (9.5, 19.5):
+        samples[int(gap * rate):int((gap + 1) * rate)] = 0
+
+    splits = find_split_points(samples, rate, chunk_seconds=10, search_seconds=2)
+    assert len(splits) == 2
+    for split, gap in zip(splits, (9.5, 19.5)):
+        assert gap * rate <= split <= (gap + 1) * rate, split
+    print("✅ Split points land in the silent gaps")
+
+    chunks = plan_chunks(len(samples), splits, overlap_samples=500)
+    assert chunks[0]['core_start'] == 0 and chunks[-1]['core_end'] == len(samples)
+    assert all(a['core_end'] == b['core_start'] for a, b in zip(chunks, chunks[1:]))
+    assert chunks[1]['start'] == splits[0] - 500 and chunks[0]['end'] == splits[0] + 500
+    print("✅ Chunks tile the audio with overlap")
+
+    # A word heard by both chunks near the first split is kept once, by its owner
+    boundary = splits[0] / rate
+
+    def word(text, start, end):
+        return {'word': text, 'start_time': start, 'end_time': end}
+
+    results = [
+        {'chunk': chunks[1], 'words': [word('edge', boundary - 0.3, boundary - 0.1), word('two', 12.0, 12.5)]},
+        {'chunk': chunks[0], 'words': [word('one', 1.0, 1.5), word('edge', boundary - 0.3, boundary - 0.1)]},
+        {'chunk': chunks[2], 'words': [word('three', 29.5, 30.0)]},
+    ]
+    stitched = [w['word'] for w in stitch_words(results, rate)]
+    assert stitched == ['one', 'edge', 'two', 'three'], stitched
+    print("✅ Overlap words are de-duplicated and order is restored")
+
+    print("✅ Parallel transcription test completed!")
+
+
+def _pieces(samples, sizes=(7, 1000, 8001)):
+    """samples as s16le bytes in irregular (sometimes odd-sized) pieces, like a pipe"""
+    data = samples.astype('<i2').tobytes()
+    pos, i = 0, 0
+    while pos < len(data):
+        size = sizes[i % len(sizes)]
+        yield data[pos:pos + size]
+        pos, i = pos + size, i + 1
+
+
+def test_spool_chunks():
+    """Chunks cut from a stream match the whole-file plan, and only they reach disk"""
+    print("🧪 Testing streamed chunk spooling...")
+    import shutil
+    import tempfile
+    from parallel_transcription import find_split_points, plan_chunks, spool_chunks
+
+    rate = 1000
+    t = np.arange(45 * rate)
+    samples = (8000 * np.sin(t * 0.3)).astype(np.int16)
+    for gap in (9.5, 19.5, 31.0):
+        samples[int(gap * rate):int((gap + 1) * rate)] = 0
+    expected = plan_chunks(len(samples), find_split_points(samples, rate, chunk_seconds=10, search_seconds=2), 500)
+
+    work_dir = tempfile.mkdtemp(prefix='spool_test_')
+    try:
+        chunks = []
+        for path, chunk in spool_chunks(_pieces(samples), work_dir, rate, chunk_seconds=10,
+                                        search_seconds=2, overlap_seconds=0.5):
+            assert os.listdir(work_dir) == [os.path.basename(path)]  # the caller deletes each one
+            written = np.fromfile(path, dtype='<i2')
+            assert np.array_equal(written, samples[chunk['start']:chunk['end']])
+            os.unlink(path)
+            chunks.append(chunk)
+        assert chunks == expected, (chunks, expected)
+        assert list(spool_chunks(iter([]), work_dir, rate)) == []
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    print("✅ Streamed chunks match the whole-file plan")
+
+
+class _FakeWhisper:
+    """Hears one word, one second into every chunk"""
+
+    def transcribe(self, samples, **options):
+        from types import SimpleNamespace
+        word = SimpleNamespace(word='surf', start=1.0, end=1.4)
+        return [SimpleNamespace(avg_logprob=-0.1, words=[word])], None
+
+
+def test_stream_pool_fallback():
+    """If the pool cannot start, the streamed chunks are still recognized, in this process"""
+    print("🧪 Testing streamed transcription fallback...")
+    import parallel_transcription
+    from media_demux import SAMPLE_RATE
+
+    parent = os.getpid()
+    load_engine = parallel_transcription._load_engine
+
+    def load_in_parent_only(engine, options):
+        if os.getpid() != parent:
+            raise RuntimeError('no model in pool processes')
+        return _FakeWhisper()
+
+    parallel_transcription._load_engine = load_in_parent_only
+    partials = []
+    try:
+        samples = np.zeros(150 * SAMPLE_RATE, dtype=np.int16)  # 60s chunks: 3 of them
+        text, words, confidences = parallel_transcription.transcribe_pcm_stream(
+            _pieces(samples, (64000,)), 'whisper', on_partial=lambda text, seconds: partials.append(seconds),
+            processes=2)
+    finally:
+        parallel_transcription._load_engine = load_in_parent_only = load_engine
+    assert text == 'surf surf surf' and len(confidences) == 3
+    assert [w['start_time'] for w in words][0] == 1.0 and partials[-1] == 150.0
+    print("✅ Streamed transcription test completed!")
+
+
+if __name__ == "__main__":
+    test_parallel_transcription()
+    test_spool_chunks()
+    test_stream_pool_fallback()
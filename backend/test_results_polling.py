@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""Test progress polling: the slim job status endpoint and conditional GETs on /results"""
+
+import os
+import sys
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _client(db_name):
+    import mongomock
+    import db_mongo
+    db_mongo._client = mongomock.MongoClient()
+    db_mongo._db = db_mongo._client[db_name]
+    import app
+    client = app.app.test_client()
+    access, _ = app._issue_tokens({'userId': 'u1', 'email': 'ann@example.com', 'name': 'Ann'})
+    client.set_cookie('access_token', access)
+    return app, client, db_mongo
+
+
+def test_job_status():
+    """The status endpoint reads one projected job document and revalidates with its ETag"""
+    try:
+        import mongomock  # noqa: F401
+    except ImportError:
+        print("⚠️ mongomock not installed, skipping job status test")
+        return
+
+    print("🧪 Testing job status endpoint...")
+    _, client, db_mongo = _client('footageflow_test_status')
+    db_mongo.upsert_video('p1', {'ownerId': 'u1'})
+    db_mongo.set_job('p1', 'processing', {'step': 'transcription', 'partialTranscript': 'waves ' * 1000})
+
+    first = client.get('/jobs/p1/status')
+    status = first.get_json()
+    assert first.status_code == 200 and first.headers.get('ETag')
+    assert (status['status'], status['currentStep']) == ('processing', 'transcription')
+    assert 'partialTranscript' not in status
+    assert client.get('/jobs/p1/status?partial=1').get_json()['partialTranscript'].startswith('waves')
+
+    unchanged = client.get('/jobs/p1/status', headers={'If-None-Match': first.headers['ETag']})
+    assert unchanged.status_code == 304 and unchanged.data == b''
+    db_mongo.set_job('p1', 'processing', {'step': 'visual_tagging'})
+    changed = client.get('/jobs/p1/status', headers={'If-None-Match': first.headers['ETag']})
+    assert changed.status_code == 200 and changed.get_json()['currentStep'] == 'visual_tagging'
+    assert client.get('/jobs/other/status').status_code == 404
+    print("✅ Job status test completed!")
+
+
+def test_results_not_modified():
+    """A /results poll with a current ETag gets a 304 without reading the transcript or tags"""
+    try:
+        import mongomock  # noqa: F401
+    except ImportError:
+        print("⚠️ mongomock not installed, skipping conditional results test")
+        return
+
+    print("🧪 Testing conditional /results...")
+    _, client, db_mongo = _client('footageflow_test_results_etag')
+    db = db_mongo.get_db()
+    db_mongo.upsert_video('p2', {'ownerId': 'u1'})
+    db_mongo.save_transcript('p2', 'surf at sunrise', [{'start_time': 0, 'end_time': 0.5, 'word': 'surf'}])
+    db_mongo.save_tags('p2', ['beach'])
+    db_mongo.set_job('p2', 'completed', {'step': 'completed'})
+
+    first = client.get('/results/p2?segments=none')
+    etag = first.headers['ETag']
+    assert first.get_json()['transcript'] == 'surf at sunrise' and first.headers['Cache-Control'] == 'private, no-cache'
+    assert client.get('/results/p2').headers['ETag'] != etag  # another representation
+
+    reads = []
+    for name in ('transcripts', 'tags'):
+        collection = db[name]
+        collection.find_one = (lambda find_one: lambda *a, **kw: reads.append(a) or find_one(*a, **kw))(
+            collection.find_one)
+    unchanged = client.get('/results/p2?segments=none', headers={'If-None-Match': etag})
+    assert unchanged.status_code == 304 and unchanged.data == b'' and reads == []
+    print("✅ Unchanged polls cost one projected job read")
+
+    db_mongo.set_job('p2', 'completed', {'step': 'completed', 'emotions': ['joy']})
+    changed = client.get('/results/p2?segments=none', headers={'If-None-Match': etag})
+    assert changed.status_code == 200 and changed.get_json()['emotions'] == ['joy'] and len(reads) == 2
+    print("✅ Conditional results test completed!")
+
+
+if __name__ == "__main__":
+    test_job_status()
+    test_results_not_modified()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""Test search caches: LRU/TTL behaviour, cached semantic search results and bulk owner lookups"""
+
+import os
+import sys
+import time
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_lru_cache():
+    """Eviction order, TTL expiry and hit/miss counters"""
+    print("🧪 Testing LRU cache...")
+    from search_cache import LRUCache, cache_stats, normalize_query
+
+    cache = LRUCache('test_lru', max_size=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1  # 'a' is now most recent
+    cache.put('c', 3)
+    assert cache.get('b') is None and cache.get('c') == 3
+    stats = cache_stats()['test_lru']
+    assert (stats['hits'], stats['misses'], stats['evictions'], stats['size']) == (2, 1, 1, 2)
+    print("✅ Least recently used entries are evicted")
+
+    expiring = LRUCache('test_ttl', max_size=10, ttl_seconds=0.05)
+    expiring.put('q', 'v')
+    assert expiring.get('q') == 'v'
+    time.sleep(0.06)
+    assert expiring.get('q') is None and len(expiring) == 0
+    print("✅ Entries expire after the TTL")
+
+    assert normalize_query('  Beach   SUNSET ') == 'beach sunset'
+    print("✅ LRU cache test completed!")
+
+
+def test_cached_semantic_search():
+    """Repeated/paged searches skip the encoder; index changes invalidate results"""
+    try:
+        import mongomock  # noqa: F401
+    except ImportError:
+        print("⚠️ mongomock not installed, skipping cached search test")
+        return
+
+    print("🧪 Testing cached semantic search...")
+    from test_semantic_index import _setup
+    with _setup() as (db_mongo, semantic_search):
+        db = db_mongo.get_db()
+        semantic_search.semantic_searcher = semantic_search.SemanticSearcher()
+        semantic_search.query_embedding_cache.clear()
+        semantic_search.search_result_cache.clear()
+        for vid, title, text, duration in [('c1', 'beach day', 'surfing waves at sunset', 30),
+                                           ('c2', 'long beach walk', 'walking along the beach waves', 900)]:
+            db_mongo.upsert_video(vid, {'originalName': title, 'ownerId': 'u1', 'duration': duration})
+            db_mongo.save_transcript(vid, text)
+
+        searcher = semantic_search.semantic_searcher
+        encoded = []
+        generate = searcher.generate_embedding
+        searcher.generate_embedding = lambda text: encoded.append(text) or generate(text)
+
+        first = semantic_search.semantic_search_videos('Beach waves', db, top_k=10)
+        assert {r['videoId'] for r in first} == {'c1', 'c2'}
+        again = semantic_search.semantic_search_videos('  beach WAVES', db, top_k=10)
+        assert again == first and encoded == ['beach waves']
+        assert semantic_search.search_result_cache.hits == 1
+        print("✅ Repeated searches are served from the result cache")
+
+        short = semantic_search.semantic_search_videos('beach waves', db, top_k=10, filters={'duration': 'short'})
+        assert [r['videoId'] for r in short] == ['c1'] and encoded == ['beach waves']
+        print("✅ Filters are part of the result key; the query embedding is reused")
+
+        searcher.remove_video('c1')
+        after = semantic_search.semantic_search_videos('beach waves', db, top_k=10)
+        assert [r['videoId'] for r in after] == ['c2'] and encoded == ['beach waves']
+        print("✅ Index changes invalidate cached results")
+
+        print("✅ Cached semantic search test completed!")
+
+
+def test_resolve_users():
+    """Owners resolve by userId, then email, then name, in one query per request"""
+    try:
+        import mongomock
+    except ImportError:
+        print("⚠️ mongomock not installed, skipping user lookup test")
+        return
+
+    print("🧪 Testing bulk owner lookups...")
+    import db_mongo
+    db_mongo._client = mongomock.MongoClient()
+    db_mongo._db = db_mongo._client['footageflow_test_users']
+    db = db_mongo.get_db()
+    db.users.insert_many([
+        {'userId': 'u1', 'email': 'ann@example.com', 'name': 'Ann', 'picture': 'ann.png'},
+        {'userId': 'u2', 'email': 'bob@example.com', 'name': 'u1'},  # a name equal to another userId
+        {'userId': 'u3', 'email': 'cat@example.com'},
+    ])
+
+    queries = []
+    find = db.users.find
+    db.users.find = lambda *a, **kw: queries.append(a) or find(*a, **kw)
+    cache = {}
+    owners = ['u1', 'bob@example.com', 'u1', 'cat@example.com', 'missing-owner', 'x@example.com', '']
+    users = db_mongo.resolve_users(owners, cache)
+    assert len(queries) == 1
+    assert users['u1'] == {'name': 'Ann', 'email': 'ann@example.com', 'picture': 'ann.png'}
+    assert users['bob@example.com']['name'] == 'u1'
+    assert users['cat@example.com']['name'] == 'cat@example.com'
+    assert users['missing-owner'] == {'name': 'User missing-', 'email': '', 'picture': ''}
+    assert users['x@example.com']['email'] == 'x@example.com'
+    assert users['']['name'] == 'Unknown User'
+    print("✅ userId beats email and name; unknown owners get a fallback")
+
+    assert db_mongo.resolve_users(['u1', 'missing-owner'], cache)['u1']['name'] == 'Ann' and len(queries) == 1
+    print("✅ A shared per-request cache skips owners already looked up")
+    print("✅ Bulk owner lookup test completed!")
+
+
+if __name__ == "__main__":
+    test_lru_cache()
+    test_cached_semantic_search()
+    test_resolve_users()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""Test the denormalized search documents: kept current on write, read once per result page"""
+
+import os
+import sys
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_search_docs():
+    """Writes update only their fields; fetches are one query and backfill missing documents"""
+    try:
+        import mongomock
+    except ImportError:
+        print("⚠️ mongomock not installed, skipping search documents test")
+        return
+
+    print("🧪 Testing search documents...")
+    import db_mongo
+    import search_docs
+    db_mongo._client = mongomock.MongoClient()
+    db_mongo._db = db_mongo._client['footageflow_test_search_docs']
+    db = db_mongo.get_db()
+
+    db.users.insert_one({'userId': 'u1', 'email': 'ann@example.com', 'name': 'Ann', 'picture': 'ann.png'})
+    db_mongo.upsert_video('d1', {'originalName': 'Beach day', 'ownerId': 'u1', 'duration': 42,
+                                 'thumbnails': {'default': 'thumbnails/d1.jpg'}})
+    db_mongo.save_transcript('d1', 'waves ' * 100)
+    db_mongo.save_tags('d1', ['beach', 'sun'])
+    db_mongo.upsert_video('d1', {'status': 'completed'})
+
+    doc = db.search_docs.find_one({'videoId': 'd1'})
+    assert doc['title'] == 'Beach day' and doc['owner']['name'] == 'Ann' and doc['duration'] == 42.0
+    assert doc['thumbnail'] == 'thumbnails/d1.jpg' and doc['tags'] == ['beach', 'sun']
+    assert doc['transcriptLength'] == 600 and doc['transcriptPreview'].endswith('...')
+    assert len(doc['transcriptPreview']) == search_docs.TRANSCRIPT_PREVIEW_CHARS + 3
+    print("✅ Uploads and processing maintain the document")
+
+    search_docs.update_likes(db, 'd1', 3)
+    search_docs.add_view(db, 'd1')
+    db.users.update_one({'userId': 'u1'}, {'$set': {'name': 'Ann B'}})
+    search_docs.update_owner(db, ['u1', 'ann@example.com'])
+    result = search_docs.result_fields(db.search_docs.find_one({'videoId': 'd1'}))
+    assert (result['likes'], result['views'], result['user']) == (3, 1, 'Ann B')
+    print("✅ Likes, views and owner changes are applied")
+
+    db.videos.insert_one({'videoId': 'legacy', 'filename': 'old.mp4', 'ownerId': 'ann@example.com'})
+    db.likes.insert_one({'videoId': 'legacy', 'userId': 'u9'})
+    queries = []
+    find = db.search_docs.find
+    db.search_docs.find = lambda *a, **kw: queries.append(a) or find(*a, **kw)
+    assert set(search_docs.fetch(db, ['d1', 'd1'])) == {'d1'} and len(queries) == 1
+    del db.search_docs.find
+    docs = search_docs.fetch(db, ['d1', 'legacy', 'gone'])
+    assert set(docs) == {'d1', 'legacy'}
+    assert docs['legacy']['title'] == 'old.mp4' and docs['legacy']['likes'] == 1
+    assert docs['legacy']['owner']['name'] == 'Ann B'
+    assert db.search_docs.count_documents({'videoId': {'$in': ['legacy', 'gone']}}) == 1
+    print("✅ One query per fetch; missing documents are built on first fetch")
+
+    search_docs.remove(db, 'legacy')
+    db.videos.delete_one({'videoId': 'legacy'})
+    db.search_docs.insert_one({'videoId': 'orphan'})
+    assert search_docs.rebuild(db) == 1
+    assert [d['videoId'] for d in db.search_docs.find()] == ['d1']
+    print("✅ Rebuild drops orphans")
+    print("✅ Search documents test completed!")
+
+
+if __name__ == "__main__":
+    test_search_docs()
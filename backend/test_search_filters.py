@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""Test filter-aware retrieval (keyword and semantic indexes) and cursor pagination"""
+
+import os
+import sys
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_search_filters():
+    """Request filters normalize to one form that matches documents and stored attributes"""
+    print("🧪 Testing search filters...")
+    from search_filters import SearchFilters, index_attributes
+
+    filters = SearchFilters.from_request({'duration': 'Short', 'ownerId': 'u1', 'dateFrom': '2024-05-01',
+                                          'dateTo': '2024-05-31', 'tags': 'Beach, sunset'})
+    video = {'duration': 30, 'ownerId': 'u1', 'uploadedAt': '2024-05-31T23:00:00', 'tags': ['SUNSET']}
+    assert filters.active and filters.matches(video)
+    assert not filters.matches(dict(video, duration=61))
+    assert not filters.matches(dict(video, uploadedAt='2024-06-01T00:00:00'))
+    assert not filters.matches(dict(video, tags=['city']))
+    assert filters.matches_attributes(index_attributes(video, video['tags']))
+    assert filters.mongo_query('attrs.') == {
+        'attrs.durationBucket': 'short', 'attrs.ownerId': 'u1',
+        'attrs.uploadedAt': {'$gte': '2024-05-01T00:00:00', '$lt': '2024-06-01T00:00:00'},
+        'attrs.tags': {'$in': ['beach', 'sunset']},
+    }
+    assert not SearchFilters.from_request({'duration': 'all'}).active
+    print("✅ Search filters test completed!")
+
+
+def _corpus(db_mongo, count=30):
+    for i in range(count):
+        vid = f'f{i}'
+        db_mongo.upsert_video(vid, {'originalName': f'beach clip {i}', 'ownerId': 'rare' if i == 7 else 'common',
+                                    'duration': 30 if i % 3 else 600, 'uploadedAt': f'2024-01-{i + 1:02d}T10:00:00'})
+        db_mongo.save_transcript(vid, f'waves on the beach number {i}')
+        db_mongo.save_tags(vid, ['beach', 'night' if i % 5 == 0 else 'day'])
+
+
+def test_filtered_keyword_lookup():
+    """Filters are part of the posting query and follow metadata changes"""
+    try:
+        import mongomock  # noqa: F401
+    except ImportError:
+        print("⚠️ mongomock not installed, skipping filtered keyword test")
+        return
+
+    print("🧪 Testing filtered keyword lookups...")
+    from test_semantic_index import _setup
+    with _setup() as (db_mongo, _):
+        db = db_mongo.get_db()
+        import keyword_index
+        from search_filters import SearchFilters
+        _corpus(db_mongo)
+
+        def found(**filters):
+            return set(keyword_index.lookup(db, 'beach', filters=SearchFilters.from_request(filters)))
+
+        assert found(ownerId='rare') == {'f7'}
+        assert found(duration='long') == {f'f{i}' for i in range(0, 30, 3)}
+        assert found(tags=['night'], dateTo='2024-01-10') == {'f0', 'f5'}
+        db_mongo.upsert_video('f7', {'ownerId': 'common'})
+        db_mongo.save_tags('f1', ['night'])
+        assert found(ownerId='rare') == set() and 'f1' in found(tags=['night'])
+        print("✅ Filtered keyword lookup test completed!")
+
+
+def test_filtered_semantic_search():
+    """Filtered searches return top_k matching videos (pre- and post-filtered)"""
+    try:
+        import mongomock  # noqa: F401
+    except ImportError:
+        print("⚠️ mongomock not installed, skipping filtered semantic test")
+        return
+
+    print("🧪 Testing filtered semantic search...")
+    from test_semantic_index import _setup
+    with _setup() as (db_mongo, semantic_search):
+        db = db_mongo.get_db()
+        from search_filters import SearchFilters
+        _corpus(db_mongo)
+        searcher = semantic_search.SemanticSearcher()
+        assert searcher.build_video_index(db)
+
+        rare = searcher.search('beach waves', top_k=5, filters=SearchFilters(owner_id='rare'))
+        assert [r['videoId'] for r in rare] == ['f7']  # 1 of 30 videos: pre-filtered
+        long_videos = searcher.search('beach waves', top_k=8, filters=SearchFilters(duration='long'))
+        assert len(long_videos) == 8 and all(r['duration'] == 600 for r in long_videos)  # post-filtered, widened
+        print("✅ Filtered semantic search test completed!")
+
+
+def test_cursor_pagination():
+    """Pages come from one search session; cursors survive index changes"""
+    print("🧪 Testing cursor pagination...")
+    from search_pagination import paginate, search_sessions
+
+    runs = []
+    ranked = [{'videoId': f'v{i}'} for i in range(5)]
+
+    def search():
+        runs.append(1)
+        return list(ranked), {'search_type': 'test'}
+
+    key = ('beach', (), 'hybrid')
+    first = paginate(search, limit=2, key=key)
+    assert [r['videoId'] for r in first['results']] == ['v0', 'v1'] and first['total'] == 5
+    ranked.insert(0, {'videoId': 'new'})  # the index changes between pages
+    second = paginate(search, limit=2, cursor=first['nextCursor'], key=key)
+    third = paginate(search, limit=2, cursor=second['nextCursor'], key=key)
+    assert [r['videoId'] for r in second['results'] + third['results']] == ['v2', 'v3', 'v4']
+    assert third['nextCursor'] is None and len(runs) == 1 and third['info'] == {'search_type': 'test'}
+    print("✅ Later pages reuse the session and stay stable")
+
+    search_sessions.clear()
+    again = paginate(search, limit=2, cursor=first['nextCursor'], key=key)
+    assert again['offset'] == 2 and len(runs) == 2
+    for cursor, other_key in (('not-a-cursor', key), (again['nextCursor'], ('beach', (), 'keyword')),
+                              (again['nextCursor'], ('sunset', (), 'hybrid'))):
+        try:
+            paginate(search, limit=2, cursor=cursor, key=other_key)
+            assert False, 'cursor accepted for another search'
+        except ValueError:
+            pass
+    search_sessions.clear()
+    try:
+        paginate(search, limit=2, cursor=again['nextCursor'], key=('beach', ('long',), 'hybrid'))
+        assert False, 'expired cursor accepted for another search'
+    except ValueError:
+        pass
+    assert len(runs) == 2
+    print("✅ Expired cursors search again from their offset; malformed or foreign ones are rejected")
+    print("✅ Cursor pagination test completed!")
+
+
+if __name__ == "__main__":
+    test_search_filters()
+    test_filtered_keyword_lookup()
+    test_filtered_semantic_search()
+    test_cursor_pagination()
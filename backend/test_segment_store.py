@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""Test columnar word-segment storage: round trip, size, time ranges and legacy transcripts"""
+
+import os
+import sys
+import random
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+WORDS = "the surf was big today and we paddled out past the break at sunrise".split()
+
+
+def _segments(count, seed=0):
+    rng = random.Random(seed)
+    segments, t = [], 0.0
+    for _ in range(count):
+        length = rng.uniform(0.15, 0.6)
+        segments.append({'start_time': round(t, 3), 'end_time': round(t + length, 3), 'word': rng.choice(WORDS),
+                         'confidence': round(rng.uniform(0.5, 1.0), 4), 'source': 'speech'})
+        t += length + rng.uniform(0.0, 0.3)
+    return segments
+
+
+def test_pack_round_trip():
+    """Packed segments decode to the same words, times and confidences in far less space"""
+    print("🧪 Testing segment packing...")
+    import bson
+    import segment_store
+
+    segments = _segments(10000)
+    packed = segment_store.pack(segments)
+    legacy_bytes = len(bson.encode({'segments': segments}))
+    packed_bytes = len(bson.encode({'segmentsPacked': packed}))
+    print(f"📊 10k words: {legacy_bytes / 1024:.0f}KB as subdocuments, {packed_bytes / 1024:.0f}KB packed "
+          f"({packed['codec']}, x{legacy_bytes / packed_bytes:.1f})")
+    assert legacy_bytes >= 5 * packed_bytes
+
+    decoded = segment_store.PackedSegments(packed).to_list()
+    assert len(decoded) == len(segments)
+    for original, restored in zip(segments, decoded):
+        assert restored['word'] == original['word'] and restored['source'] == 'speech'
+        assert abs(restored['start_time'] - original['start_time']) < 1e-3
+        assert abs(restored['confidence'] - original['confidence']) < 1e-4
+    assert segment_store.pack([]) is None
+
+    unsorted = [{'start_time': 2, 'end_time': 3, 'word': 'b'}, {'start_time': 0, 'end_time': 1, 'word': 'a'}]
+    restored = segment_store.PackedSegments(segment_store.pack(unsorted, codec='none')).to_list()
+    assert [s['word'] for s in restored] == ['a', 'b'] and 'confidence' not in restored[0]
+    print("✅ Round trip is exact to the millisecond; missing confidences stay missing")
+
+
+def test_time_ranges():
+    """between() and columns() return the words overlapping a time window"""
+    print("🧪 Testing segment time ranges...")
+    import segment_store
+
+    segments = _segments(2000, seed=1)
+    packed = segment_store.PackedSegments(segment_store.pack(segments))
+    assert len(packed) == 2000 and packed._columns is None  # counting needs no decoding
+    window = packed.between(60.0, 90.0)
+    expected = [s for s in segments if s['end_time'] > 60.0 and s['start_time'] < 90.0]
+    assert [s['word'] for s in window] == [s['word'] for s in expected]
+    columns = packed.columns(60.0, 90.0)
+    assert columns['count'] == len(expected)
+    assert [columns['vocab'][i] for i in columns['wordIds']] == [s['word'] for s in expected]
+    assert packed.between(10 ** 6) == [] and packed.columns(10 ** 6)['count'] == 0
+
+    legacy = segment_store.load({'segments': segments[:3]})
+    assert [s['word'] for s in legacy.to_list()] == [s['word'] for s in segments[:3]]
+    print("✅ Time windows match a linear scan; legacy lists load the same way")
+
+
+def test_stored_segments():
+    """save_transcript stores packed columns; the migration packs legacy transcripts"""
+    try:
+        import mongomock
+    except ImportError:
+        print("⚠️ mongomock not installed, skipping stored segments test")
+        return
+
+    print("🧪 Testing stored segments...")
+    import db_mongo
+    import db_migrate
+    import segment_store
+    db_mongo._client = mongomock.MongoClient()
+    db_mongo._db = db_mongo._client['footageflow_test_segments']
+    db = db_mongo.get_db()
+
+    segments = _segments(50)
+    db_mongo.save_transcript('s1', 'surf', segments)
+    stored = db.transcripts.find_one({'videoId': 's1'})
+    assert 'segments' not in stored and stored['segmentCount'] == 50
+    assert len(segment_store.segments_of(stored)) == 50
+
+    db.transcripts.insert_one({'videoId': 's2', 'text': 'old', 'segments': segments[:5]})
+    db_migrate.migrate(db)
+    migrated = db.transcripts.find_one({'videoId': 's2'})
+    assert 'segments' not in migrated and migrated['segmentCount'] == 5
+    assert segment_store.segments_of(migrated)[0]['word'] == segments[0]['word']
+    print("✅ Saves and the migration store only packed columns")
+
+
+if __name__ == "__main__":
+    test_pack_round_trip()
+    test_time_ranges()
+    test_stored_segments()
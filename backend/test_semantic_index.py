@@ -0,0 +1,409 @@
+#!/usr/bin/env python3
+"""Test incremental semantic index updates (mongomock + a tiny bag-of-words encoder)"""
+
+import os
+import sys
+import shutil
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import numpy as np
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fake_encoder import FakeEncoder
+
+
+@contextmanager
+def _setup():
+    """mongomock plus the fake encoder as 'minilm'; module state is restored afterwards"""
+    import mongomock
+    import db_mongo
+    db_mongo._client = mongomock.MongoClient()
+    db_mongo._db = db_mongo._client['footageflow_test']
+
+    import semantic_search
+    from model_registry import model_registry
+    saved = (semantic_search.SEMANTIC_SEARCH_AVAILABLE, semantic_search.SEMANTIC_INDEX_DIR,
+             semantic_search.semantic_searcher, model_registry._entries.get('minilm'))
+    index_dir = tempfile.mkdtemp(prefix='semantic_index_')
+    semantic_search.SEMANTIC_SEARCH_AVAILABLE = True
+    semantic_search.SEMANTIC_INDEX_DIR = index_dir
+    model_registry.register('minilm', FakeEncoder, 'fake encoder')
+    try:
+        yield db_mongo, semantic_search
+    finally:
+        available, directory, searcher, entry = saved
+        semantic_search.SEMANTIC_SEARCH_AVAILABLE = available
+        semantic_search.SEMANTIC_INDEX_DIR = directory
+        semantic_search.semantic_searcher = searcher
+        if entry is None:
+            model_registry._entries.pop('minilm', None)
+        else:
+            model_registry._entries['minilm'] = entry
+        shutil.rmtree(index_dir, ignore_errors=True)
+
+
+def test_semantic_index():
+    """New transcripts/tags and deletes reach the index without a rebuild"""
+    try:
+        import mongomock  # noqa: F401
+    except ImportError:
+        print("⚠️ mongomock not installed, skipping semantic index test")
+        return
+
+    print("🧪 Testing incremental semantic index...")
+    with _setup() as (db_mongo, semantic_search):
+        db = db_mongo.get_db()
+        searcher = semantic_search.SemanticSearcher()
+
+        db_mongo.upsert_video('v1', {'originalName': 'beach day', 'ownerId': 'u1'})
+        db_mongo.save_transcript('v1', 'surfing waves on the beach at sunset')
+        # Older than the clock-skew lookback, so the next sync will not re-apply it
+        db.index_changes.update_one({'videoId': 'v1'}, {'$set': {'changedAt': datetime.utcnow() - timedelta(minutes=5)}})
+        assert searcher.build_video_index(db)
+        first_ids = searcher.ids_by_video['v1']
+        assert searcher.search('beach waves', 5)[0]['videoId'] == 'v1'
+        print("✅ Initial build indexes existing videos")
+
+        # A worker saves a new video: only the change log is written
+        db_mongo.upsert_video('v2', {'originalName': 'mountain hike', 'ownerId': 'u1'})
+        db_mongo.save_transcript('v2', 'climbing the snowy mountain trail')
+        db_mongo.save_tags('v2', ['mountain', 'snow'])
+        embedded = _counting(searcher)
+        assert searcher.sync_changes(db, force=True) == 1
+        assert len(embedded) == 1  # only v2 re-encoded, no full rebuild
+        assert searcher.search('snowy mountain', 5)[0]['videoId'] == 'v2'
+        assert searcher.sync_changes(db, force=True) == 0
+        print("✅ New videos become searchable with one embedding each")
+
+        # Re-saving replaces the old vectors (ids are never reused)
+        db_mongo.save_tags('v1', ['ocean'])
+        searcher.sync_changes(db, force=True)
+        assert searcher.ids_by_video['v1'] != first_ids and first_ids[0] not in searcher.passages
+        assert len(searcher.store) == 2
+        print("✅ Updates replace the video's vectors")
+
+        db_mongo.record_index_change('v1', 'delete')
+        searcher.sync_changes(db, force=True)
+        assert 'v1' not in searcher.ids_by_video
+        assert [r['videoId'] for r in searcher.search('beach waves', 5)] == ['v2']
+        print("✅ Deleted videos drop out of results")
+
+        print("✅ Semantic index test completed!")
+
+
+def test_search_during_sync():
+    """Searches running while a sync replaces vectors see a whole index state, never a torn one"""
+    try:
+        import mongomock  # noqa: F401
+    except ImportError:
+        print("⚠️ mongomock not installed, skipping concurrent search test")
+        return
+
+    print("🧪 Testing searches during syncs...")
+    import threading
+    with _setup() as (db_mongo, semantic_search):
+        db = db_mongo.get_db()
+        for i in range(20):
+            db_mongo.upsert_video(f'c{i}', {'originalName': f'clip {i}', 'ownerId': 'u1'})
+            db_mongo.save_transcript(f'c{i}', f'surfing waves at the beach number {i}')
+        searcher = semantic_search.SemanticSearcher()
+        assert searcher.build_video_index(db)
+
+        done = threading.Event()
+
+        def edit():
+            for round_ in range(15):
+                for i in range(20):
+                    db_mongo.save_transcript(f'c{i}', f'surfing waves at the beach take {round_} {i}')
+                searcher.sync_changes(db, force=True)
+            done.set()
+
+        threading.Thread(target=edit, daemon=True).start()
+        searches = 0
+        while not done.is_set():
+            hits = searcher.search('surfing waves beach', 5)
+            assert len(hits) == 5 and all(hit['videoId'].startswith('c') for hit in hits)
+            searches += 1
+        assert len(searcher.store) == 20 and len(searcher.passages) == 20
+        print(f"✅ {searches} searches during 15 full re-syncs all returned complete results")
+
+
+def _counting(searcher):
+    embedded = []
+    single, batched = searcher.generate_embedding, searcher.generate_embeddings
+    searcher.generate_embedding = lambda text: embedded.append(text) or single(text)
+    searcher.generate_embeddings = lambda texts: embedded.extend(texts) or batched(texts)
+    return embedded
+
+
+def test_batched_embeddings():
+    """Batches are length-sorted internally but results keep the input order"""
+    print("🧪 Testing batched embeddings...")
+    import semantic_search
+    from model_registry import model_registry
+    before = (semantic_search.SEMANTIC_SEARCH_AVAILABLE, model_registry._entries.get('minilm'))
+    with _setup() as (_, semantic_search):
+        searcher = semantic_search.SemanticSearcher()
+        texts = ['a much longer text about mountains and snowy trails', 'ok', 'beach waves',
+                 '', 'city lights at night', 'x' * 500]
+        batches = []
+        encode = searcher.model.encode
+        searcher.model.encode = lambda batch, **kw: batches.append(list(batch)) or encode(batch, **kw)
+        try:
+            embeddings = searcher.generate_embeddings(texts, batch_size=2)
+        finally:
+            searcher.model.encode = encode
+        assert embeddings[1] is None and embeddings[3] is None  # too short to embed
+        for text, embedding in zip(texts, embeddings):
+            if embedding is not None:
+                assert np.allclose(embedding, searcher.generate_embedding(text))
+        assert [len(b) for b in batches] == [2, 2]
+        assert batches[0][0] == 'x' * 500  # longest first
+        print("✅ Batched embeddings match single encodes")
+    assert (semantic_search.SEMANTIC_SEARCH_AVAILABLE, model_registry._entries.get('minilm')) == before
+    print("✅ The fake encoder is unregistered afterwards")
+
+
+def test_semantic_index_snapshot():
+    """A restarted searcher loads the saved index and re-encodes only changed videos"""
+    try:
+        import mongomock  # noqa: F401
+    except ImportError:
+        print("⚠️ mongomock not installed, skipping semantic index snapshot test")
+        return
+
+    print("🧪 Testing semantic index snapshots...")
+    with _setup() as (db_mongo, semantic_search):
+        db = db_mongo.get_db()
+        for vid, title, text in [('s1', 'beach day', 'surfing waves at sunset'),
+                                 ('s2', 'mountain hike', 'climbing the snowy trail'),
+                                 ('s3', 'city night', 'neon lights and traffic')]:
+            db_mongo.upsert_video(vid, {'originalName': title, 'ownerId': 'u1'})
+            db_mongo.save_transcript(vid, text)
+
+        first = semantic_search.SemanticSearcher()
+        assert len(_counting(first)) == 0 and first.build_video_index(db)
+        assert os.path.exists(os.path.join(semantic_search.SEMANTIC_INDEX_DIR, 'CURRENT'))
+        print("✅ First build encodes everything and saves a snapshot")
+
+        restarted = semantic_search.SemanticSearcher()
+        embedded = _counting(restarted)
+        assert restarted.build_video_index(db) and embedded == []
+        assert restarted.ids_by_video == first.ids_by_video
+        assert restarted.search('snowy trail', 3)[0]['videoId'] == 's2'
+        print("✅ Restart reuses every stored vector")
+
+        # Edited while the process was down: only that video is stale
+        db_mongo.save_transcript('s3', 'quiet forest stream')
+        db.videos.delete_one({'videoId': 's1'})
+        restarted = semantic_search.SemanticSearcher()
+        embedded = _counting(restarted)
+        assert restarted.build_video_index(db) and len(embedded) == 1 and 'forest' in embedded[0]
+        assert sorted(restarted.ids_by_video) == ['s2', 's3']
+        assert restarted.search('forest stream', 3)[0]['videoId'] == 's3'
+        print("✅ Only changed videos are re-encoded; deleted ones are dropped")
+
+        print("✅ Semantic index snapshot test completed!")
+
+
+def test_failed_build_stays_unbuilt():
+    """A build that fails part way leaves nothing half-applied for syncs to write into"""
+    try:
+        import mongomock  # noqa: F401
+    except ImportError:
+        print("⚠️ mongomock not installed, skipping failed build test")
+        return
+
+    print("🧪 Testing failed semantic index builds...")
+    with _setup() as (db_mongo, semantic_search):
+        db = db_mongo.get_db()
+        db_mongo.upsert_video('f1', {'originalName': 'beach day', 'ownerId': 'u1'})
+        db_mongo.save_transcript('f1', 'surfing waves at sunset')
+        searcher = semantic_search.SemanticSearcher()
+
+        def broken(vectors):
+            raise RuntimeError('could not open in mode r+')
+
+        searcher._remove_vectors = broken
+        assert not searcher.build_video_index(db)
+        assert not searcher._built and searcher.sync_changes(db, force=True) == 0
+        del searcher._remove_vectors
+        assert searcher.ensure_index(db) and searcher.search('surfing sunset', 1)[0]['videoId'] == 'f1'
+        print("✅ Failed builds are retried instead of synced into")
+
+
+def test_ann_snapshot_updates():
+    """Every tier survives a save and reload, then takes upserts and deletes (no index left read-only)"""
+    try:
+        import mongomock  # noqa: F401
+        import faiss  # noqa: F401
+    except ImportError:
+        print("⚠️ mongomock/faiss not installed, skipping ANN snapshot test")
+        return
+
+    print("🧪 Testing snapshot reload and updates per index tier...")
+    import vector_index
+    tier, min_vectors = vector_index.SEMANTIC_INDEX_TIER, vector_index.MIN_ANN_VECTORS
+    vector_index.MIN_ANN_VECTORS = 1
+    try:
+        for name in vector_index.TIERS:
+            vector_index.SEMANTIC_INDEX_TIER = name
+            with _setup() as (db_mongo, semantic_search):
+                db = db_mongo.get_db()
+                # PQ codebooks need 256 training vectors; written directly, so no change log entries
+                db.videos.insert_many([{'videoId': f'i{i}', 'originalName': f'clip {i}', 'ownerId': 'u1'}
+                                       for i in range(300)])
+                db.transcripts.insert_many([{'videoId': f'i{i}', 'text': f'waves number {i} at the beach'}
+                                            for i in range(300)])
+                first = semantic_search.SemanticSearcher()
+                assert first.build_video_index(db) and first._tier == name
+
+                restarted = semantic_search.SemanticSearcher()
+                embedded = _counting(restarted)
+                assert restarted.build_video_index(db) and restarted._tier == name and embedded == []
+                db_mongo.save_transcript('i3', 'snowy mountain trail')
+                db_mongo.record_index_change('i7', 'delete')
+                assert restarted.sync_changes(db, force=True) == 2
+                assert restarted.search('snowy mountain trail', 1)[0]['videoId'] == 'i3'
+                assert 'i7' not in [r['videoId'] for r in restarted.search('waves number 7 at the beach', 5)]
+                assert len(restarted.store) == 299
+                print(f"✅ {name}: reloads, upserts and deletes")
+    finally:
+        vector_index.SEMANTIC_INDEX_TIER, vector_index.MIN_ANN_VECTORS = tier, min_vectors
+    print("✅ ANN snapshot test completed!")
+
+
+def test_passage_search():
+    """Long transcripts are split into timed passages; hits point at the matching moment"""
+    try:
+        import mongomock  # noqa: F401
+    except ImportError:
+        print("⚠️ mongomock not installed, skipping passage search test")
+        return
+
+    print("🧪 Testing passage-level search...")
+    with _setup() as (db_mongo, semantic_search):
+        db = db_mongo.get_db()
+
+        # 300 words, one per second; the only mention of whales is around t=250s
+        words = ['chatting about the weather today'.split()[i % 5] for i in range(300)]
+        words[250:253] = ['humpback', 'whales', 'breaching']
+        segments = [{'word': w, 'start_time': float(i), 'end_time': i + 0.8} for i, w in enumerate(words)]
+        passages = semantic_search.split_passages('boat trip', ['sea'], ' '.join(words), segments, max_words=100, overlap=20)
+        assert len(passages) == 4 and passages[1][1:] == (80.0, 179.8)
+        assert all(text.startswith('boat trip sea ') for text, _, _ in passages)
+        assert semantic_search.split_passages('', [], 'no timing here', [])[0] == ('no timing here', None, None)
+        print("✅ Transcripts split into overlapping time-aligned passages")
+
+        db_mongo.upsert_video('w1', {'originalName': 'boat trip', 'ownerId': 'u1'})
+        db_mongo.save_transcript('w1', ' '.join(words), segments)
+        db_mongo.upsert_video('w2', {'originalName': 'dinner', 'ownerId': 'u1'})
+        db_mongo.save_transcript('w2', 'cooking pasta with fresh tomatoes')
+        searcher = semantic_search.SemanticSearcher()
+        assert searcher.build_video_index(db)
+        assert len(searcher.ids_by_video['w1']) == len(semantic_search.split_passages('boat trip', [], '', segments))
+        hits = searcher.search('humpback whales breaching', 5)
+        assert hits[0]['videoId'] == 'w1' and hits[0]['matchStart'] <= 250 <= hits[0]['matchEnd']
+        assert [r['videoId'] for r in hits].count('w1') == 1
+        print("✅ One result per video, with the timestamp of the matching passage")
+
+
+def test_vector_store():
+    """Flat tier: lazy adds/removals and argpartition top-k match a full sort"""
+    print("🧪 Testing vector store...")
+    from vector_index import VectorStore, choose_tier
+
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((500, 16)).astype('float32')
+    store = VectorStore(vectors[:300], np.arange(300))
+    store.add(np.arange(300, 500), vectors[300:])
+    store.remove(np.array([5, 450]))
+    store.add(np.array([5]), vectors[6:7])  # an id may come back after removal
+    assert len(store) == 499
+
+    query = rng.standard_normal(16).astype('float32')
+    hits = store.search(query, 10)
+    live = [i for i in range(500) if i != 450]
+    by_id = {i: vectors[6] if i == 5 else vectors[i] for i in live}
+    expected = sorted(live, key=lambda i: -float(by_id[i] @ query))[:10]
+    assert [vector_id for vector_id, _ in hits] == expected
+    assert choose_tier(10 ** 6, False, '/nonexistent') == 'flat'
+    assert choose_tier(10, True, '/nonexistent') == 'flat'
+    print("✅ Exact top-k over the store")
+
+
+def test_snapshot_migration():
+    """Format-2 snapshots (raw float32) are normalized and re-saved as float16 without re-encoding"""
+    try:
+        import mongomock  # noqa: F401
+    except ImportError:
+        print("⚠️ mongomock not installed, skipping snapshot migration test")
+        return
+
+    print("🧪 Testing snapshot migration and quantized storage...")
+    import json
+    with _setup() as (db_mongo, semantic_search):
+        import semantic_index_store
+        from vector_index import VectorStore
+        db = db_mongo.get_db()
+        db_mongo.upsert_video('m1', {'originalName': 'beach day', 'ownerId': 'u1'})
+        db_mongo.save_transcript('m1', 'surfing waves at sunset')
+        db_mongo.upsert_video('m2', {'originalName': 'mountain hike', 'ownerId': 'u1'})
+        db_mongo.save_transcript('m2', 'climbing the snowy trail')
+
+        searcher = semantic_search.SemanticSearcher()
+        assert searcher.build_video_index(db)
+        vectors, ids = searcher.store.float_arrays()
+        # Rewrite it the way format 2 stored it: float32 and not normalized
+        index_dir = semantic_search.SEMANTIC_INDEX_DIR
+        path = semantic_index_store.save_snapshot(index_dir, vectors * 3.0, ids, json.loads(json.dumps({
+            vid: {'ids': v_ids, 'spans': [[None, None]] * len(v_ids), 'hash': searcher.hash_by_video[vid],
+                  'meta': searcher.video_metadata[vid]} for vid, v_ids in searcher.ids_by_video.items()})),
+            semantic_search.SENTENCE_MODEL_NAME, searcher._next_id)
+        with open(os.path.join(path, 'metadata.json')) as f:
+            sidecar = json.load(f)
+        sidecar['version'] = 2
+        with open(os.path.join(path, 'metadata.json'), 'w') as f:
+            json.dump(sidecar, f)
+
+        migrated = semantic_search.SemanticSearcher()
+        embedded = _counting(migrated)
+        assert migrated.build_video_index(db) and embedded == []
+        stored, _ = migrated.store.arrays()
+        assert stored.dtype == np.float16
+        assert np.allclose(np.linalg.norm(stored.astype('float32'), axis=1), 1.0, atol=1e-3)
+        assert 0.99 <= migrated.search('surfing waves at sunset beach day', 2)[0]['semantic_score'] <= 1.001
+        with open(os.path.join(index_dir, 'CURRENT')) as f:
+            current = f.read().strip()
+        with open(os.path.join(index_dir, current, 'metadata.json')) as f:
+            resaved = json.load(f)
+        assert resaved['version'] == semantic_index_store.INDEX_FORMAT_VERSION and resaved['dtype'] == 'float16'
+        print("✅ Old snapshots migrate in place; scores are bounded cosines")
+
+        rng = np.random.default_rng(1)
+        unit = rng.standard_normal((200, 32)).astype('float32')
+        unit /= np.linalg.norm(unit, axis=1, keepdims=True)
+        query = unit[7]
+        exact = dict(VectorStore(unit, np.arange(200), dtype='float32').search(query, 5))
+        for dtype, itemsize in (('float16', 2), ('int8', 1)):
+            store = VectorStore(unit, np.arange(200), dtype=dtype)
+            assert store.arrays()[0].itemsize == itemsize
+            hits = store.search(query, 5)
+            assert hits[0][0] == 7 and all(abs(score - exact.get(i, score)) < 0.02 for i, score in hits)
+        print("✅ float16/int8 stores keep scores within 0.02 of float32")
+
+
+if __name__ == "__main__":
+    test_semantic_index()
+    test_search_during_sync()
+    test_batched_embeddings()
+    test_semantic_index_snapshot()
+    test_failed_build_stays_unbuilt()
+    test_ann_snapshot_updates()
+    test_passage_search()
+    test_vector_store()
+    test_snapshot_migration()
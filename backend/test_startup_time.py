@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""Startup benchmark: importing app.py in fast-start mode must stay quick and light"""
+
+import os
+import sys
+import json
+import tempfile
+import subprocess
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+STARTUP_BUDGET_SECONDS = float(os.environ.get('STARTUP_BUDGET_SECONDS', '5'))
+HEAVY_MODULES = ['torch', 'transformers', 'ultralytics', 'sentence_transformers', 'faiss',
+                 'cv2', 'pytesseract', 'vosk', 'google.generativeai', 'faster_whisper']
+
+PROBE = f"""
+import sys, time, json
+sys.path.insert(0, {BACKEND_DIR!r})
+started = time.perf_counter()
+import app
+elapsed = time.perf_counter() - started
+health = app.app.test_client().get('/health').get_json()
+print(json.dumps({{
+    'seconds': elapsed,
+    'heavy': [m for m in {HEAVY_MODULES!r} if m in sys.modules],
+    'capabilities': health['capabilities'],
+}}))
+"""
+
+
+def test_startup_time():
+    """app.py imports under budget without pulling in any heavy AI library"""
+    print("🧪 Benchmarking app startup...")
+    env = dict(os.environ, FAST_START='true', MONGODB_URI='mongodb://127.0.0.1:1/?serverSelectionTimeoutMS=200')
+    with tempfile.TemporaryDirectory() as cwd:  # app creates upload dirs in cwd
+        proc = subprocess.run([sys.executable, '-c', PROBE], cwd=cwd, env=env,
+                              capture_output=True, text=True, timeout=120)
+    assert proc.returncode == 0, proc.stderr[-2000:]
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+
+    print(f"⏱️ import app: {result['seconds']:.2f}s (budget {STARTUP_BUDGET_SECONDS}s)")
+    assert result['heavy'] == [], f"heavy modules imported at startup: {result['heavy']}"
+    assert result['seconds'] < STARTUP_BUDGET_SECONDS
+    assert not any(c['ready'] or c['imported'] for c in result['capabilities'].values())
+    print("✅ Nothing heavy imported; /health reports every capability as deferred")
+
+
+if __name__ == "__main__":
+    test_startup_time()
@@ -28,6 +28,7 @@ try:
     import speech_recognition as sr
 except ImportError:
     sr = None
+from parallel_transcription import should_parallelize, transcribe_audio_file
 # Note: faster_whisper removed due to import issues
 # Note: google.cloud.exceptions removed due to import issues
 
@@ -214,12 +215,33 @@ class TranscriptionService:
             self._whisper_model = None
             return None
 
-    def transcribe_audio_with_faster_whisper(self, local_audio_path: str, language: str = 'en'):
+    def transcribe_audio_with_faster_whisper(self, local_audio_path: str, language: str = 'en', duration: float = None):
         """
         Transcribe audio using faster-whisper with word-level timestamps.
+        Long audio (known duration) is split at silences and transcribed on several cores.
         Returns a dict with transcript, word_timestamps, confidence.
         """
         try:
+            if WhisperModel is None:
+                return None
+
+            if duration and should_parallelize(duration):
+                result = transcribe_audio_file(local_audio_path, 'whisper', {
+                    'model_size': self._whisper_model_name,
+                    'compute_type': self._whisper_compute_type,
+                    'language': language,
+                })
+                if result is not None:
+                    text, word_timestamps, confidences = result
+                    if text:
+                        logger.info(f"Parallel Whisper transcription completed: {len(text)} chars, {len(word_timestamps)} words")
+                        return {
+                            'transcript': " ".join(text.split()),
+                            'word_timestamps': word_timestamps,
+                            'confidence': sum(confidences) / len(confidences) if confidences else 0.8
+                        }
+                    return None
+
             model = self._get_whisper_model()
             if model is None:
                 return None
@@ -483,7 +505,7 @@ class TranscriptionService:
                         actual_duration = 60.0  # Default to 60 seconds
 
             # Method 1: faster-whisper (preferred)
-            fw_result = self.transcribe_audio_with_faster_whisper(local_audio_path, language='en')
+            fw_result = self.transcribe_audio_with_faster_whisper(local_audio_path, language='en', duration=actual_duration)
             if fw_result and fw_result.get('transcript'):
                 return fw_result
 
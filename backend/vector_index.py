@@ -0,0 +1,224 @@
+"""
+Vector Index Tiers for Semantic Search
+Passage vectors always live in a VectorStore: plain numpy arrays, memory-mapped
+from the saved snapshot, searched exactly with one matrix product and
+argpartition (the "flat" tier). Above SEMANTIC_ANN_MIN_VECTORS a FAISS
+approximate index is trained from the store:
+
+- ivf:   IVF, exact scores within the probed clusters, supports removal
+- ivfpq: IVF with product-quantized codes, smallest memory, approximate scores
+- hnsw:  graph index, best latency at high recall; removals become tombstones
+
+Vectors are L2-normalized, so inner product is cosine similarity, and stored
+as SEMANTIC_VECTOR_DTYPE: float16 halves memory, int8 (scaled by 127)
+quarters it, with scores within about 0.01 of float32. ANN tiers use the
+matching FAISS scalar quantizer. Because the vectors are kept, any ANN index
+can be retrained or swapped for another tier without re-encoding. benchmark_ann_tiers.py measures recall
+and latency per tier and records its pick in <index dir>/tier.json, which
+SEMANTIC_INDEX_TIER=auto follows.
+"""
+
+import os
+import json
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config import (
+    SEMANTIC_INDEX_TIER, SEMANTIC_ANN_MIN_VECTORS, SEMANTIC_IVF_NPROBE, SEMANTIC_HNSW_M, SEMANTIC_HNSW_EF_SEARCH,
+    SEMANTIC_VECTOR_DTYPE
+)
+
+logger = logging.getLogger(__name__)
+
+TIERS = ('flat', 'ivf', 'ivfpq', 'hnsw')
+DEFAULT_ANN_TIER = 'ivf'
+TIER_FILE = 'tier.json'
+MIN_ANN_VECTORS = 1024  # too few to train IVF clusters; flat is fast anyway
+VECTOR_CODES = {'float32': 'Flat', 'float16': 'SQfp16', 'int8': 'SQ8'}  # FAISS storage per dtype
+INT8_SCALE = 127.0
+SEARCH_BLOCK_ROWS = 65536  # rows converted to float32 at a time during flat search
+
+
+def l2_normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype='float32')
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def quantize(vectors: np.ndarray, dtype: str) -> np.ndarray:
+    """Store unit vectors as float32/float16, or int8 scaled by 127"""
+    if dtype == 'int8':
+        return np.clip(np.rint(np.asarray(vectors, dtype='float32') * INT8_SCALE), -127, 127).astype('int8')
+    return np.asarray(vectors, dtype=dtype)
+
+
+def dequantize(vectors: np.ndarray) -> np.ndarray:
+    if vectors.dtype == np.int8:
+        return vectors.astype('float32') / INT8_SCALE
+    return np.asarray(vectors, dtype='float32')
+
+
+class VectorStore:
+    """Append-mostly (id, vector) store; adds and removals are folded in lazily.
+
+    Vectors are kept as `dtype` (see quantize). A memory-mapped snapshot array
+    is never written: the first change after a restore builds a new in-memory
+    array. Not thread-safe: reads fold pending changes in place, so callers
+    serialize every call (SemanticSearcher holds its lock).
+    """
+
+    def __init__(self, vectors: Optional[np.ndarray] = None, ids: Optional[np.ndarray] = None,
+                 dtype: str = SEMANTIC_VECTOR_DTYPE):
+        self.dtype = dtype
+        if vectors is not None and vectors.dtype != np.dtype(dtype):
+            vectors = quantize(dequantize(vectors), dtype)
+        self._vectors = vectors
+        self._ids = np.asarray(ids, dtype='int64') if ids is not None else np.zeros(0, dtype='int64')
+        self._pending: List[Tuple[np.ndarray, np.ndarray]] = []
+        self._removed: set = set()
+
+    def __len__(self) -> int:
+        return len(self.arrays()[1])
+
+    @property
+    def dim(self) -> int:
+        if self._vectors is not None and self._vectors.ndim == 2:
+            return self._vectors.shape[1]
+        return self._pending[0][1].shape[1] if self._pending else 0
+
+    def add(self, ids: np.ndarray, vectors: np.ndarray):
+        self._pending.append((np.asarray(ids, dtype='int64'), quantize(vectors, self.dtype)))
+
+    def remove(self, ids: np.ndarray):
+        ids = np.asarray(ids, dtype='int64')
+        # Vectors added since the last fold are filtered now; stored rows at the next fold
+        pending = []
+        for pending_ids, vectors in self._pending:
+            keep = ~np.isin(pending_ids, ids)
+            if keep.any():
+                pending.append((pending_ids[keep], vectors[keep]))
+        self._pending = pending
+        self._removed.update(ids.tolist())
+
+    def arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(vectors, ids) with every pending change applied"""
+        if self._removed and len(self._ids):
+            keep = ~np.isin(self._ids, np.fromiter(self._removed, dtype='int64'))
+            self._vectors, self._ids = self._vectors[keep], self._ids[keep]
+        self._removed = set()
+        if self._pending:
+            parts = [self._vectors] if self._vectors is not None and len(self._ids) else []
+            self._vectors = np.vstack(parts + [vec for _, vec in self._pending])
+            self._ids = np.concatenate([self._ids] + [pid for pid, _ in self._pending])
+            self._pending = []
+        if self._vectors is None:
+            return np.zeros((0, 0), dtype=self.dtype), self._ids
+        return self._vectors, self._ids
+
+    def float_arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(float32 vectors, ids), e.g. to train an ANN index"""
+        vectors, ids = self.arrays()
+        return dequantize(vectors), ids
+
+    def search(self, query: np.ndarray, k: int, allowed_ids: Optional[np.ndarray] = None) -> List[Tuple[int, float]]:
+        """Exact top-k by inner product (argpartition, then sort only the k best).
+
+        With allowed_ids only those rows are scored (pre-filtered search).
+        """
+        vectors, ids = self.arrays()
+        if allowed_ids is not None and len(ids):
+            rows = np.nonzero(np.isin(ids, np.asarray(allowed_ids, dtype='int64')))[0]
+            vectors, ids = vectors[rows], ids[rows]
+        if not len(ids):
+            return []
+        query = query.reshape(-1).astype('float32')
+        scores = np.empty(len(ids), dtype='float32')
+        for start in range(0, len(ids), SEARCH_BLOCK_ROWS):
+            # float16/int8 have no fast matmul; convert a block at a time
+            scores[start:start + SEARCH_BLOCK_ROWS] = dequantize(vectors[start:start + SEARCH_BLOCK_ROWS]) @ query
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(ids[row]), float(scores[row])) for row in top]
+
+
+def _pq_subquantizers(dim: int) -> int:
+    """Largest sub-quantizer count with at least 8 dims each that divides dim (48 for MiniLM's 384)"""
+    for m in (96, 64, 48, 32, 24, 16, 12, 8, 4, 2, 1):
+        if m <= dim // 8 and dim % m == 0:
+            return m
+    return 1
+
+
+def factory_string(tier: str, count: int, dim: int, dtype: str = SEMANTIC_VECTOR_DTYPE) -> str:
+    nlist = max(1, int(4 * np.sqrt(count)))
+    code = VECTOR_CODES.get(dtype, 'Flat')
+    if tier == 'ivf':
+        return f"IVF{nlist},{code}"
+    if tier == 'ivfpq':
+        return f"IVF{nlist},PQ{_pq_subquantizers(dim)}"
+    if tier == 'hnsw':
+        return f"IDMap2,HNSW{SEMANTIC_HNSW_M},{code}"  # HNSW has no ids of its own
+    raise ValueError(f"Unknown ANN tier: {tier}")
+
+
+def tune_ann_index(index):
+    """Apply the search-time knobs (nprobe / efSearch) after training or loading"""
+    import faiss
+    if hasattr(index, 'nprobe'):
+        index.nprobe = SEMANTIC_IVF_NPROBE
+    inner = faiss.downcast_index(index.index) if hasattr(index, 'id_map') else index
+    if hasattr(inner, 'hnsw'):
+        inner.hnsw.efSearch = SEMANTIC_HNSW_EF_SEARCH
+
+
+def train_ann_index(tier: str, vectors: np.ndarray, ids: np.ndarray):
+    """Build a FAISS index of the given tier over the store's vectors"""
+    import faiss
+    vectors = np.ascontiguousarray(vectors, dtype='float32')
+    index = faiss.index_factory(vectors.shape[1], factory_string(tier, len(vectors), vectors.shape[1]),
+                                faiss.METRIC_INNER_PRODUCT)
+    if hasattr(index, 'do_polysemous_training'):
+        index.do_polysemous_training = False  # only serves Hamming pre-filtering, which search never enables
+    if not index.is_trained:
+        index.train(vectors)
+    index.add_with_ids(vectors, np.asarray(ids, dtype='int64'))
+    tune_ann_index(index)
+    return index
+
+
+def ann_search(index, query: np.ndarray, k: int) -> List[Tuple[int, float]]:
+    scores, labels = index.search(query.reshape(1, -1).astype('float32'), min(k, index.ntotal))
+    return [(int(label), float(score)) for score, label in zip(scores[0], labels[0]) if label >= 0]
+
+
+def supports_remove(tier: str) -> bool:
+    return tier in ('ivf', 'ivfpq')
+
+
+def read_tier_choice(index_dir: str) -> Optional[str]:
+    try:
+        with open(os.path.join(index_dir, TIER_FILE), encoding='utf-8') as f:
+            tier = json.load(f).get('tier')
+    except (OSError, ValueError):
+        return None
+    return tier if tier in TIERS else None
+
+
+def write_tier_choice(index_dir: str, tier: str, report: Dict):
+    os.makedirs(index_dir, exist_ok=True)
+    with open(os.path.join(index_dir, TIER_FILE), 'w', encoding='utf-8') as f:
+        json.dump({'tier': tier, **report}, f, indent=2, default=str)
+
+
+def choose_tier(count: int, faiss_available: bool, index_dir: str) -> str:
+    """Tier to use for `count` vectors under SEMANTIC_INDEX_TIER"""
+    if not faiss_available or count < MIN_ANN_VECTORS:
+        return 'flat'
+    if SEMANTIC_INDEX_TIER in TIERS:
+        return SEMANTIC_INDEX_TIER
+    if count < SEMANTIC_ANN_MIN_VECTORS:
+        return 'flat'
+    return read_tier_choice(index_dir) or DEFAULT_ANN_TIER
@@ -3,45 +3,37 @@ import cv2
 import numpy as np
 from PIL import Image
 import torch
-from ultralytics import YOLO
-from transformers import CLIPProcessor, CLIPModel
 import logging
+from model_registry import model_registry, torch_device
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class VisualTagger:
     def __init__(self):
-        self.yolo_model = None
-        self.clip_model = None
-        self.clip_processor = None
-        self.device = 'cuda' if torch.cuda.is_available() else 'cpu'
-        
-        try:
-            self._load_models()
-        except Exception as e:
-            logger.error(f"Failed to load visual models: {e}")
+        self.device = torch_device()
+        # YOLO and CLIP are loaded on first use from the shared model registry
+    
+    @property
+    def yolo_model(self):
+        return model_registry.get('yolo')
+    
+    @property
+    def clip_model(self):
+        clip = model_registry.get('clip')
+        return clip['model'] if clip else None
+    
+    @property
+    def clip_processor(self):
+        clip = model_registry.get('clip')
+        return clip['processor'] if clip else None
     
     def _load_models(self):
         """Load YOLO and CLIP models"""
-        try:
-            # Load YOLOv8n model (lightweight object detection)
-            logger.info("Loading YOLOv8n model...")
-            self.yolo_model = YOLO('yolov8n.pt')
-            
-            # Load CLIP model for scene understanding
-            logger.info("Loading CLIP model...")
-            self.clip_model = CLIPModel.from_pretrained("openai/clip-vit-base-patch32")
-            self.clip_processor = CLIPProcessor.from_pretrained("openai/clip-vit-base-patch32")
-            
-            # Move to device
-            self.clip_model = self.clip_model.to(self.device)
-            
-            logger.info(f"Visual models loaded successfully on {self.device}")
-            
-        except Exception as e:
-            logger.error(f"Error loading visual models: {e}")
-            raise
+        status = model_registry.warm(['yolo', 'clip'])
+        if not all(status.values()):
+            raise RuntimeError(f"Visual models failed to load: {status}")
+        logger.info(f"Visual models loaded successfully on {self.device}")
     
     def extract_frames(self, video_path, num_frames=5):
         """Extract frames from video for analysis"""
@@ -149,13 +141,16 @@ class VisualTagger:
             logger.error(f"Error in scene analysis: {e}")
             return []
     
-    def tag_video(self, video_path):
+    def tag_video(self, video_path, media=None):
         """Main function to tag a video with visual content"""
         try:
             logger.info(f"Starting visual tagging for: {video_path}")
             
-            # Extract frames
-            frames = self.extract_frames(video_path, num_frames=5)
+            # Extract frames (or reuse the demuxed ones)
+            if media is not None:
+                frames = [f['frame'] for f in media.load_frames(5)]
+            else:
+                frames = self.extract_frames(video_path, num_frames=5)
             if not frames:
                 logger.warning("No frames extracted from video")
                 return ["video-frame"]
@@ -102,13 +102,17 @@ class FallbackVisualTagger:
             logger.error(f"Error analyzing frame: {e}")
             return {}
     
-    def tag_video(self, video_path):
+    def tag_video(self, video_path, media=None):
         """Generate basic visual tags using fallback methods"""
         try:
             logger.info(f"Starting fallback visual tagging for: {video_path}")
             
-            # Extract frames
-            frame_paths = self.extract_frames_fallback(video_path, num_frames=3)
+            # Extract frames (or reuse the demuxed ones)
+            owns_frames = media is None
+            if media is not None:
+                frame_paths = media.frame_paths(3)
+            else:
+                frame_paths = self.extract_frames_fallback(video_path, num_frames=3)
             if not frame_paths:
                 logger.warning("No frames extracted from video")
                 return ["video-content", "frame-extraction-failed"]
@@ -123,10 +127,11 @@ class FallbackVisualTagger:
                     all_analyses.append(analysis)
                 
                 # Clean up temporary frame
-                try:
-                    os.unlink(frame_path)
-                except:
-                    pass
+                if owns_frames:
+                    try:
+                        os.unlink(frame_path)
+                    except:
+                        pass
             
             # Generate tags based on analysis
             tags = ["video-content", "visual-media"]
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Video Processing Worker
+Runs a pool of worker processes that pull jobs queued by POST /process/<videoId>.
+
+Usage: python worker.py [--workers N]
+"""
+
+import argparse
+import logging
+
+from app import process_job
+from config import JOB_WORKERS
+from job_queue import JobWorkerPool
+from model_registry import model_registry
+
+logging.basicConfig(level=logging.INFO)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run video processing workers')
+    parser.add_argument('--workers', type=int, default=JOB_WORKERS, help='number of worker processes')
+    args = parser.parse_args()
+
+    # Load MODEL_PRELOAD models once here; forked workers share them copy-on-write
+    preloaded = model_registry.preload()
+    if preloaded:
+        print(f"📦 Preloaded models: {preloaded}")
+
+    print(f"👷 Starting {args.workers} video processing workers...")
+    JobWorkerPool(process_job, args.workers).run()
+
+
+if __name__ == '__main__':
+    main()
@@ -4,6 +4,44 @@ const API_BASE = (typeof VITE_BACKEND_URL === 'string' && VITE_BACKEND_URL.trim(
 import Modal from './Modal';
 import { useNavigate } from 'react-router-dom';
 
+// Map backend job step to UI step index
+const BACKEND_STEP_INDEX = {
+  'queued': 0,
+  'starting': 0,
+  'transcription': 1,
+  'visual_tagging': 2,
+  'emotion_analysis': 3,
+  'emotion_analysis_done': 3,
+  'indexing': 4,
+  'story_draft': 5,
+  'final_render': 6
+};
+
+// Resolves with the final job status from /jobs/<id>/events; rejects if the stream is unavailable
+const followJobEvents = (videoId, onStatus) => new Promise((resolve, reject) => {
+  if (typeof EventSource === 'undefined') {
+    reject(new Error('EventSource not supported'));
+    return;
+  }
+  const source = new EventSource(`${API_BASE}/jobs/${videoId}/events`, { withCredentials: true });
+  const read = (e) => {
+    const status = JSON.parse(e.data);
+    onStatus(status);
+    return status;
+  };
+  source.addEventListener('step', read);
+  source.addEventListener('partial', read);
+  source.addEventListener('complete', (e) => {
+    source.close();
+    resolve(read(e));
+  });
+  source.addEventListener('error', (e) => {
+    source.close();
+    if (e.data) resolve(read(e)); // the job failed
+    else reject(new Error('Job event stream unavailable'));
+  });
+});
+
 const ProcessingFlowModal = ({ isOpen, videoIds, onFinished, onClose }) => {
   const [currentStep, setCurrentStep] = useState(0);
   const [currentVideoIndex, setCurrentVideoIndex] = useState(0);
@@ -159,40 +197,58 @@ const ProcessingFlowModal = ({ isOpen, videoIds, onFinished, onClose }) => {
         setCurrentStepDetails('Analyzing visual content...');
         await simulateStep(1500);
         
-        // Poll for results and reflect backend-reported step
+        // Follow the backend-reported step over server-sent events; poll the status if the stream fails
+        const showBackendStep = (status) => {
+          const backendStep = status?.currentStep;
+          if (backendStep && BACKEND_STEP_INDEX[backendStep] !== undefined) {
+            setCurrentStep(BACKEND_STEP_INDEX[backendStep]);
+          }
+        };
+        let results = await followJobEvents(videoIds[i], showBackendStep).catch(() => null);
+        if (results && results.status === 'error') {
+          throw new Error('Processing failed in background worker');
+        }
         let attempts = 0;
-        let results = null;
-        while (attempts < 30) { // Max 30 attempts (15 seconds)
-          const resultsResponse = await fetch(`${API_BASE}/results/${videoIds[i]}`,
+        while (!results && attempts < 1200) { // Max 1200 attempts (10 minutes) - processing runs in a background worker
+          // Polls only read the job status (revalidated with its ETag); results are fetched once on completion
+          const statusResponse = await fetch(`${API_BASE}/jobs/${videoIds[i]}/status`,
             { 
               credentials: 'include',
               headers: { 'X-User-Id': (JSON.parse(localStorage.getItem('user')||'{}').userId)||'' } 
             }
           );
-          if (resultsResponse.ok) {
-            results = await parseJsonSafe(resultsResponse).catch(() => null);
-            // Map backend step to UI step index
-            const stepMap = {
-              'starting': 0,
-              'transcription': 1,
-              'visual_tagging': 2,
-              'emotion_analysis': 3,
-              'emotion_analysis_done': 3,
-              'indexing': 4,
-              'story_draft': 5,
-              'final_render': 6
-            };
-            const backendStep = results?.currentStep;
-            if (backendStep && stepMap[backendStep] !== undefined) {
-              setCurrentStep(stepMap[backendStep]);
+          if (statusResponse.ok) {
+            const status = await parseJsonSafe(statusResponse).catch(() => null);
+            showBackendStep(status);
+            if (status && status.status === 'completed') results = status;
+            if (status && status.status === 'error') {
+              throw new Error('Processing failed in background worker');
             }
-            if (results && results.status === 'completed') break;
           }
+          if (results) break;
           await simulateStep(500);
           attempts++;
         }
         
         if (results && results.status === 'completed') {
+          const resultsResponse = await fetch(`${API_BASE}/results/${videoIds[i]}?segments=none`, {
+            credentials: 'include',
+            headers: { 'X-User-Id': (JSON.parse(localStorage.getItem('user')||'{}').userId)||'' }
+          });
+          results = resultsResponse.ok ? await parseJsonSafe(resultsResponse).catch(() => null) : null;
+        }
+
+        if (results && results.status === 'completed') {
+          if (results.segmentCount > 0) {
+            const segmentsResponse = await fetch(`${API_BASE}/results/${videoIds[i]}/segments`, {
+              credentials: 'include',
+              headers: { 'X-User-Id': (JSON.parse(localStorage.getItem('user')||'{}').userId)||'' }
+            });
+            if (segmentsResponse.ok) {
+              const segmentData = await parseJsonSafe(segmentsResponse).catch(() => null);
+              results.segments = Array.isArray(segmentData?.segments) ? segmentData.segments : [];
+            }
+          }
           const prepared = {
             videoId: videoIds[i],
             transcript: results.transcript,